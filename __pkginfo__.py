@@ -57,6 +57,7 @@ packages = [
     'trepan.processor.command',
 #   'trepan.processor.command.ipython_magic',
     'trepan.processor.command.info_subcmd',
+    'trepan.processor.command.profile_subcmd',
     'trepan.processor.command.set_subcmd',
     'trepan.processor.command.show_subcmd'
 ]
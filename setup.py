@@ -26,6 +26,7 @@ setup(
        entry_points = {
         'console_scripts': [
             'trepan2  = trepan.cli:main',
+            'trepan2-tracedump = trepan.tracedump:main',
         ]},
        install_requires   = install_requires,
        license            = license,
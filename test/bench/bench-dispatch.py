@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Benchmark the cost per trace event of running a program under the
+debugger, with trace_dispatch() installed directly via sys.settrace()
+and with it chained through the tracer module.
+
+Each is timed twice. With no breakpoints set, the frames of work()
+are declined on their 'call' event; in direct mode their later events
+then never reach Python code. With a breakpoint on a line of work()
+that never runs, those frames are traced, and every event goes
+through the dispatch without stopping.
+
+Usage: bench-dispatch.py [loops]
+"""
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from trepan import debugger as Mdebugger
+from trepan.interfaces import user as Muser
+from trepan.inout import stringarray as Mstringarray
+
+
+def work(n):
+    t = 0
+    for i in range(n):
+        t += i
+        pass
+    if t < 0:
+        t = -t  # Never run: a breakpoint here has work() traced.
+    return t
+
+
+def program(loops):
+    s = 0
+    for j in range(loops):
+        s += work(20)
+        pass
+    return s
+
+events = [0]
+
+
+def count_events(frame, event, arg):
+    events[0] += 1
+    return count_events
+
+
+def timed(fn, *args):
+    t0 = time.time()
+    fn(*args)
+    return time.time() - t0
+
+
+def run_debugged(direct, traced, loops):
+    """Time `program' under a debugger that is told to continue right
+    away. If `traced', the frames of work() are traced."""
+    inp = Mstringarray.StringArrayInput(['continue'])
+    out = Mstringarray.StringArrayOutput()
+    intf = Muser.UserInterface(inp=inp, out=out)
+    d = Mdebugger.Debugger({'interface': intf, 'direct_trace': direct})
+    if traced:
+        code = work.func_code
+        d.core.bpmgr.add_breakpoint(d.core.canonic_code(code),
+                                    code.co_firstlineno + 6)
+        pass
+    d.core.start()
+    t = timed(program, loops)
+    d.core.stop(options={'remove': True})
+    return t
+
+if __name__ == '__main__':
+    loops = len(sys.argv) > 1 and int(sys.argv[1]) or 5000
+
+    sys.settrace(count_events)
+    program(loops)
+    sys.settrace(None)
+    nevents = events[0]
+
+    native = timed(program, loops)
+    print('%d trace events, %.3fs without tracing' % (nevents, native))
+    for traced, case in ((False, 'frames declined'),
+                         (True,  'frames traced')):
+        print(case + ':')
+        for direct, name in ((False, 'tracer module'),
+                             (True,  'sys.settrace')):
+            t = run_debugged(direct, traced, loops)
+            print('  %-14s %.3fs  %.2f usec/event' %
+                  (name + ':', t, (t - native) * 1e6 / nevents))
+            pass
+        pass
+    pass
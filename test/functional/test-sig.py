@@ -85,6 +85,30 @@ class TestSigHandler(unittest.TestCase):
 
         return
 
+    def test_stop_then_step(self):
+        """Stepping after a stop at a signal stops at the next line
+        of the program, not in the debugger's signal handler."""
+        cmds = ['handle usr1 stop nopass', 'continue', 'step', 'continue']
+        d = strarray_setup(cmds)
+        old_handler = signal.getsignal(signal.SIGUSR1)
+        try:
+            d.core.start()
+            ##############################
+            x = 5  # NOQA
+            os.kill(os.getpid(), signal.SIGUSR1)
+            y = 6  # NOQA
+            z = 7  # NOQA
+            ##############################
+            d.core.stop()
+        finally:
+            signal.signal(signal.SIGUSR1, old_handler)
+            pass
+        out = ['-- x = 5  # NOQA',
+               '?! os.kill(os.getpid(), signal.SIGUSR1)',
+               '-- y = 6  # NOQA']
+        compare_output(self, out, d, cmds)
+        return
+
     pass
 
 if __name__ == '__main__':
@@ -24,6 +24,38 @@ class TestStep(unittest.TestCase):
         compare_output(self, out, d, cmds)
         return
 
+    def test_step_into(self):
+        # See that we skip over h() and stop at the call of g().
+        def h(x):
+            return x + 1
+
+        def g(x):
+            return x * 2
+        cmds = ['step into g', 'continue']
+        d = strarray_setup(cmds)
+        d.core.start()
+        ##############################
+        x = g(h(1))  # NOQA
+        ##############################
+        d.core.stop(options={'remove': True})
+        out = ['-- x = g(h(1))  # NOQA',
+               '-> def g(x):']
+        compare_output(self, out, d, cmds)
+
+        # If the function isn't called we stop as "next" would.
+        cmds = ['step into g', 'continue']
+        d = strarray_setup(cmds)
+        d.core.start()
+        ##############################
+        x = h(1)  # NOQA
+        y = 2  # NOQA
+        ##############################
+        d.core.stop(options={'remove': True})
+        out = ['-- x = h(1)  # NOQA',
+               '-- y = 2  # NOQA']
+        compare_output(self, out, d, cmds)
+        return
+
     def NO__test_step_computed_valued(self):
         return
         # See that we can step with a computed count value
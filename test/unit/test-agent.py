@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+'Unit test for trepan.agent'
+import os, signal, sys, unittest
+
+from trepan import agent as Magent
+from trepan.inout import stringarray as Mstringarray
+from trepan.interfaces import user as Muser
+
+handler_after_import = signal.getsignal(signal.SIGUSR2)
+
+
+class TestAgent(unittest.TestCase):
+
+    def tearDown(self):
+        Magent.uninstall()
+        return
+
+    def test_import(self):
+        """Importing the module sets no signal handler."""
+        self.assertFalse(isinstance(getattr(handler_after_import,
+                                            'im_self', None),
+                                    Magent.AgentSigHandler))
+        return
+
+    def test_dormant(self):
+        """Installing the agent sets a signal handler and nothing
+        else."""
+        agent = Magent.install('SIGUSR1')
+        self.assertEqual(agent.sighandler.handle,
+                         signal.getsignal(signal.SIGUSR1))
+        self.assertEqual(None, agent.dbg)
+        self.assertEqual(None, agent.listener)
+        self.assertEqual(None, sys.gettrace())
+        Magent.uninstall()
+        self.assertNotEqual(agent.sighandler.handle,
+                            signal.getsignal(signal.SIGUSR1))
+        self.assertRaises(ValueError, Magent.install, 'SIGBOGUS')
+        return
+
+    def test_activate(self):
+        """The signal gets us stopped at the next event."""
+        inp = Mstringarray.StringArrayInput(['continue'])
+        out = Mstringarray.StringArrayOutput()
+        intf = Muser.UserInterface(inp=inp, out=out)
+        agent = Magent.install('SIGUSR1', dbg_opts={'interface': intf})
+        os.kill(os.getpid(), signal.SIGUSR1)
+        x = 1  # NOQA
+        Magent.deactivate()
+        self.assertTrue(agent.dbg is not None)
+        self.assertTrue(out.output[0].endswith('test_activate'), out.output)
+        self.assertTrue(out.output[1].startswith('-- '), out.output)
+        self.assertTrue('x = ' in out.output[1], out.output)
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
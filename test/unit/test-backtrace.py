@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+'Unit test for trepan.processor.command.backtrace'
+import inspect, unittest
+
+from trepan import debugger
+from trepan.lib import stack as Mstack
+from trepan.processor import cmdproc as Mcmdproc
+from trepan.processor.command import backtrace as Mbacktrace
+
+
+class TestBacktraceCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.errors = []
+        self.msgs   = []
+        return
+
+    def errmsg(self, msg):
+        self.errors.append(msg)
+        return
+
+    def msg(self, msg):
+        self.msgs.append(msg)
+        return
+
+    def msg_nocr(self, msg):
+        return
+
+    def entries(self, args):
+        """Run `args' and return the numbers of the entries printed."""
+        self.msgs = []
+        self.cmd.run(args)
+        return [msg.split()[0] for msg in self.msgs
+                if not msg.startswith('(')]
+
+    def numbers(self, first, last):
+        return [str(i) for i in range(first, last+1)]
+
+    def nest(self, n):
+        if n > 0:
+            return self.nest(n-1)
+        return self.set_stack()
+
+    def ping(self, n):
+        if n > 0:
+            return self.pong(n-1)
+        return self.set_stack()
+
+    def pong(self, n):
+        return self.ping(n)
+
+    def on_base(self, fn):
+        """Run `fn' with this frame as the bottom of the stacks
+        set_stack() makes. It is in the debugger's ignore list, and
+        get_stack() stops at such a frame. So the frames of whatever
+        runs the tests, which may repeat, are left out."""
+        return fn()
+
+    def set_stack(self):
+        frame = inspect.currentframe().f_back
+        self.cp.curframe = frame
+        self.cp.stack, self.cp.curindex = \
+            Mcmdproc.get_stack(frame, None, None, self.cp)
+        return len(self.cp.stack)
+
+    def test_backtrace(self):
+        d = debugger.Debugger()
+        self.cp = cp = d.core.processor
+        cp.intf = [self]
+        self.cmd = Mbacktrace.BacktraceCommand(cp)
+        self.cmd.msg    = self.msg
+        self.cmd.errmsg = self.errmsg
+        stacksize = d.settings['stacksize']
+        d.core.add_ignore(self.on_base)
+        try:
+            d.settings['highlight'] = 'plain'
+            n = self.on_base(lambda: self.nest(5))
+            self.assertEqual(7, n)
+            # The 5 calls of nest() from nest() are one line.
+            self.assertEqual(['0', '1-5'] + self.numbers(6, n-1),
+                             self.entries(['backtrace']))
+            # A count is in frames; runs are put together only within it.
+            self.assertEqual(['0', '1'], self.entries(['backtrace', '2']))
+            self.assertEqual(['0', '1', '2'],
+                             self.entries(['backtrace', '3']))
+            self.assertEqual(['0', '1-5', '6'],
+                             self.entries(['backtrace', '7']))
+            self.assertEqual(self.numbers(2, 4),
+                             self.entries(['backtrace', '2..4']))
+            self.assertEqual(self.numbers(n-2, n-1),
+                             self.entries(['backtrace', '%d..' % (n-2)]))
+            self.assertEqual(['0', '1'], self.entries(['backtrace', '..1']))
+            self.assertEqual([], self.entries(['backtrace', '4..2']))
+            self.assertEqual(1, len(self.errors))
+
+            # A page at a time.
+            d.settings['stacksize'] = 1
+            self.assertEqual(['0'], self.entries(['backtrace']))
+            self.assertTrue(self.msgs[-1].startswith('(More stack frames'))
+            self.assertEqual(['1-5'], self.entries(['backtrace', '+']))
+            self.assertEqual(['6'], self.entries(['backtrace', '+']))
+            self.assertEqual(self.numbers(2, 5),
+                             self.entries(['backtrace', '2..5']))
+            self.assertEqual([], self.entries(['backtrace', '+']))
+            self.assertEqual(2, len(self.errors))
+        finally:
+            d.settings['stacksize'] = stacksize
+            pass
+        return
+
+    def test_stack_groups(self):
+        d = debugger.Debugger()
+        self.cp = cp = d.core.processor
+        d.core.add_ignore(self.on_base)
+        n = self.on_base(lambda: self.ping(6))
+        groups = list(Mstack.stack_groups(cp))
+        # The pong() ping() ... calls, then the lambda.
+        self.assertEqual(14, n)
+        self.assertEqual([(0, 0, 0), (1, 12, 2), (13, 13, 0)], groups)
+        self.assertEqual('1-12 pong() -> ping() x6',
+                         Mstack.format_stack_group(cp, 1, 12, 2))
+        # With a stop, nothing past it is looked at.
+        self.assertEqual([(0, 0, 0), (1, 6, 2)],
+                         list(Mstack.stack_groups(cp, 0, 7)))
+        self.assertEqual([(0, 0, 0), (1, 1, 0), (2, 2, 0)],
+                         list(Mstack.stack_groups(cp, 0, 3)))
+
+        # The current frame is kept out of groups.
+        cp.curframe = cp.stack[-5][0]
+        self.assertEqual([(0, 0, 0), (1, 1, 0), (2, 2, 0), (3, 3, 0),
+                          (4, 4, 0), (5, 12, 2)],
+                         list(Mstack.stack_groups(cp))[:6])
+
+        # Too few repeats to be worth a group.
+        self.on_base(lambda: self.nest(2))
+        self.assertEqual([(0, 0, 0), (1, 1, 0), (2, 2, 0)],
+                         list(Mstack.stack_groups(cp))[:3])
+        return
+
+    def test_entry_cache(self):
+        d = debugger.Debugger()
+        self.cp = cp = d.core.processor
+        d.settings['highlight'] = 'plain'
+        self.nest(1)
+        entry = Mstack.stack_entry(cp, 1)
+        self.assertTrue(entry.startswith('nest(self=<'))
+        self.assertTrue(entry is Mstack.stack_entry(cp, 1))
+        self.assertEqual(Mstack.format_stack_entry(d, cp.stack[-2]), entry)
+        cp.forget()
+        self.assertEqual({}, cp.stack_entry_cache)
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@ import os, sys, unittest
 
 from trepan import debugger
 from trepan.processor import cmdbreak as Mcmdbreak
+from trepan.processor.command import tracepoint as Mtracepoint
 Mbreak = __import__('trepan.processor.command.break', None, None, ['*'])
 
 
@@ -83,11 +84,44 @@ class TestBreakCommand(unittest.TestCase):
         self.assertEqual((True, 10),
                          (isinstance(fi, types.StringType), li))
 
+        # What follows a location is left for the caller, as
+        # "tracepoint" does with its expressions.
+        fn, fi, li, count = Mcmdbreak.parse_location(self.cmd,
+                                                     ['os.path', '5+1', 'x'])
+        self.assertEqual((None, True, 6, 2),
+                         (fn, isinstance(fi, types.StringType), li, count))
+        fn, fi, li, count = Mcmdbreak.parse_location(self.cmd, ['foo', 'x'])
+        self.assertEqual((foo, 1), (fn, count))
+
         # FIXME:
         # Try a breakpoint with a symlink in the filename.
         # Also, add a unit test for canonic.
 
         return
 
+    def test_tracepoint(self):
+        import inspect
+        from trepan.inout import stringarray as Mstringarray
+        d = debugger.Debugger({'output': Mstringarray.StringArrayOutput()})
+        cp              = d.core.processor
+        cp.curframe     = inspect.currentframe()
+        cmd             = Mtracepoint.TracepointCommand(cp)
+        cmd.msg         = self.msg
+        cmd.errmsg      = self.errmsg
+
+        # The rest of the line after the location is one expression.
+        line = str(cp.curframe.f_lineno)
+        cmd.run(['tracepoint', line, 'x', '+', 'y'])
+        self.assertEqual([], self.errors)
+        bp = d.core.bpmgr.bpbynumber[-1]
+        self.assertEqual(['x + y'],
+                         [source for source, code in bp.trace_exprs])
+        self.assertEqual(3, eval(bp.trace_exprs[0][1], {'x': 1, 'y': 2}))
+
+        cmd.run(['tracepoint', line, 'x', '+'])
+        self.assertEqual(1, len(self.errors))
+        self.assertTrue(self.errors[0].startswith('Syntax error'))
+        return
+
 if __name__ == '__main__':
     unittest.main()
@@ -34,6 +34,70 @@ class TestBreakpoint(unittest.TestCase):
         bpmgr.reset()
         return
 
+    def test_fileindex(self):
+        'Test BreakpointManager.fileindex upkeep'
+        import os
+        bpmgr = Mbreakpoint.BreakpointManager()
+        filename = os.path.realpath('foo')
+        self.assertEqual(None, bpmgr.lines_for_file(filename))
+        bp1 = bpmgr.add_breakpoint('foo', 5)
+        bpmgr.add_breakpoint('foo', 5, temporary=True)
+        bp3 = bpmgr.add_breakpoint('foo', 10)
+        self.assertEqual(frozenset([5, 10]), bpmgr.lines_for_file(filename))
+        bpmgr.en_disable_breakpoint_by_number(bp3.number, False)
+        self.assertEqual(frozenset([5]), bpmgr.lines_for_file(filename))
+        bpmgr.en_disable_breakpoint_by_number(bp3.number, True)
+        self.assertEqual(frozenset([5, 10]), bpmgr.lines_for_file(filename))
+        # Line 5 still has the temporary breakpoint.
+        bpmgr.delete_breakpoint(bp1)
+        self.assertEqual(frozenset([5, 10]), bpmgr.lines_for_file(filename))
+        changes = []
+        bpmgr.on_change = lambda: changes.append(dict(bpmgr.fileindex))
+        bpmgr.delete_all_breakpoints()
+        self.assertEqual({}, bpmgr.fileindex)
+        self.assertEqual([{}], changes)
+        return
+
+    def test_find_fn_bp(self):
+        'Test BreakpointManager.find_fn_bp()'
+        import inspect
+        bpmgr = Mbreakpoint.BreakpointManager()
+
+        def foo():
+            return inspect.currentframe()
+
+        def bar():
+            return inspect.currentframe()
+        bp = bpmgr.add_breakpoint(__file__, foo.func_code.co_firstlineno,
+                                  func=foo)
+        # Function breakpoints are matched on 'call', not by line.
+        self.assertEqual({}, bpmgr.fileindex)
+        self.assertEqual((None, None), bpmgr.find_fn_bp(bar()))
+        self.assertEqual((bp, True), bpmgr.find_fn_bp(foo()))
+        self.assertEqual(1, bp.hits)
+        bpmgr.delete_breakpoint(bp)
+        self.assertEqual({}, bpmgr.fncodes)
+        self.assertEqual((None, None), bpmgr.find_fn_bp(foo()))
+
+        # A breakpoint given only by name
+        bp = bpmgr.add_breakpoint(None, None, func='bar')
+        self.assertEqual((None, None), bpmgr.find_fn_bp(foo()))
+        self.assertEqual((bp, True), bpmgr.find_fn_bp(bar()))
+
+        # One by name and one by code object on the same function
+        # don't hide each other.
+        bp_code = bpmgr.add_breakpoint(__file__,
+                                       bar.func_code.co_firstlineno,
+                                       func=bar)
+        bp.condition = 'False'
+        self.assertEqual((bp_code, True), bpmgr.find_fn_bp(bar()))
+        self.assertEqual((2, 1), (bp.hits, bp_code.hits))
+        bp.condition = None
+        bp_code.condition = 'False'
+        self.assertEqual((bp, True), bpmgr.find_fn_bp(bar()))
+        self.assertEqual((3, 1), (bp.hits, bp_code.hits))
+        return
+
     def test_checkfuncname(self):
         'Test Mbreakpoint.checkfuncname()'
         import inspect
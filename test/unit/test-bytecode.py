@@ -30,5 +30,50 @@ class TestByteCode(unittest.TestCase):
         self.assertFalse(Mcode.is_def_stmt('foo(): pass', frame))
         return
 
+    def test_offsets_for_line(self):
+        def loop(n):
+            for i in range(n):
+                n += i
+                pass
+            return n
+        co = loop.func_code
+        line = co.co_firstlineno
+        # The "for" line starts a line and is jumped back to.
+        self.assertEqual(2, len(Mcode.offsets_for_line(co, line+1)))
+        self.assertEqual(1, len(Mcode.offsets_for_line(co, line+2)))
+        self.assertEqual([], Mcode.offsets_for_line(co, line+6))
+        return
+
+    def test_code_info(self):
+        def fn(x):
+            y = x + 1
+            return y
+        co = fn.func_code
+        line = co.co_firstlineno
+        info = Mcode.code_info(co)
+        self.assertTrue(info is Mcode.code_info(co))
+        self.assertEqual([line+1, line+2], sorted(info.line2offsets.keys()))
+        start = info.line2offsets[line+2][0]
+        self.assertEqual(line+2, info.offset2line[start])
+        self.assertEqual(line+2, info.line_at(start + 1))
+        self.assertEqual(start, info.line_start(start + 1))
+        self.assertEqual(line+2, Mcode.next_linestart(co, 0))
+        self.assertEqual(-1000, Mcode.next_linestart(co, 0, 2))
+        self.assertEqual((0, Mcode.opmap['LOAD_FAST'], 0),
+                         info.instruction_at(0))
+        self.assertEqual(None, info.instruction_at(1))
+        self.assertEqual(Mcode.opmap['RETURN_VALUE'],
+                         info.instructions()[-1][1])
+        self.assertEqual(frozenset(), info.labels())
+
+        # Entries go away with their code object.
+        count = len(Mcode._code_info)
+        co = compile('1', '<test>', 'eval')
+        Mcode.code_info(co)
+        self.assertEqual(count + 1, len(Mcode._code_info))
+        co = None
+        self.assertEqual(count, len(Mcode._code_info))
+        return
+
 if __name__ == '__main__':
     unittest.main()
@@ -50,9 +50,9 @@ class TestCompletion(unittest.TestCase):
 
                 # Completion when word is complete with space.
                 ['info ',
-                 ['args', 'break', 'display', 'files', 'globals', 'line',
-                  'locals', 'macro', 'program', 'return', 'signals', 'source',
-                  'threads']],
+                 ['args', 'break', 'coverage', 'display', 'files', 'globals',
+                  'line', 'locals', 'macro', 'profile', 'program', 'return',
+                  'signals', 'source', 'threads', 'tracepoints']],
 
                 ['help sta', ['stack', 'status']],
                 [' unalias c',  ['c', 'chdir', 'cond']],
@@ -2,15 +2,51 @@
 'Unit test for trepan.processor.cmdproc'
 import os, unittest
 
-from trepan.lib import core as Mcore
+from trepan.lib import core as Mcore, default as Mdefault
 
 
 class MockProcessor:
     pass
 
 
+# Functions for the patched breakpoint tests. They are at the top
+# level, since code nested in a function can't be patched.
+def work(n):
+    t = 0
+    for i in range(n):
+        t += i
+        pass
+    return t
+
+
+def make_adder(n):
+    def adder(x):
+        y = x + n
+        return y
+    return adder
+
+
+def count(n):
+    for i in range(n):
+        j = i
+        yield j
+        pass
+    return
+
+
 class TestCore(unittest.TestCase):
 
+    # Debugger settings are shared by all debuggers, so what a test
+    # sets would carry over to later tests, here and in other files.
+    def setUp(self):
+        self.settings = dict(Mdefault.DEBUGGER_SETTINGS)
+        return
+
+    def tearDown(self):
+        Mdefault.DEBUGGER_SETTINGS.clear()
+        Mdefault.DEBUGGER_SETTINGS.update(self.settings)
+        return
+
     def test_is_next_stop(self):
         # We assume there's at least one command
         opts = {'processor': MockProcessor()}
@@ -33,5 +69,357 @@ class TestCore(unittest.TestCase):
                          'canonic should produce an absolute file')
         return
 
+    def test_frame_level(self):
+        import inspect
+        from trepan.lib import stack as Mstack
+        opts = {'processor': MockProcessor()}
+        dc = Mcore.DebuggerCore(None, opts=opts)
+        frame = inspect.currentframe()
+        level = Mstack.count_frames(frame)
+        self.assertEqual(level, dc.frame_level(frame, 'line'))
+
+        def callee():
+            return inspect.currentframe()
+        callee_frame = callee()
+        self.assertEqual(level+1, dc.frame_level(callee_frame, 'call'))
+        # Returning to the caller
+        self.assertEqual(level, dc.frame_level(frame, 'line'))
+        self.assertEqual(frame, dc.thread_state.last_frame)
+        return
+
+    def test_frame_level_resync(self):
+        import inspect
+        from trepan.lib import stack as Mstack
+        opts = {'processor': MockProcessor()}
+        dc = Mcore.DebuggerCore(None, opts=opts)
+
+        def nest(n):
+            if n == 0:
+                return inspect.currentframe()
+            return nest(n-1)
+        frame = inspect.currentframe()
+        level = Mstack.count_frames(frame)
+        self.assertEqual(level, dc.frame_level(frame, 'line'))
+        # Several calls down without seeing the ones in between
+        deep_frame = nest(5)
+        self.assertEqual(level+6, dc.frame_level(deep_frame, 'line'))
+        # A frame in a different call chain
+        other_frame = nest(2)
+        self.assertEqual(level+3, dc.frame_level(other_frame, 'line'))
+        # Back several levels up
+        self.assertEqual(level, dc.frame_level(frame, 'line'))
+        return
+
+    def test_canonic_code(self):
+        opts = {'processor': MockProcessor()}
+        dc = Mcore.DebuggerCore(None, opts=opts)
+        code = self.test_canonic_code.func_code
+        filename = dc.canonic_code(code)
+        self.assertEqual(dc.canonic(code.co_filename), filename)
+        self.assertEqual(filename, dc.code_filename_cache.get(code))
+        dc.search_path = dc.search_path + ['/nonexistent']
+        dc.check_search_path()
+        self.assertEqual(None, dc.code_filename_cache.get(code))
+        self.assertEqual(0, len(dc.filename_cache))
+        return
+
+    def test_code_has_breakpoints(self):
+        opts = {'processor': MockProcessor()}
+        dc = Mcore.DebuggerCore(None, opts=opts)
+
+        def foo():
+            x = 1
+            return x
+        code = foo.func_code
+        self.assertFalse(dc.code_has_breakpoints(code))
+        filename = dc.canonic(code.co_filename)
+        bp = dc.bpmgr.add_breakpoint(filename, code.co_firstlineno+1)
+        self.assertTrue(dc.code_has_breakpoints(code))
+        dc.bpmgr.en_disable_breakpoint_by_number(bp.number, False)
+        self.assertFalse(dc.code_has_breakpoints(code))
+        dc.bpmgr.en_disable_breakpoint_by_number(bp.number, True)
+        self.assertTrue(dc.code_has_breakpoints(code))
+        # A breakpoint in the same file but outside of foo()
+        dc.bpmgr.delete_breakpoint(bp)
+        dc.bpmgr.add_breakpoint(filename, code.co_firstlineno-1)
+        self.assertFalse(dc.code_has_breakpoints(code))
+        return
+
+    def test_hook_event_set(self):
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        d.settings['trace'] = False
+        d.settings['events'] = frozenset(['line', 'call', 'return'])
+        self.assertEqual(d.settings['events'], dc.hook_event_set())
+
+        # step> only needs to see calls, unless there are breakpoints
+        dc.step_ignore = 0
+        dc.step_events = ['call']
+        self.assertEqual(frozenset(['call']), dc.hook_event_set())
+        dc.bpmgr.add_breakpoint(dc.canonic(__file__), 10)
+        self.assertEqual(frozenset(['call', 'line']), dc.hook_event_set())
+
+        # Event printing needs to see the events printed
+        d.settings['trace'] = True
+        d.settings['printset'] = frozenset(['exception'])
+        self.assertEqual(frozenset(['call', 'line', 'exception']),
+                         dc.hook_event_set())
+        return
+
+    def test_make_dispatcher(self):
+        import inspect
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        d.settings['trace'] = False
+        dc.step_ignore = 0
+        self.assertEqual(dc.trace_dispatch, dc.make_dispatcher())
+
+        # With nothing to stop for, we don't trace new frames.
+        dc.step_ignore = -1
+        dispatch = dc.make_dispatcher()
+        self.assertNotEqual(dc.trace_dispatch, dispatch)
+        frame = inspect.currentframe()
+        self.assertEqual(None, dispatch(frame, 'call', None))
+        self.assertTrue(dispatch(frame, 'line', None))
+
+        # A breakpoint in this code means we keep tracing it.
+        dc.bpmgr.add_breakpoint(dc.canonic(__file__), frame.f_lineno+1)
+        dispatch = dc.make_dispatcher()
+        self.assertTrue(dispatch(frame, 'call', None))
+        return
+
+    def test_rearm_frames(self):
+        import inspect, sys
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        d.settings['trace'] = False
+        dc.step_ignore = -1
+
+        # Frames that have finished are dropped, along with those
+        # they were called from.
+        def callee():
+            dc.decline_frame(inspect.currentframe())
+            return
+
+        def caller():
+            dc.decline_frame(inspect.currentframe())
+            callee()
+            return
+        caller()
+        dc.untraced_frame = None
+        self.assertEqual(2, len(dc.declined_frames))
+        dc.prune_declined()
+        self.assertEqual({}, dc.declined_frames)
+
+        gen = count(3)
+        gen.next()
+        frame = gen.gi_frame
+        dc.decline_frame(frame)
+        dc.prune_declined()
+        self.assertEqual([frame], dc.declined_frames.values())
+
+        def local_trace(frame, event, arg):
+            return None
+        trace = sys.gettrace()
+        sys.settrace(local_trace)
+        try:
+            # Nothing to trace it for yet.
+            dc.rearm_frames()
+            self.assertEqual(None, frame.f_trace)
+            self.assertEqual([frame], dc.declined_frames.values())
+            # Event printing traces everything.
+            d.settings['trace'] = True
+            dc.rearm_frames()
+        finally:
+            sys.settrace(trace)
+            pass
+        self.assertEqual(local_trace, frame.f_trace)
+        self.assertEqual({}, dc.declined_frames)
+        return
+
+    def test_dispatch_ignores(self):
+        import inspect
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        dc.step_ignore = -1
+
+        def ignored():
+            return inspect.currentframe()
+        dc.add_ignore(ignored)
+        d.settings['coverage'] = True
+        try:
+            dispatch = dc.make_dispatcher()
+            self.assertNotEqual(dc.trace_dispatch, dispatch)
+            frame = ignored()
+            self.assertTrue(dispatch(frame, 'line', None))
+            self.assertFalse(frame.f_code in dc.coverage.bitmaps)
+
+            # Nothing is recorded while the debugger is busy.
+            frame = inspect.currentframe()
+            dc.trace_hook_suspend = True
+            self.assertEqual(None, dispatch(frame, 'line', None))
+            self.assertFalse(frame.f_code in dc.coverage.bitmaps)
+            dc.trace_hook_suspend = False
+            dispatch(frame, 'line', None)
+            self.assertTrue(frame.f_code in dc.coverage.bitmaps)
+        finally:
+            # Settings are shared by all debuggers.
+            d.settings['coverage'] = False
+            dc.remove_ignore(ignored)
+            pass
+        return
+
+    def test_direct_trace(self):
+        import sys, tracer
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        dc.step_ignore = -1
+        dc.start()
+        self.assertEqual('direct', dc.trace_mode)
+        self.assertEqual(dc.direct_dispatch, sys.gettrace())
+        self.assertTrue(dc.is_started())
+        dc.stop(options={'remove': True})
+        self.assertEqual(None, dc.trace_mode)
+        self.assertEqual(None, sys.gettrace())
+
+        # Another hook showing up moves us over to the tracer module.
+        dc.start()
+        dc.chain_to_tracer()
+        self.assertEqual('tracer', dc.trace_mode)
+        self.assertNotEqual(None, tracer.find_hook(dc.trace_dispatch))
+        dc.stop(options={'remove': True})
+        self.assertEqual(None, tracer.find_hook(dc.trace_dispatch))
+        self.assertFalse(tracer.is_started())
+        return
+
+    def patching_debugger(self, stops):
+        """Return a started debugger with setting "patchbreaks" on,
+        which continues at each of `stops' stops."""
+        from trepan import debugger as Mdebugger
+        from trepan.inout import stringarray as Mstringarray
+        from trepan.interfaces import user as Muser
+        inp = Mstringarray.StringArrayInput(['continue'] * stops)
+        out = Mstringarray.StringArrayOutput()
+        intf = Muser.UserInterface(inp=inp, out=out)
+        d = Mdebugger.Debugger({'interface': intf})
+        d.settings['patchbreaks'] = True
+        d.core.step_ignore = -1
+        d.core.start()
+        return d
+
+    def test_patched_breakpoint(self):
+        import sys
+        orig = work.func_code
+        line = orig.co_firstlineno + 3
+        d = self.patching_debugger(3)
+        dc = d.core
+        bp = dc.bpmgr.add_breakpoint(orig.co_filename, line)
+        self.assertTrue(bp.patched)
+        self.assertTrue(work.func_code is not orig)
+        self.assertEqual({}, dc.bpmgr.fileindex)
+        self.assertEqual(3, work(3))
+        # We stopped each time around and went on with tracing off.
+        self.assertEqual(3, bp.hits)
+        self.assertEqual(None, sys.gettrace())
+        dc.bpmgr.delete_breakpoint(bp)
+        self.assertTrue(work.func_code is orig)
+        dc.stop(options={'remove': True})
+        return
+
+    def test_unpatchable_breakpoints(self):
+        # A closure made after the breakpoint is set runs the
+        # original code; so does a generator suspended before.
+        adder = make_adder(1)
+        numbers = count(3)
+        self.assertEqual(0, numbers.next())
+        d = self.patching_debugger(4)
+        dc = d.core
+        try:
+            filename = dc.canonic_code(work.func_code)
+            line = adder.func_code.co_firstlineno + 1
+            bp1 = dc.bpmgr.add_breakpoint(filename, line)
+            self.assertFalse(bp1.patched)
+            self.assertEqual(frozenset([line]),
+                             dc.bpmgr.lines_for_file(filename))
+            self.assertEqual(2, adder(1))
+            self.assertEqual(1, bp1.hits)
+            self.assertEqual(3, make_adder(2)(1))
+            self.assertEqual(2, bp1.hits)
+
+            line = count.func_code.co_firstlineno + 2
+            bp2 = dc.bpmgr.add_breakpoint(filename, line)
+            self.assertFalse(bp2.patched)
+            self.assertEqual(1, numbers.next())
+            self.assertEqual(1, bp2.hits)
+            self.assertEqual([0], list(count(1)))
+            self.assertEqual(2, bp2.hits)
+        finally:
+            dc.stop(options={'remove': True})
+            dc.bpmgr.delete_all_breakpoints()
+            pass
+        return
+
+    def test_coverage(self):
+        from trepan import debugger as Mdebugger
+
+        def fn(x):
+            if x:
+                y = 1
+            else:
+                y = 2
+                pass
+            return y
+        d = Mdebugger.Debugger()
+        d.settings['coverage'] = True
+        dc = d.core
+        dc.step_ignore = -1
+        try:
+            dc.start()
+            fn(True)
+            dc.stop(options={'remove': True})
+        finally:
+            # Settings are shared by all debuggers.
+            d.settings['coverage'] = False
+            pass
+        self.assertEqual(bytearray([0, 1, 1, 0, 0, 0, 1]),
+                         dc.coverage.bitmaps[fn.func_code])
+        return
+
+    def test_profile_breakpoint(self):
+        """Events passed on to stop_dispatch() for a breakpoint are
+        profiled once."""
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        # Settings are shared by all debuggers; breakpoints patched
+        # into work() would give no events at all.
+        d.settings['patchbreaks'] = False
+        dc = d.core
+        dc.step_ignore = -1
+        code = work.func_code
+        filename = dc.canonic_code(code)
+        dc.bpmgr.add_breakpoint(filename, code.co_firstlineno + 3,
+                                condition='False')
+        dc.bpmgr.add_breakpoint(filename, code.co_firstlineno,
+                                condition='False', func=work)
+        dc.set_profiling(True)
+        try:
+            dc.start()
+            work(10)
+            dc.stop(options={'remove': True})
+        finally:
+            dc.set_profiling(False)
+            dc.bpmgr.delete_all_breakpoints()
+            pass
+        times = dc.profiler.times_by_code()[code]
+        self.assertEqual(1, times.calls)
+        self.assertEqual(10, dict([(line, hits) for line, hits, time
+                                   in times.lines()])[code.co_firstlineno+3])
+        return
+
 if __name__ == '__main__':
     unittest.main()
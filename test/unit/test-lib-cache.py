@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.cache'
+import sys, threading, unittest
+
+from trepan.lib import cache as Mcache
+
+
+class TestLibCache(unittest.TestCase):
+
+    def test_code_cache(self):
+        cache = Mcache.CodeCache()
+        code = compile('1+2', '<test>', 'eval')
+        # An equal but different code object
+        code2 = compile('1+2', '<test>', 'eval')
+        self.assertEqual(code, code2)
+        cache[code] = 'first'
+        self.assertEqual('first', cache.get(code))
+        self.assertEqual('first', cache[code])
+        self.assertTrue(code in cache)
+        self.assertFalse(code2 in cache)
+        self.assertEqual(None, cache.get(code2))
+        self.assertEqual(1, len(cache))
+        # Entries go away with their code objects
+        code = None
+        self.assertEqual(0, len(cache))
+        cache[code2] = 'second'
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        return
+
+    def test_lru_cache(self):
+        cache = Mcache.LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEqual(1, cache.get('a'))
+        cache['c'] = 3
+        # 'b' was used least recently
+        self.assertFalse('b' in cache)
+        self.assertEqual(['a', 'c'], cache.keys())
+        self.assertEqual(3, cache['c'])
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(2, len(cache))
+        return
+
+    def test_lru_cache_threads(self):
+        cache = Mcache.LRUCache(50)
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(2000):
+                    key = (i * n) % 80
+                    if cache.get(key) is None:
+                        cache[key] = i
+                        pass
+                    pass
+            except:
+                errors.append(sys.exc_info()[1])
+                pass
+            return
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=work, args=(n,))
+                       for n in range(1, 5)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+        finally:
+            sys.setcheckinterval(interval)
+            pass
+        self.assertEqual([], errors)
+        self.assertEqual(50, len(cache))
+        self.assertEqual(50, len(cache.keys()))
+        return
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.codepatch'
+import dis, inspect, unittest
+
+from trepan.lib import codepatch as Mcodepatch
+
+
+def loop(n):
+    t = 0
+    for i in range(n):
+        if i % 2:
+            t += i
+        else:
+            t -= 1
+            pass
+        pass
+    return t
+
+
+class TestCodePatch(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+        return
+
+    def hook(self):
+        self.lines.append(inspect.currentframe().f_back.f_lineno)
+        return
+
+    def test_insert_calls(self):
+        """The code we rewrite gives the same result and calls the
+        hook where Python would give 'line' events."""
+        first = loop.func_code.co_firstlineno
+        patcher = Mcodepatch.CodePatcher(self.hook)
+        orig = loop.func_code
+        expect = loop(4)
+        self.assertTrue(patcher.set_lines(loop, [first+2, first+4]))
+        self.assertTrue(loop.func_code is not orig)
+        self.assertEqual(expect, loop(4))
+        self.assertEqual([first+2, first+2, first+4, first+2, first+2,
+                          first+4, first+2], self.lines)
+
+        # Line numbers still come out right.
+        self.assertEqual([line for offset, line in
+                          dis.findlinestarts(orig)],
+                         [line for offset, line in
+                          dis.findlinestarts(loop.func_code)])
+        patcher.restore_all()
+        self.assertTrue(loop.func_code is orig)
+        self.lines = []
+        self.assertEqual(expect, loop(4))
+        self.assertEqual([], self.lines)
+        return
+
+    def test_functions_in_files(self):
+        filename = loop.func_code.co_filename
+        funcs = Mcodepatch.functions_in_files([filename], lambda co:
+                                              co.co_filename)
+        self.assertTrue(loop in funcs[filename])
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
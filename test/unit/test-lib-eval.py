@@ -18,5 +18,27 @@ class TestExtractExpression(unittest.TestCase):
         pass
     pass
 
+
+class TestCompileCached(unittest.TestCase):
+    def test_compile_cached(self):
+        code = Meval.compile_cached('x + 1')
+        self.assertTrue(code is Meval.compile_cached('x + 1'))
+        self.assertEqual(3, eval(code, {'x': 2}))
+        self.assertEqual(3, eval(Meval.compile_cached(' x + 1'), {'x': 2}))
+        self.assertRaises(SyntaxError, Meval.compile_cached, 'x +')
+        self.assertEqual(None, Meval.syntax_error_msg('x > 10'))
+        self.assertTrue(Meval.syntax_error_msg('x >'))
+
+        # The cache is bounded, keeping what was used most recently.
+        maxsize = Meval.compiled_cache.maxsize
+        for i in range(maxsize + 10):
+            Meval.compile_cached('x + %d' % i)
+            code = Meval.compile_cached('x + 1')
+            pass
+        self.assertEqual(maxsize, len(Meval.compiled_cache))
+        self.assertTrue(code is Meval.compile_cached('x + 1'))
+        return
+    pass
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.linecov'
+import json, os, sys, tempfile, unittest
+
+from trepan.lib import linecov as Mlinecov
+
+
+def fn(x):
+    if x:
+        return 1
+    return 2
+
+
+def canonic_code(code):
+    return os.path.realpath(code.co_filename)
+
+
+class TestLineCoverage(unittest.TestCase):
+
+    def run_fn(self, cov, x):
+        def trace(frame, event, arg):
+            if 'line' == event: cov.record(frame)
+            return trace
+        sys.settrace(trace)
+        try:
+            fn(x)
+        finally:
+            sys.settrace(None)
+            pass
+        return
+
+    def test_record(self):
+        code = fn.func_code
+        first = code.co_firstlineno
+        self.assertEqual(4, Mlinecov.line_span(code))
+        cov = Mlinecov.LineCoverage()
+        self.run_fn(cov, True)
+        self.assertEqual(bytearray([0, 1, 1, 0]), cov.bitmaps[code])
+        self.run_fn(cov, False)
+        self.assertEqual(bytearray([0, 1, 1, 1]), cov.bitmaps[code])
+        filename = canonic_code(code)
+        lines = cov.lines_by_file(canonic_code)[filename]
+        self.assertEqual(set([first+1, first+2, first+3]), lines)
+        missed = Mlinecov.missed_lines(filename, lines)
+        self.assertTrue(first in missed)
+        self.assertFalse(first+1 in missed)
+        cov.clear()
+        self.assertEqual({}, cov.lines_by_file(canonic_code))
+        return
+
+    def test_save(self):
+        cov = Mlinecov.LineCoverage()
+        self.run_fn(cov, True)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            cov.save(path, canonic_code)
+            data = json.load(open(path))
+        finally:
+            os.unlink(path)
+            pass
+        first = fn.func_code.co_firstlineno
+        self.assertEqual([first+1, first+2],
+                         data[canonic_code(fn.func_code)])
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.lineprof'
+import os, pstats, sys, tempfile, thread, threading, unittest
+
+from trepan.lib import lineprof as Mlineprof
+
+
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n-1) + fib(n-2)
+
+
+class Clock:
+    """A timer which goes up by one each time it is read."""
+    def __init__(self):
+        self.now = 0
+        return
+
+    def __call__(self):
+        self.now += 1
+        return float(self.now)
+    pass
+
+
+class TestTraceProfiler(unittest.TestCase):
+
+    def profile(self, profiler, fn, *args):
+        def trace(frame, event, arg):
+            profiler.event(frame, event, arg)
+            return trace
+        sys.settrace(trace)
+        try:
+            fn(*args)
+        finally:
+            sys.settrace(None)
+            pass
+        return
+
+    def test_counts(self):
+        profiler = Mlineprof.TraceProfiler(Clock())
+        self.profile(profiler, fib, 3)
+        times = profiler.times_by_code()[fib.func_code]
+        self.assertEqual(5, times.calls)
+        self.assertEqual(1, times.primitive)
+        self.assertEqual(0, times.active)
+        first = fib.func_code.co_firstlineno
+        self.assertEqual([(first+1, 5), (first+2, 3), (first+3, 2)],
+                         [(line, hits) for line, hits, time in times.lines()])
+
+        # With a clock which ticks once per event, the time of the
+        # outermost call is the number of events in it less one: a
+        # call and a return for each call, plus the ten line events.
+        self.assertEqual(5*2 + 10 - 1, times.cumulative)
+        self.assertEqual(times.cumulative, times.own)
+        self.assertEqual([fib.func_code],
+                         [times.code for times in profiler.functions()])
+        return
+
+    def test_threads(self):
+        profiler = Mlineprof.TraceProfiler()
+
+        def trace(frame, event, arg):
+            profiler.event(frame, event, arg)
+            return trace
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        threading.settrace(trace)
+        try:
+            threads = [threading.Thread(target=fib, args=(14,))
+                       for i in range(4)]
+            for t in threads: t.start()
+            for t in threads: t.join()
+        finally:
+            threading.settrace(None)
+            sys.setcheckinterval(interval)
+            pass
+        # No count is lost when threads' events interleave.
+        times = profiler.times_by_code()[fib.func_code]
+        self.assertEqual(4 * 1219, times.calls)
+        self.assertEqual(4, times.primitive)
+        self.assertEqual(4 * 1219, times.lines()[0][1])
+        self.assertEqual(0, times.active)
+        return
+
+    def test_pause(self):
+        clock = Clock()
+        profiler = Mlineprof.TraceProfiler(clock)
+        profiler.pause()
+        clock.now += 100
+        profiler.resume()
+        self.assertEqual(101, profiler.paused[thread.get_ident()])
+
+        # A stop in another thread leaves this one's times alone.
+        frame = sys._getframe()
+        profiler.event(frame, 'call', None)
+        start = clock.now
+
+        def stop():
+            profiler.pause()
+            clock.now += 100
+            profiler.resume()
+            return
+        t = threading.Thread(target=stop)
+        t.start()
+        t.join()
+        profiler.event(frame, 'return', None)
+        times = profiler.times_by_code()[frame.f_code]
+        self.assertEqual(clock.now - start, times.cumulative)
+        return
+
+    def test_save(self):
+        profiler = Mlineprof.TraceProfiler()
+        self.profile(profiler, fib, 5)
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        canonic = lambda code: os.path.realpath(code.co_filename)
+        try:
+            profiler.save(path, canonic)
+            stats = pstats.Stats(path).stats
+        finally:
+            os.unlink(path)
+            pass
+        key = (canonic(fib.func_code), fib.func_code.co_firstlineno, 'fib')
+        primitive, calls, own, cumulative, callers = stats[key]
+        self.assertEqual((1, 15), (primitive, calls))
+        self.assertEqual(14, callers[key])
+        lines = profiler.lines_by_file(canonic)[canonic(fib.func_code)]
+        self.assertEqual(15, lines[fib.func_code.co_firstlineno+1][0])
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.sampler'
+import inspect, signal, unittest
+
+from trepan.lib import sampler as Msampler
+
+
+def inner():
+    return inspect.currentframe()
+
+
+def outer():
+    return inner()
+
+
+class TestSampler(unittest.TestCase):
+
+    def test_add_sample(self):
+        sampler = Msampler.Sampler(is_ignored=lambda code: False)
+        frame = outer()
+        sampler.add_sample(frame)
+        sampler.add_sample(frame)
+        sampler.add_sample(frame.f_back)
+        self.assertEqual(3, sampler.samples)
+
+        top = sampler.top_functions(2)
+        self.assertEqual((inner.func_code, 2, 2), top[0])
+        self.assertEqual((outer.func_code, 1, 3), top[1])
+        self.assertEqual(((inner.func_code, frame.f_lineno), 2),
+                         sampler.top_lines(1)[0])
+
+        root = sampler.call_tree()
+        self.assertEqual(3, root.samples)
+        node = root
+        while node.children:
+            parent, node = node, node.sorted_children()[0]
+            pass
+        self.assertEqual(inner.func_code, node.code)
+        self.assertEqual(2, node.own)
+        self.assertEqual((outer.func_code, 3, 1),
+                         (parent.code, parent.samples, parent.own))
+
+        folded = sampler.folded(lambda code: code.co_name)
+        self.assertEqual(2, len(folded))
+        self.assertTrue(folded[0].endswith(';outer 1'))
+        self.assertTrue(folded[1].endswith(';outer;inner 2'))
+
+        sampler.clear()
+        self.assertEqual(0, sampler.samples)
+        self.assertEqual([], sampler.folded())
+        return
+
+    def test_ignored(self):
+        sampler = Msampler.Sampler(
+            is_ignored=lambda code: code is inner.func_code)
+        sampler.add_sample(outer())
+        self.assertEqual([(outer.func_code, 1, 1)],
+                         sampler.top_functions(1))
+        self.assertTrue(Msampler.is_debugger_code(Msampler.Sampler.start
+                                                  .im_func.func_code))
+        self.assertFalse(Msampler.is_debugger_code(inner.func_code))
+        return
+
+    def test_start_stop(self):
+        old_handler = signal.getsignal(signal.SIGPROF)
+        sampler = Msampler.Sampler(0.001, is_ignored=lambda code: False)
+        sampler.start()
+        self.assertTrue(sampler.running)
+        n = 0
+        while not sampler.samples and n < 10 ** 7:
+            n += 1
+            pass
+        sampler.stop()
+        self.assertFalse(sampler.running)
+        self.assertTrue(sampler.samples > 0)
+        if old_handler != signal.SIG_DFL:
+            self.assertEqual(old_handler, signal.getsignal(signal.SIGPROF))
+            pass
+        return
+
+    def test_with_debugger(self):
+        """While sampling, the debugger ignores our SIGPROF handler."""
+        from trepan import debugger as Mdebugger
+        from trepan.inout import stringarray as Mstringarray
+        d = Mdebugger.Debugger({'output': Mstringarray.StringArrayOutput()})
+        sampler = Msampler.Sampler(sigmgr=d.sigmgr)
+        codes = [Msampler.Sampler.handle.im_func.func_code,
+                 Msampler.Sampler.add_sample.im_func.func_code,
+                 Msampler.is_debugger_code.func_code]
+        self.assertEqual([False] * 3,
+                         [d.core.is_ignored_code(code) for code in codes])
+        sampler.start()
+        try:
+            self.assertEqual([True] * 3,
+                             [d.core.is_ignored_code(code) for code in codes])
+        finally:
+            sampler.stop()
+            pass
+        self.assertEqual([False] * 3,
+                         [d.core.is_ignored_code(code) for code in codes])
+        sh_code = d.sigmgr.sigs['SIGPROF'].handle.im_func.func_code
+        self.assertTrue(d.core.is_ignored_code(sh_code))
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.scope'
+import inspect, os, unittest
+
+from trepan.lib import scope as Mscope
+
+
+class TestLibScope(unittest.TestCase):
+
+    def test_matches(self):
+        for pattern, modname, expect in (
+            ('myapp.*',  'myapp.models', True),
+            ('myapp.*',  'myapp',        True),
+            ('myapp.*',  'myapplet',     False),
+            ('myapp',    'myapp.models', False),
+            ('*.models', 'myapp.models', True), ):
+            self.assertEqual(expect, Mscope.matches(pattern, modname, ''),
+                             '%s on %s' % (pattern, modname))
+            pass
+        self.assertTrue(Mscope.matches('stdlib', 'os', os.__file__))
+        self.assertFalse(Mscope.matches('site-packages', 'os', os.__file__))
+        return
+
+    def test_trace_scope(self):
+        scope = Mscope.TraceScope(['myapp.*'], ['myapp.vendor.*'])
+        self.assertTrue(scope.classify('myapp.models', __file__))
+        self.assertFalse(scope.classify('myapp.vendor.six', __file__))
+        self.assertFalse(scope.classify('otherapp', __file__))
+
+        scope = Mscope.TraceScope([], ['stdlib'])
+        self.assertFalse(scope.classify('os', os.__file__))
+        frame = inspect.currentframe()
+        self.assertTrue(scope.contains(frame))
+        # The result is cached by code object
+        self.assertEqual(True, scope.cache.get(frame.f_code))
+        self.assertEqual('exclude stdlib', str(scope))
+        self.assertEqual('all', str(Mscope.TraceScope()))
+        return
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.tracelog and trepan.tracedump'
+import inspect, os, sys, tempfile, threading, unittest
+
+from trepan.lib import tracelog as Mtracelog
+from trepan import tracedump as Mtracedump
+
+
+def fn(x):
+    return x + 1
+
+
+def loop(n):
+    t = 0
+    for i in range(n):
+        t += i
+        pass
+    return t
+
+
+class TestTraceLog(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        return
+
+    def tearDown(self):
+        os.unlink(self.path)
+        return
+
+    def records(self, chunk_size=1 << 20):
+        f = open(self.path, 'rb')
+        try:
+            return list(Mtracelog.read_records(f, chunk_size))
+        finally:
+            f.close()
+            pass
+        return
+
+    def run_traced(self, log, fn, *args):
+        def trace(frame, event, arg):
+            log.record(frame, event)
+            return trace
+        sys.settrace(trace)
+        try:
+            fn(*args)
+        finally:
+            sys.settrace(None)
+            pass
+        return
+
+    def test_round_trip(self):
+        # A small buffer, so that it is swapped several times.
+        log = Mtracelog.TraceLog(self.path, buffer_size=64, buffers=2)
+        self.run_traced(log, fn, 1)
+        self.run_traced(log, fn, 2)
+        log.close()
+        self.assertEqual(6, log.records)
+        records = self.records()
+        self.assertEqual(['call', 'line', 'return'] * 2,
+                         [r[2] for r in records])
+        filename = fn.func_code.co_filename
+        line = fn.func_code.co_firstlineno
+        for when, thread_name, event, rfilename, name, rline in records:
+            self.assertEqual(threading.currentThread().getName(),
+                             thread_name)
+            self.assertEqual((filename, 'fn'), (rfilename, name))
+            pass
+        self.assertEqual([line, line+1, line+1], [r[5] for r in records[:3]])
+        times = [r[0] for r in records]
+        self.assertEqual(sorted(times), times)
+        # Records are put together across chunks read.
+        for chunk_size in (1, 7, 50):
+            self.assertEqual(records, self.records(chunk_size))
+            pass
+        # Closing again does nothing.
+        log.close()
+        return
+
+    def test_threads(self):
+        log = Mtracelog.TraceLog(self.path)
+        frame = inspect.currentframe()
+        t = threading.Thread(target=log.record, args=(frame, 'line'),
+                             name='other')
+        t.start()
+        t.join()
+        log.record(frame, 'line')
+        log.close()
+        self.assertEqual(['other', threading.currentThread().getName()],
+                         [r[1] for r in self.records()])
+        return
+
+    def test_breakpoint(self):
+        """A line with a breakpoint which doesn't stop is logged once
+        each time it is run."""
+        from trepan import debugger as Mdebugger
+        d = Mdebugger.Debugger()
+        dc = d.core
+        dc.step_ignore = -1
+        code = loop.func_code
+        line = code.co_firstlineno + 3
+        dc.bpmgr.add_breakpoint(dc.canonic_code(code), line,
+                                condition='False')
+        # Settings are shared by all debuggers, so we set those we
+        # depend on and put them all back afterwards.
+        settings = dict(d.settings)
+        d.settings['patchbreaks'] = False
+        d.settings['events'] = frozenset(['call', 'line', 'return'])
+        d.settings['printset'] = frozenset(['call', 'line', 'return'])
+        d.settings['trace'] = True
+        dc.set_trace_log(self.path)
+        try:
+            dc.start()
+            loop(10)
+            dc.stop(options={'remove': True})
+        finally:
+            d.settings.clear()
+            d.settings.update(settings)
+            dc.set_trace_log(None)
+            dc.bpmgr.delete_all_breakpoints()
+            pass
+        self.assertEqual(10, len([r for r in self.records()
+                                  if 'line' == r[2] and line == r[5]]))
+        return
+
+    def test_bad_log(self):
+        f = open(self.path, 'wb')
+        f.write('not a log')
+        f.close()
+        self.assertRaises(ValueError, self.records)
+        return
+
+    def test_filter(self):
+        log = Mtracelog.TraceLog(self.path)
+        self.run_traced(log, fn, 1)
+        log.close()
+        records = self.records()
+
+        def matches(*args):
+            opts, args = Mtracedump.process_options(
+                'test', ['tracedump'] + list(args) + [self.path])
+            return list(Mtracedump.filter_records(records, opts))
+        self.assertEqual(3, len(matches()))
+        self.assertEqual(0.0, matches()[0][0])
+        self.assertEqual(['line'], [r[2] for r in matches('-e', 'line')])
+        self.assertEqual(2, len(matches('-e', 'call', '-e', 'return')))
+        self.assertEqual(3, len(matches('--function', 'f*')))
+        self.assertEqual(0, len(matches('--function', 'g*')))
+        basename = os.path.basename(fn.func_code.co_filename)
+        self.assertEqual(3, len(matches('--file', basename)))
+        self.assertEqual(3, len(matches('--file', '*' + basename)))
+        self.assertEqual(0, len(matches('--file', 'nosuchfile.py')))
+        self.assertEqual(0, len(matches('--thread', 'nosuchthread')))
+        self.assertEqual(0, len(matches('--start', '1000')))
+        self.assertEqual(records[0][0],
+                         matches('--absolute')[0][0])
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
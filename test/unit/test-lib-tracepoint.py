@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+'Unit test for trepan.lib.tracepoint'
+import inspect, os, unittest
+
+from trepan.lib import breakpoint as Mbreakpoint
+from trepan.lib import tracepoint as Mtracepoint
+
+
+def hit(bpmgr, x, trace=True):
+    frame = inspect.currentframe()
+    return bpmgr.find_bp(FILENAME, HIT_LINE, frame, trace)
+FILENAME = os.path.realpath(hit.func_code.co_filename)
+HIT_LINE = hit.func_code.co_firstlineno + 2
+
+
+class TestTracepoint(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        buf = Mtracepoint.TraceBuffer(3)
+        self.assertEqual(0, len(buf))
+        self.assertEqual([], list(buf))
+        for i in range(5):
+            buf.append(i)
+            pass
+        self.assertEqual(3, len(buf))
+        self.assertEqual(2, buf.dropped())
+        self.assertEqual([2, 3, 4], list(buf))
+        buf.clear()
+        self.assertEqual(0, len(buf))
+        self.assertEqual(0, buf.dropped())
+        return
+
+    def test_record(self):
+        bpmgr = Mbreakpoint.BreakpointManager()
+        exprs = Mtracepoint.compile_exprs(['x', 'x + 1', 'undefined'])
+        tp = bpmgr.add_breakpoint(FILENAME, HIT_LINE, trace_exprs=exprs)
+        self.assertEqual('tracepoint', tp.kind())
+
+        # A tracepoint never stops, but does record.
+        self.assertEqual((None, None), hit(bpmgr, 5))
+        self.assertEqual(1, tp.hits)
+        entries = list(bpmgr.tracebuf)
+        self.assertEqual(1, len(entries))
+        self.assertEqual(tp.number, entries[0][2])
+        self.assertEqual(('5', '6', '<NameError>'), entries[0][3])
+        text = Mtracepoint.format_entry(entries[0], ['x', 'x + 1',
+                                                     'undefined'])
+        self.assertTrue(text.endswith('#%d x=5 x + 1=6 undefined=<NameError>'
+                                      % tp.number))
+
+        # Not on a 'return' event, though.
+        hit(bpmgr, 5, trace=False)
+        self.assertEqual(1, len(bpmgr.tracebuf))
+
+        # A breakpoint at the same place still stops.
+        bp = bpmgr.add_breakpoint(FILENAME, HIT_LINE)
+        self.assertEqual('breakpoint', bp.kind())
+        self.assertEqual((bp, True), hit(bpmgr, 5))
+        self.assertEqual(2, len(bpmgr.tracebuf))
+        return
+    pass
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,5 +29,55 @@ class TestStack(unittest.TestCase):
         self.assertTrue(self.result)
         return
 
+    def test_get_stack_snapshot(self):
+        from trepan import debugger
+        d = debugger.Debugger()
+        proc = d.core.processor
+
+        class Plain:
+            debugger = d
+            core     = d.core
+            pass
+
+        def check(frame):
+            stack, i = Mstack.get_stack(frame, None, None, proc)
+            fresh = Mstack.get_stack(frame, None, None, Plain)
+            self.assertEqual(fresh, (stack, i))
+            return stack
+
+        def nest(n, frames):
+            if n > 0:
+                return nest(n-1, frames)
+            frames.append(inspect.currentframe())
+            return check(frames[-1])
+
+        frames = []
+        stack = nest(3, frames)
+        snapshot = proc.stack_snapshot
+        self.assertEqual(len(stack), len(snapshot.stack))
+        self.assertEqual(len(stack)-1, snapshot.index[frames[-1]])
+
+        # A shallower and then a different stack reuse what they can.
+        check(inspect.currentframe())
+        self.assertFalse(frames[-1] in snapshot.index)
+        nest(1, frames)
+        self.assertEqual(len(snapshot.index), len(snapshot.stack))
+
+        # A generator frame resumed from a different caller.
+        def gen():
+            while True:
+                yield check(inspect.currentframe())
+            return
+
+        def first(g):
+            return next(g)
+
+        def second(g):
+            return next(g)
+        g = gen()
+        self.assertEqual('first', first(g)[-2][0].f_code.co_name)
+        self.assertEqual('second', second(g)[-2][0].f_code.co_name)
+        return
+
 if __name__ == '__main__':
     unittest.main()
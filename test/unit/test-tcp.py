@@ -3,11 +3,61 @@
 import unittest
 
 from trepan.inout import tcpserver as Mserver, tcpclient as Mclient
+from trepan.inout import tcpfns as Mtcpfns
+
+
+class FakeSocket:
+    """Hands out `data' at most `chunk' bytes per receive."""
+
+    def __init__(self, data, chunk):
+        self.data  = data
+        self.chunk = chunk
+        return
+
+    def recv_into(self, view):
+        count = min(self.chunk, len(view), len(self.data))
+        view[0:count] = self.data[:count]
+        self.data = self.data[count:]
+        return count
+    pass
 
 
 class TestTCP(unittest.TestCase):
     """Tests TCPServer and TCPClient"""
 
+    def test_message_reader(self):
+        big = 'x' * (3 * Mtcpfns.TCP_MAX_PACKET) + 'end'
+        msgs = ['one', '', big, 'two']
+        data = (Mtcpfns.pack_msg(msgs[0]) + Mtcpfns.pack_msg(msgs[1], True) +
+                Mtcpfns.pack_msg(msgs[2], True) + Mtcpfns.pack_msg(msgs[3]))
+        for chunk in (1, 7, len(data)):
+            reader = Mtcpfns.MessageReader(FakeSocket(data, chunk))
+            self.assertFalse(reader.binary_seen)
+            self.assertEqual('one', reader.read_msg())
+            self.assertFalse(reader.binary_seen)
+            self.assertEqual(msgs[1:], [reader.read_msg() for m in msgs[1:]])
+            self.assertTrue(reader.binary_seen)
+            self.assertEqual(0, len(reader))
+            self.assertRaises(EOFError, reader.read_msg)
+            pass
+
+        # The old framing can't say how long a big message is.
+        self.assertEqual(Mtcpfns.MAX_OLD_MSG,
+                         len(Mtcpfns.unpack_msg(Mtcpfns.pack_msg(big))[1]))
+        self.assertEqual(big,
+                         Mtcpfns.unpack_msg(Mtcpfns.pack_msg(big, True))[1])
+        return
+
+    def test_message_too_long(self):
+        length = Mtcpfns.MAX_BINARY_MSG + 1
+        data = (Mtcpfns.BINARY_MARK + Mtcpfns.BINARY_LENGTH.pack(length) +
+                'x' * 100)
+        reader = Mtcpfns.MessageReader(FakeSocket(data, len(data)))
+        self.assertRaises(IOError, reader.read_msg)
+        # Nothing was set aside for the message.
+        self.assertEqual(Mtcpfns.TCP_MAX_PACKET, len(reader.buf))
+        return
+
     def test_client_server(self):
         try:
             server = Mserver.TCPServer(opts={'open': True})
@@ -16,19 +66,31 @@ class TestTCP(unittest.TestCase):
             return
         try:
             client = Mclient.TCPClient(opts={'open': True})
+        except:
+            print("Skipping because of client open failure")
+            server.close()
+            return
+        try:
             for line in ['one', 'two', 'three']:
                 server.writeline(line)
                 self.assertEqual(line, client.read_msg().rstrip('\n'))
                 pass
+            # The client saw the server's HELLO, and so writes in
+            # binary; seeing that, so does the server.
+            self.assertTrue(client.binary)
+            self.assertFalse(server.binary)
             for line in ['four', 'five', 'six']:
                 client.writeline(line)
                 self.assertEqual(line, server.read_msg().rstrip('\n'))
                 pass
-        except:
-            print("Skipping because of client open failure")
+            self.assertTrue(server.binary)
+            line = 'seven' * 10000
+            server.writeline(line)
+            self.assertEqual(line, client.read_msg().rstrip('\n'))
+        finally:
+            client.close()
+            server.close()
             pass
-        client.close()
-        server.close()
         return
 
 if __name__ == '__main__':
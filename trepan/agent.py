@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""A dormant debugger for programs which can't run under trace.
+
+install() puts in a handler for SIGUSR2 and does nothing else; no
+trace hook is set, so the program runs at full speed. When the signal
+comes in, a debugger with a server interface is started and stops the
+main thread at its next event. Connect to it with `trepan2 --client`:
+
+    import trepan.agent         # in the program
+    trepan.agent.install()
+    ...
+    $ kill -USR2 <pid>
+    $ trepan2 --client
+
+A listener thread can be added too, so that connecting to a port is
+enough to get in:
+
+    trepan.agent.install(port=1027)
+
+The debugger always wakes up in the main thread, which is where
+Python runs signal handlers. Python gives trace events to a thread
+only once that thread has set a trace function itself, so there is
+no portable way to have another thread that is already running stop.
+
+Use `continue` rather than `quit` to leave the program running. Once
+started the debugger stays active; deactivate() makes the agent
+dormant again.
+"""
+
+import os, select, signal, socket, threading
+
+from trepan.lib import default as Mdefault, sighandler as Msig
+
+
+def set_signal(signum, handler):
+    """signal.signal(), going around the replacement a debugger's
+    SignalManager puts in."""
+    set_fn = signal.signal
+    if isinstance(getattr(set_fn, 'im_self', None), Msig.SignalManager):
+        set_fn = set_fn.im_self._orig_set_signal
+        pass
+    return set_fn(signum, handler)
+
+
+class AgentSigHandler(Msig.SigHandler):
+    """The handler for the signal which wakes up the agent. Rather
+    than stopping in a running debugger, it has `agent' start one
+    up. The signal is then passed along to whatever handler the
+    program had."""
+
+    def __init__(self, agent, signame, signum, old_handler):
+        Msig.SigHandler.__init__(self, agent, signame, signum,
+                                 old_handler, None, True,
+                                 print_stack=False, pass_along=True)
+        return
+
+    def handle(self, signum, frame):
+        """This method is called when a signal is received."""
+        if self.b_stop:
+            self.dbgr.activate()
+            pass
+        if self.pass_along and callable(self.old_handler):
+            self.old_handler(signum, frame)
+            pass
+        return
+    pass
+
+
+class Agent:
+    """A debugger which isn't created until signal `signame' is
+    received or, if a `port' is given, until something connects to
+    it.
+
+    `dbg_opts' are the options to create the debugger with. If they
+    don't give an interface, we use a ServerInterface, opened with
+    `connection_opts' or on the listener's socket.
+    """
+
+    def __init__(self, signame='SIGUSR2', port=None, host='127.0.0.1',
+                 dbg_opts=None, connection_opts=None):
+        self.dbg             = None
+        self.dbg_opts        = dict(dbg_opts or {})
+        self.connection_opts = dict(connection_opts or {'IO': 'TCP'})
+        self.listen_socket   = None
+        self.listener        = None
+
+        signum = Msig.lookup_signum(signame)
+        if signum is None:
+            raise ValueError('%s is not a signal name I know about.'
+                             % signame)
+        self.sighandler = AgentSigHandler(self, Msig.canonic_signame(signame),
+                                          signum, signal.getsignal(signum))
+        set_signal(signum, self.sighandler.handle)
+        if port is not None:
+            self.listen(port, host)
+            pass
+        return
+
+    def listen(self, port, host='127.0.0.1'):
+        """Start a thread which waits for a connection on `port' and
+        then sends us our signal. The debugger takes the connection
+        over from the listening socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if Mdefault.SERVER_SOCKET_OPTS['reuse']:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            pass
+        sock.bind((host, port))
+        sock.listen(1)
+        self.listen_socket = sock
+        self.listener = threading.Thread(target=self.wait_for_connect,
+                                         name='trepan-agent')
+        self.listener.setDaemon(True)
+        self.listener.start()
+        return
+
+    def wait_for_connect(self):
+        # Signals are run in the main thread, which is where we want
+        # to stop.
+        select.select([self.listen_socket], [], [])
+        os.kill(os.getpid(), self.sighandler.signum)
+        return
+
+    def activate(self):
+        """Start the debugger if need be and have it stop at the next
+        event in this thread."""
+        if self.dbg is None:
+            from trepan import debugger as Mdebugger
+            opts = dict(self.dbg_opts)
+            if 'interface' not in opts:
+                opts['interface'] = self.server_interface()
+                pass
+            self.dbg = Mdebugger.Debugger(opts)
+            self.dbg.core.add_ignore(self.activate, self.sighandler.handle,
+                                     Msig.SigHandler.handle)
+            pass
+        core = self.dbg.core
+        core.step_ignore = 0
+        core.stop_level  = None
+        if core.is_started():
+            core.update_dispatch()
+            core.rearm_frames()
+        else:
+            core.start()
+            pass
+        return
+
+    def server_interface(self):
+        from trepan.inout import tcpserver as Mtcpserver
+        from trepan.interfaces import server as Mserver
+        if self.listen_socket is None:
+            return Mserver.ServerInterface(
+                connection_opts=self.connection_opts)
+        inout = Mtcpserver.TCPServer(inout=self.listen_socket)
+        return Mserver.ServerInterface(inout=inout)
+
+    def deactivate(self):
+        """Stop the debugger, going back to waiting for our signal."""
+        if self.dbg is not None:
+            self.dbg.core.stop(options={'remove': True})
+            pass
+        return
+    pass
+
+# The agent put in by install().
+agent = None
+
+
+def install(signame='SIGUSR2', port=None, host='127.0.0.1', dbg_opts=None,
+            connection_opts=None):
+    """Put in an agent using signal `signame' and, if `port' is
+    given, a listener on it, replacing any agent installed before.
+    See Agent for the meaning of the other parameters. This has to be
+    called from the main thread."""
+    global agent
+    if agent is not None:
+        uninstall()
+        pass
+    agent = Agent(signame, port, host, dbg_opts, connection_opts)
+    return agent
+
+
+def uninstall():
+    """Put back the program's handler for our signal and stop the
+    debugger."""
+    global agent
+    if agent is not None:
+        handler = agent.sighandler
+        set_signal(handler.signum, handler.old_handler or signal.SIG_DFL)
+        agent.deactivate()
+        agent = None
+        pass
+    return
+
+
+def deactivate():
+    if agent is not None:
+        agent.deactivate()
+        pass
+    return
+
+# Demo it
+if __name__=='__main__':
+    import time
+    install()
+    print('Send signal USR2 to process %d to debug it.' % os.getpid())
+
+    def work(n):
+        time.sleep(1)
+        return n + 1
+    n = 0
+    while n < 100:
+        n = work(n)
+        pass
+    pass
@@ -201,6 +201,7 @@ debug() call. 0 means don't even wait for the debug() call to finish.
         core.trace_hook_suspend = old_trace_hook_suspend
     else:
         core.step_ignore = step_ignore-1
+        core.update_dispatch()
         pass
     return
 
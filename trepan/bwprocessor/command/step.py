@@ -53,7 +53,6 @@ is not given, 1 is used, i.e. stop at the next statement.
             pass
         self.proc.debugger.core.step_ignore = 0
         self.core.stop_level       = None
-        self.core.last_frame       = None
         self.core.stop_on_finish   = False
         self.proc.continue_running = True  # Break out of command read loop
         self.proc.response['step_count'] = step_count + 1
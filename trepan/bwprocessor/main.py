@@ -20,41 +20,12 @@ from repr import Repr
 from trepan import vprocessor as Mprocessor
 from trepan import exception as Mexcept, misc as Mmisc
 from trepan.lib import bytecode as Mbytecode, display as Mdisplay
-from trepan.lib import thred as Mthread
+from trepan.lib import stack as Mstack, thred as Mthread
 from trepan.bwprocessor import location as Mlocation, msg as Mmsg
 
 
-def get_stack(f, t, botframe, proc_obj=None):
-    """Return a stack of frames which the debugger will use for in
-    showing backtraces and in frame switching. As such various frame
-    that are really around may be excluded unless we are debugging the
-    sebugger. Also we will add traceback frame on top if that
-    exists."""
-    exclude_frame = lambda f: False
-    if proc_obj:
-        settings = proc_obj.debugger.settings
-        if not settings['dbg_trepan']:
-            exclude_frame = lambda f: \
-                proc_obj.core.ignore_filter.is_included(f)
-            pass
-        pass
-    stack = []
-    if t and t.tb_frame is f:
-        t = t.tb_next
-    while f is not None:
-        if exclude_frame(f): break  # See commented alternative below
-        stack.append((f, f.f_lineno))
-        # bdb has:
-        # if f is botframe: break
-        f = f.f_back
-        pass
-    stack.reverse()
-    i = max(0, len(stack) - 1)
-    while t is not None:
-        stack.append((t.tb_frame, t.tb_lineno))
-        t = t.tb_next
-        pass
-    return stack, i
+# Shared with the command processor; see Mstack.get_stack().
+get_stack = Mstack.get_stack
 
 
 def run_hooks(obj, hooks, *args):
@@ -125,6 +96,7 @@ class BWProcessor(Mprocessor.Processor):
         self._repr.array       = 10
         self._saferepr         = self._repr.repr
         self.stack             = []
+        self.stack_snapshot    = Mstack.StackSnapshot()
         self.thread_name       = None
         self.frame_thread_name = None
         return
@@ -264,7 +264,11 @@ class Debugger:
         'settings'    : Mdefault.DEBUGGER_SETTINGS,
 
         'start_opts'  : Mdefault.START_OPTS,
-        'step_ignore' : 0, }
+        'step_ignore' : 0,
+
+        # Install our trace hook straight into sys.settrace() when no
+        # other hook is around? See DebuggerCore.start().
+        'direct_trace': True, }
 
     def __init__(self, opts=None):
         """Create a debugger object. But depending on the value of
@@ -290,7 +294,7 @@ class Debugger:
 
         core_opts = {}
         for opt in ('ignore_filter', 'proc_opts', 'processor', 'step_ignore',
-                    'processor',):
+                    'processor', 'direct_trace',):
             core_opts[opt] = get_option(opt)
             pass
 
@@ -313,7 +317,7 @@ class Debugger:
             pass
 
         self.core = Mcore.DebuggerCore(self, core_opts)
-        self.core.add_ignore(self.core.stop)
+        self.core.add_ignore(self.core.stop, self.core.breakpoint_hook)
 
         # When set True, we'll also suspend our debug-hook tracing.
         # This gives us a way to prevent or allow self debugging.
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-#   Copyright (C) 2009, 2013-2014 Rocky Bernstein <rocky@gnu.org>
+#   Copyright (C) 2009, 2013-2015 Rocky Bernstein <rocky@gnu.org>
 #
 #   This program is free software: you can redistribute it and/or modify
 #   it under the terms of the GNU General Public License as published by
@@ -33,7 +33,9 @@ class TCPClient(DebuggerInOutBase):
                                             Mdefault.CLIENT_SOCKET_OPTS)
         self.inout     = None
         self.addr      = None
-        self.buf       = ''
+        self.reader    = None   # Mtcpfns.MessageReader on inout
+        self.binary    = False  # Does the server take binary framing?
+        self.greeted   = False  # Have we looked for the server's HELLO?
         self.line_edit = False  # Our name for GNU readline capability
         self.state     = 'disconnected'
         if inout:
@@ -79,30 +81,45 @@ class TCPClient(DebuggerInOutBase):
         if self.inout is None:
             raise IOError('could not open client socket on port %s' %
                           PORT)
+        self.reader  = Mtcpfns.MessageReader(self.inout)
+        self.binary  = False
+        self.greeted = False
         return
 
     def read_msg(self):
         """Read one message unit. It's possible however that
         more than one message will be set in a receive, so we will
         have to buffer that for the next read.
-        EOFError will be raised on EOF.
+        EOFError will be raised on EOF, and IOError if the server
+        sends a message too long to take, after which the connection
+        is dropped.
         """
         if self.state == 'connected':
-            if 0 == len(self.buf):
-                self.buf = self.inout.recv(Mtcpfns.TCP_MAX_PACKET)
-                if 0 == (self.buf):
-                    self.state = 'disconnected'
-                    raise EOFError
-                pass
-            self.buf, data = Mtcpfns.unpack_msg(self.buf)
+            try:
+                data = self.reader.read_msg()
+                if not self.greeted:
+                    # A server which sends HELLO first takes binary
+                    # framing; older ones don't send it.
+                    self.greeted = True
+                    if Mtcpfns.HELLO == data:
+                        self.binary = True
+                        data = self.reader.read_msg()
+                        pass
+                    pass
+            except EOFError:
+                self.state = 'disconnected'
+                raise
+            except IOError:
+                self.inout.close()
+                self.state = 'disconnected'
+                raise
             return data
         else:
             raise IOError("read_msg called in state: %s." % self.state)
 
     def write(self, msg):
         """ This method the debugger uses to write a message unit."""
-        # FIXME: do we have to check the size of msg and split output?
-        return self.inout.send(Mtcpfns.pack_msg(msg))
+        return self.inout.sendall(Mtcpfns.pack_msg(msg, self.binary))
 
     pass
 
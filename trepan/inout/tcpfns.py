@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-#   Copyright (C) 2009-2014 Rocky Bernstein <rocky@gnu.org>
+#   Copyright (C) 2009-2015 Rocky Bernstein <rocky@gnu.org>
 #
 #   This program is free software: you can redistribute it and/or modify
 #   it under the terms of the GNU General Public License as published by
@@ -13,25 +13,156 @@
 #
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
-"""Subsidiary routines used to "pack" and "unpack" TCP messages. """
+"""Subsidiary routines used to "pack" and "unpack" TCP messages.
+
+There are two ways a message is framed. The old way, which older
+clients and servers know, gives the length as LOG_MAX_MSG decimal
+digits, and so can't handle a message of more than MAX_OLD_MSG
+bytes. The binary way is the byte BINARY_MARK followed by the length
+as a 4-byte big-endian number. A reader can tell them apart by the
+first byte, so it takes either.
+
+A binary length of more than MAX_BINARY_MSG can only be a corrupt or
+hostile stream, so the reader gives up on the connection rather than
+make room for it.
+
+A server starts out with the old framing. The first thing it sends is
+HELLO, and a client which knows about it uses binary framing from then
+on. Once the server gets a message framed that way, it does too."""
+
+import struct
 
 TCP_MAX_PACKET = 8192  # Largest size for a recv
 LOG_MAX_MSG    = 4     # int(log(TCP_MAX_PACKET)
+MAX_OLD_MSG    = 10 ** LOG_MAX_MSG - 1
 
+BINARY_MARK    = '\xfe'
+BINARY_LENGTH  = struct.Struct('!I')
+BINARY_HEADER  = 1 + BINARY_LENGTH.size
+MAX_BINARY_MSG = 64 * 1024 * 1024
 
-def pack_msg(msg):
+# To a client which doesn't know about it, this is a PRINT message
+# (see trepan.interfaces.comcodes) with nothing to print.
+HELLO = '.'
+
+
+def pack_msg(msg, binary=False):
+    if isinstance(msg, unicode):
+        msg = msg.encode('utf-8')
+        pass
+    if binary:
+        return BINARY_MARK + BINARY_LENGTH.pack(len(msg)) + msg
+    # Better cut short than have the reader lose its place.
+    msg = msg[:MAX_OLD_MSG]
     fmt = '%%0%dd' % LOG_MAX_MSG  # A funny way of writing: '%04d'
     return ( fmt % len(msg)) + msg
 
 
 def unpack_msg(buf):
+    if buf[0:1] == BINARY_MARK:
+        length = BINARY_LENGTH.unpack_from(buf, 1)[0]
+        return buf[BINARY_HEADER+length:], \
+            buf[BINARY_HEADER:BINARY_HEADER+length]
     length  = int(buf[0:LOG_MAX_MSG])
     data    = buf[LOG_MAX_MSG:LOG_MAX_MSG+length]
     buf     = buf[LOG_MAX_MSG+length:]
     return buf, data
 
+
+class MessageReader:
+    """Reads messages framed either way from socket `sock'. What is
+    received goes into one buffer, grown as needed to hold a whole
+    message, so a message split over many receives, or a receive
+    holding many messages, costs no more than copying it once."""
+
+    def __init__(self, sock):
+        self.sock        = sock
+        self.buf         = bytearray(TCP_MAX_PACKET)
+        self.start       = 0      # where the unread data starts
+        self.end         = 0      # and ends
+        self.binary_seen = False  # Has a message been framed in binary?
+        return
+
+    def __len__(self):
+        """Return the number of bytes received but not yet read."""
+        return self.end - self.start
+
+    def next_msg(self):
+        """Return the next message if all of it has been received, or
+        else None. The second value is how many bytes are needed to
+        have the message's header and body. IOError is raised if the
+        message is said to be longer than MAX_BINARY_MSG."""
+        buf, start = self.buf, self.start
+        avail = self.end - start
+        if avail < 1:
+            return None, 1
+        if buf[start] == ord(BINARY_MARK):
+            if avail < BINARY_HEADER:
+                return None, BINARY_HEADER
+            header = BINARY_HEADER
+            length = BINARY_LENGTH.unpack_from(buf, start + 1)[0]
+            if length > MAX_BINARY_MSG:
+                raise IOError("message of %d bytes is longer than the "
+                              "%d allowed" % (length, MAX_BINARY_MSG))
+        else:
+            if avail < LOG_MAX_MSG:
+                return None, LOG_MAX_MSG
+            header = LOG_MAX_MSG
+            length = int(str(buf[start:start+LOG_MAX_MSG]))
+            pass
+        if avail < header + length:
+            return None, header + length
+        self.start += header + length
+        if self.start == self.end:
+            self.start = self.end = 0
+            if len(buf) > 16 * TCP_MAX_PACKET:
+                # Don't hang on to the room a big message needed.
+                self.buf = bytearray(TCP_MAX_PACKET)
+                pass
+            pass
+        if header == BINARY_HEADER:
+            self.binary_seen = True
+            pass
+        return str(buf[start+header:start+header+length]), header + length
+
+    def read_msg(self):
+        """Return the next message, receiving as much as it takes.
+        EOFError is raised if the connection is closed first, and
+        IOError if the message is too long; see next_msg()."""
+        while True:
+            msg, needed = self.next_msg()
+            if msg is not None:
+                return msg
+            self.fill(needed)
+            pass
+        return
+
+    def fill(self, needed):
+        """Receive more data, making sure first that the buffer has
+        room for `needed' bytes from the start of the unread data."""
+        buf = self.buf
+        if self.start + needed > len(buf):
+            # Move what hasn't been read to the front, and grow the
+            # buffer if that isn't enough.
+            avail = self.end - self.start
+            if self.start:
+                buf[0:avail] = buf[self.start:self.end]
+                self.start, self.end = 0, avail
+                pass
+            if needed > len(buf):
+                buf.extend(bytearray(max(needed, 2 * len(buf)) - len(buf)))
+                pass
+            pass
+        count = self.sock.recv_into(memoryview(buf)[self.end:])
+        if 0 == count:
+            raise EOFError
+        self.end += count
+        return
+    pass
+
 # Demo
 if __name__=='__main__':
     msg = "Hi there!"
     assert unpack_msg(pack_msg(msg))[1] == msg
+    assert unpack_msg(pack_msg(msg, True))[1] == msg
     pass
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-#   Copyright (C) 2009, 2013-2014 Rocky Bernstein <rocky@gnu.org>
+#   Copyright (C) 2009, 2013-2015 Rocky Bernstein <rocky@gnu.org>
 #
 #   This program is free software: you can redistribute it and/or modify
 #   it under the terms of the GNU General Public License as published by
@@ -36,7 +36,8 @@ class TCPServer(DebuggerInOutBase):
         self.inout  = None
         self.conn   = None
         self.addr   = None
-        self.buf    = ''    # Read buffer
+        self.reader = None  # Mtcpfns.MessageReader on conn
+        self.binary = False # Does the client take binary framing?
         self.state = 'disconnected'
         self.PORT  = None
         self.HOST  = None
@@ -97,35 +98,43 @@ class TCPServer(DebuggerInOutBase):
         return
 
     def read(self):
-        if len(self.buf) == 0:
-            self.read_msg()
-            pass
-        return self.buf
+        return self.read_msg()
 
     def read_msg(self):
         """Read one message unit. It's possible however that
         more than one message will be set in a receive, so we will
         have to buffer that for the next read.
-        EOFError will be raised on EOF.
+        EOFError will be raised on EOF, and IOError if the client
+        sends a message too long to take, after which the connection
+        is dropped.
         """
         if self.state != 'connected':
             self.wait_for_connect()
             pass
         if self.state == 'connected':
-            if 0 == len(self.buf):
-                self.buf = self.conn.recv(Mtcpfns.TCP_MAX_PACKET)
-                if 0 == len(self.buf):
-                    self.state = 'disconnected'
-                    raise EOFError
+            try:
+                data = self.reader.read_msg()
+            except EOFError:
+                self.state = 'disconnected'
+                raise
+            except IOError:
+                self.conn.close()
+                self.state = 'disconnected'
+                raise
+            if self.reader.binary_seen:
+                self.binary = True
                 pass
-            self.buf, data = Mtcpfns.unpack_msg(self.buf)
             return data
         else:
             raise IOError("read_msg called in state: %s." % self.state)
 
     def wait_for_connect(self):
         self.conn, self.addr = self.inout.accept()
+        self.reader = Mtcpfns.MessageReader(self.conn)
+        self.binary = False
         self.state = 'connected'
+        # Let the client know it can send binary-framed messages.
+        self.conn.sendall(Mtcpfns.pack_msg(Mtcpfns.HELLO))
         return
 
     def write(self, msg):
@@ -136,8 +145,7 @@ class TCPServer(DebuggerInOutBase):
         if self.state != 'connected':
             self.wait_for_connect()
             pass
-        # FIXME: do we have to check the size of msg and split output?
-        return self.conn.send(Mtcpfns.pack_msg(msg))
+        return self.conn.sendall(Mtcpfns.pack_msg(msg, self.binary))
 
 # Demo
 if __name__=='__main__':
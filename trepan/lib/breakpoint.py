@@ -7,6 +7,8 @@ __all__ = ["BreakpointManager", "Breakpoint"]
 
 import os.path
 
+from trepan.lib import eval as Meval, tracepoint as Mtracepoint
+
 
 class BreakpointManager:
     """Manages the list of Breakpoints.
@@ -16,11 +18,39 @@ class BreakpointManager:
     dictionary. If the breakpoint is a function it is in `fnlist' as
     well.  Note there may be more than one breakpoint per line which
     may have different conditions associated with them.
+
+    So that the trace hook can rule out a location quickly, the
+    `fileindex' dictionary maps a canonic filename to the frozenset
+    of line numbers in that file which have at least one enabled
+    line breakpoint. It is kept up to date as breakpoints are added,
+    deleted, enabled or disabled.
+
+    Line breakpoints whose `patched' attribute is set are handled by
+    rewriting the code they are in (see module codepatch) rather than
+    by trace events, so they are left out of `fileindex'.
+
+    Function breakpoints are looked up on a 'call' event by the
+    code object of the function in `fncodes'. Those given only by
+    name are in `fnnames', keyed by the function name.
+
+    If `on_change' is set, it is called with no arguments whenever
+    any of the above change.
+
+    Breakpoints with `trace_exprs' are tracepoints. They never stop
+    us; a hit adds an entry to the ring buffer `tracebuf' instead.
     """
     def __init__(self):
+        self.on_change = None
+        self.tracebuf  = Mtracepoint.TraceBuffer()
         self.reset()
         return
 
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+            pass
+        return
+
     def get_breakpoint(self, i):
         if isinstance(i, str):
             try:
@@ -40,12 +70,12 @@ class BreakpointManager:
         return (True, None, bp)
 
     def add_breakpoint(self, filename, lineno, temporary=False, condition=None,
-                       func=None):
+                       func=None, trace_exprs=None):
 
         bpnum = len(self.bpbynumber)
         if filename: filename  = os.path.realpath(filename)
         brkpt = Breakpoint(bpnum, filename, lineno, temporary, condition,
-                           func)
+                           func, trace_exprs)
         # Build the internal lists of breakpoints
         self.bpbynumber.append(brkpt)
         if (filename, lineno) in self.bplist:
@@ -53,19 +83,40 @@ class BreakpointManager:
         else:
             self.bplist[filename, lineno] = [brkpt]
             pass
+        self._update_fileindex(filename, lineno)
         if func:
             if func in self.fnlist:
                 self.fnlist[func].append(brkpt)
             else:
                 self.fnlist[func] = [brkpt]
                 pass
+            if brkpt.func_code is not None:
+                index, key = self.fncodes, brkpt.func_code
+            else:
+                index, key = self.fnnames, brkpt.funcname
+                pass
+            if key in index:
+                index[key].append(brkpt)
+            else:
+                index[key] = [brkpt]
+                pass
+            pass
+        self._changed()
         return brkpt
 
     def delete_all_breakpoints(self):
         count = 0
-        for bp in self.bpbynumber:
-            count += 1
-            if bp: self.delete_breakpoint(bp)
+        # Let on_change know once, not for each breakpoint.
+        on_change, self.on_change = self.on_change, None
+        try:
+            for bp in self.bpbynumber:
+                count += 1
+                if bp: self.delete_breakpoint(bp)
+                pass
+        finally:
+            self.on_change = on_change
+            pass
+        self._changed()
         if 0 == count:
             return 'There are no breakpoints'
         else:
@@ -81,6 +132,16 @@ class BreakpointManager:
         if not self.bplist[index]:
             # No more breakpoints for this file:line combo
             del self.bplist[index]
+        self._update_fileindex(bp.filename, bp.line)
+        if bp.func:
+            self._remove_from_index(self.fnlist, bp.func, bp)
+            if bp.func_code is not None:
+                self._remove_from_index(self.fncodes, bp.func_code, bp)
+            else:
+                self._remove_from_index(self.fnnames, bp.funcname, bp)
+                pass
+            pass
+        self._changed()
         return True
 
     def delete_breakpoint_by_number(self, bpnum):
@@ -105,21 +166,53 @@ class BreakpointManager:
             return (False, ('Breakpoint (%r) previously %sabled' %
                             (str(bpnum), endis,)))
         bp.enabled = do_enable
+        self._update_fileindex(bp.filename, bp.line)
+        self._changed()
         return (True, '')
 
-    def find_bp(self, filename, line, frame):
+    def find_bp(self, filename, line, frame, trace=True):
         """Determine which breakpoint for this file:line is to be acted upon.
 
         Called only if we know there is a bpt at this
         location.  Returns breakpoint that was triggered and a flag
         that indicates if it is ok to delete a temporary breakpoint.
 
+        Tracepoints hit along the way are recorded, unless `trace' is
+        False.
         """
-        possibles = self.bplist[filename, line]
+        return self._find_possible(self.bplist[filename, line], frame,
+                                   trace)
+
+    def find_fn_bp(self, frame):
+        """Determine which function breakpoint, if any, is to be acted
+        upon for the 'call' event of `frame'. The return value is the
+        same as find_bp().
+
+        Breakpoints on the code object and those given only by the
+        function's name are both candidates, tried in the order they
+        were set."""
+        possibles = self.fncodes.get(frame.f_code)
+        if self.fnnames:
+            by_name = self.fnnames.get(frame.f_code.co_name)
+            if by_name:
+                if possibles:
+                    possibles = sorted(possibles + by_name,
+                                       key=lambda bp: bp.number)
+                else:
+                    possibles = by_name
+                    pass
+                pass
+            pass
+        if not possibles: return (None, None)
+        return self._find_possible(possibles, frame)
+
+    def _find_possible(self, possibles, frame, trace=True):
         for i in range(0, len(possibles)):
             b = possibles[i]
             if not b.enabled:
                 continue
+            if b.trace_exprs is not None and not trace:
+                continue
             if not checkfuncname(b, frame):
                 continue
             # Count every hit when bp is enabled
@@ -130,6 +223,9 @@ class BreakpointManager:
                 if b.ignore > 0:
                     b.ignore = b.ignore -1
                     continue
+                elif b.trace_exprs is not None:
+                    self.tracebuf.record(b, frame)
+                    continue
                 else:
                     # breakpoint and marker that's ok to delete if
                     # temporary
@@ -139,11 +235,14 @@ class BreakpointManager:
                 # Ignore count applies only to those bpt hits where the
                 # condition evaluates to true.
                 try:
-                    val = eval(b.condition, frame.f_globals, frame.f_locals)
+                    val = eval(Meval.compile_cached(b.condition),
+                               frame.f_globals, frame.f_locals)
                     if val:
                         if b.ignore > 0:
                             b.ignore = b.ignore -1
                             # continue
+                        elif b.trace_exprs is not None:
+                            self.tracebuf.record(b, frame)
                         else:
                             return (b, True)
                     # else:
@@ -152,7 +251,10 @@ class BreakpointManager:
                     # if eval fails, most conservative thing is to
                     # stop on breakpoint regardless of ignore count.
                     # Don't delete temporary, as another hint to user.
-                    return (b, False)
+                    # A tracepoint just doesn't record anything.
+                    if b.trace_exprs is None:
+                        return (b, False)
+                    pass
                 pass
             pass
         return (None, None)
@@ -160,6 +262,56 @@ class BreakpointManager:
     def last(self):
         return len(self.bpbynumber)-1
 
+    def set_patched(self, locations):
+        """Mark the line breakpoints at the (filename, line) pairs in
+        `locations' as patched into code, and all others as not."""
+        changed = set()
+        for (filename, line), bps in self.bplist.items():
+            patched = (filename, line) in locations
+            for bp in bps:
+                if bp.patched != patched:
+                    bp.patched = patched
+                    changed.add((filename, line))
+                    pass
+                pass
+            pass
+        for filename, line in changed:
+            self._update_fileindex(filename, line)
+            pass
+        return
+
+    def lines_for_file(self, filename):
+        """Return the frozenset of line numbers in canonic `filename'
+        that have an enabled breakpoint, or None if there are none."""
+        return self.fileindex.get(filename)
+
+    def _remove_from_index(self, index, key, bp):
+        bps = index.get(key)
+        if bps and bp in bps:
+            bps.remove(bp)
+            if not bps: del index[key]
+            pass
+        return
+
+    def _update_fileindex(self, filename, line):
+        """Bring the `fileindex' entry for `filename' up to date with
+        the breakpoints `bplist' has at `line'. Function breakpoints
+        are matched on the 'call' event rather than by line, so they
+        are left out, as are patched breakpoints."""
+        lines = self.fileindex.get(filename, frozenset())
+        if [bp for bp in self.bplist.get((filename, line), [])
+            if bp.enabled and not bp.funcname and not bp.patched]:
+            lines = lines | frozenset([line])
+        else:
+            lines = lines - frozenset([line])
+            pass
+        if lines:
+            self.fileindex[filename] = lines
+        elif filename in self.fileindex:
+            del self.fileindex[filename]
+            pass
+        return
+
     def reset(self):
         """ A list of breakpoints by breakpoint number.  Each entry is
         None or an instance of Breakpoint.  Index 0 is unused, except
@@ -170,6 +322,15 @@ class BreakpointManager:
         self.bplist = {}
         self.fnlist  = {}
 
+        # Function breakpoints by code object, and by function name
+        # for those where we don't have a code object.
+        self.fncodes = {}
+        self.fnnames = {}
+
+        # canonic filename -> frozenset of lines with an enabled breakpoint
+        self.fileindex = {}
+
+        self._changed()
         return
 
     pass  # BreakpointManager
@@ -183,21 +344,41 @@ class Breakpoint:
     """
 
     def __init__(self, number, filename, line, temporary=False,
-                 condition=None, funcname=None):
+                 condition=None, func=None, trace_exprs=None):
 
         self.condition = condition
         self.enabled   = True
 
+        # For a tracepoint, the list of (source, code object) for the
+        # expressions to record when it is hit. See module tracepoint.
+        self.trace_exprs = trace_exprs
+
         self.filename  = filename
         if filename: self.filename  = os.path.realpath(filename)
 
         # Needed if funcname is not None.
         self.func_first_executable_line = None
-        self.funcname  = funcname
+
+        # `func' is either a function object or the name of one. For a
+        # function we match its code object; otherwise just the name.
+        self.func      = func
+        self.func_code = None
+        if func is None:
+            self.funcname = None
+        elif isinstance(func, basestring):
+            self.funcname = func
+        else:
+            self.funcname  = getattr(func, '__name__', str(func))
+            self.func_code = getattr(func, 'func_code', None)
+            pass
 
         # Number of time breakpoint has been hit
         self.hits      = 0
 
+        # Do we get here through rewritten code rather than trace
+        # events? See BreakpointManager.set_patched().
+        self.patched   = False
+
         # Number of times to ignore breakpoint before stopping
         self.ignore    = 0
 
@@ -217,8 +398,8 @@ class Breakpoint:
             disp = disp + 'yes  '
         else:
             disp = disp + 'no   '
-        msg = '%-4dbreakpoint   %s at %s:%d' % (self.number, disp,
-                                                self.filename, self.line)
+        msg = '%-4d%s   %s at %s:%d' % (self.number, self.kind(), disp,
+                                        self.filename, self.line)
         if self.condition:
             msg += '\n\tstop only if %s' % self.condition
         if self.ignore:
@@ -240,14 +421,21 @@ class Breakpoint:
     def icon_char(self):
         """Return a one-character "icon" giving the state of the breakpoint
         't': temporary breakpoint
+        'T': enabled tracepoint
         'B': enabled breakpoint
-        'b': disabled breakpoint
+        'b': disabled breakpoint or tracepoint
         """
         if self.temporary : return 't'
-        elif self.enabled: return 'B'
-        else: return 'b'
+        elif not self.enabled: return 'b'
+        elif self.trace_exprs is not None: return 'T'
+        else: return 'B'
         return
 
+    def kind(self):
+        if self.trace_exprs is None:
+            return 'breakpoint'
+        return 'tracepoint'
+
     pass  # end of Breakpoint class
 
 
@@ -263,8 +451,12 @@ def checkfuncname(b, frame):
 
     # Breakpoint set via function name.
 
-    if frame.f_code.co_name != b.funcname:
-        # It's not a function call, but rather execution of def statement.
+    if b.func_code is not None:
+        if frame.f_code is not b.func_code:
+            # It's not a function call, but rather execution of def
+            # statement, or a different function with the same name.
+            return False
+    elif frame.f_code.co_name != b.funcname:
         return False
 
     # We are in the right frame.
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-#   Copyright (C) 2009, 2012-2013 Rocky Bernstein <rocky@gnu.org>
+#   Copyright (C) 2009, 2012-2013, 2015 Rocky Bernstein <rocky@gnu.org>
 #
 #   This program is free software: you can redistribute it and/or modify
 #   it under the terms of the GNU General Public License as published by
@@ -15,8 +15,10 @@
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 '''Bytecode instruction routines'''
 
-import dis, re
-from opcode import opname, HAVE_ARGUMENT
+import bisect, dis, re
+from opcode import opmap, opname, hasjabs, EXTENDED_ARG, HAVE_ARGUMENT
+
+from trepan.lib import cache as Mcache
 
 
 def op_at_code_loc(code, loc):
@@ -50,37 +52,158 @@ def next_opcode(code, offset):
     pass
 
 
-def next_linestart(co, offset, count=1):
-    linestarts = dict(dis.findlinestarts(co))
-    code = co.co_code
-    # n = len(code)
-    # contains_cond_jump = False
-    for op, offset in next_opcode(code, offset):
-        if offset in linestarts:
-            count -= 1
-            if 0 == count:
-                return linestarts[offset]
+class CodeInfo:
+    """What the helpers here need to know about code object `co',
+    worked out once. See code_info().
+
+    `linestarts' is the list of (offset, line) pairs from
+    dis.findlinestarts(); `offset2line' has the same pairs as a
+    dictionary, and `line2offsets' maps each line to the sorted
+    offsets at which it starts. The jump labels and the decoded
+    instructions take longer to find, and are found only when
+    asked for."""
+
+    def __init__(self, co):
+        self.code         = co.co_code  # Not co, which would keep it alive.
+        self.linestarts   = list(dis.findlinestarts(co))
+        self.offset2line  = dict(self.linestarts)
+        self.line2offsets = {}
+        for offset, line in self.linestarts:
+            self.line2offsets.setdefault(line, []).append(offset)
+            pass
+        self.start_offsets = [offset for offset, line in self.linestarts]
+        self._labels       = None
+        self._instructions = None
+        self._line_offsets = {}  # line -> offsets_for_line() result
+        return
+
+    def instructions(self):
+        """Return the list of (offset, opcode, argument) triples for
+        the instructions of the code. The argument is None for an
+        opcode which doesn't take one."""
+        if self._instructions is None:
+            code = self.code
+            result = []
+            offset = 0
+            extended_arg = 0
+            for op, next_offset in next_opcode(code, 0):
+                if op < 0: break
+                if op >= HAVE_ARGUMENT:
+                    arg = (ord(code[offset+1]) + ord(code[offset+2]) * 256
+                           + extended_arg)
+                    extended_arg = 0
+                    if op == EXTENDED_ARG:
+                        extended_arg = arg * 65536
+                        pass
+                else:
+                    arg = None
+                    pass
+                result.append((offset, op, arg))
+                offset = next_offset
+                pass
+            self._instructions = result
+            pass
+        return self._instructions
+
+    def instruction_at(self, offset):
+        """Return the (offset, opcode, argument) triple for the
+        instruction at `offset', or None if none starts there."""
+        instructions = self.instructions()
+        i = bisect.bisect_left(instructions, (offset,))
+        if i < len(instructions) and instructions[i][0] == offset:
+            return instructions[i]
+        return None
+
+    def labels(self):
+        """Return the set of offsets which are jump targets."""
+        if self._labels is None:
+            self._labels = frozenset(dis.findlabels(self.code))
+            pass
+        return self._labels
+
+    def line_start(self, offset):
+        """Return the offset where the line holding the instruction at
+        `offset' starts, or None if `offset' is before the first line
+        start."""
+        i = bisect.bisect_right(self.start_offsets, offset) - 1
+        if i < 0:
+            return None
+        return self.start_offsets[i]
+
+    def line_at(self, offset):
+        """Return the line of the instruction at `offset'."""
+        start = self.line_start(offset)
+        if start is None:
+            return None
+        return self.offset2line[start]
+
+    def stmt_instructions(self, offset):
+        """Return the instructions from line start `offset' up to the
+        next line start."""
+        instructions = self.instructions()
+        i = bisect.bisect_left(instructions, (offset,))
+        j = bisect.bisect_right(self.start_offsets, offset)
+        if j < len(self.start_offsets):
+            end = bisect.bisect_left(instructions, (self.start_offsets[j],))
+        else:
+            end = len(instructions)
+            pass
+        return instructions[i:end]
+    pass
+
+_code_info = Mcache.CodeCache()
+
+
+def code_info(co):
+    """Return the CodeInfo for code object `co', shared by everyone
+    who asks for it until `co' goes away."""
+    info = _code_info.get(co)
+    if info is None:
+        info = _code_info[co] = CodeInfo(co)
+        pass
+    return info
+
+
+def offsets_for_line(co, lineno):
+    """Return the sorted list of offsets in code object `co' at which
+    Python reports a 'line' event for line `lineno': where the line
+    starts, and where a backward jump lands inside the line, as at the
+    top of a loop."""
+    info = code_info(co)
+    result = info._line_offsets.get(lineno)
+    if result is not None:
+        return result
+    offsets = set(info.line2offsets.get(lineno, []))
+    if offsets:
+        for offset, op, arg in info.instructions():
+            if op in hasjabs and arg < offset and \
+                    info.line_at(arg) == lineno:
+                offsets.add(arg)
+                pass
             pass
         pass
+    result = info._line_offsets[lineno] = sorted(offsets)
+    return result
+
+
+def next_linestart(co, offset, count=1):
+    """Return the line of the `count'th line start after `offset', or
+    -1000 if there aren't that many."""
+    info = code_info(co)
+    i = bisect.bisect_right(info.start_offsets, offset) + count - 1
+    if 0 <= i < len(info.linestarts):
+        return info.linestarts[i][1]
     return -1000
 
 
 def stmt_contains_opcode(co, lineno, query_opcode):
-    linestarts = dict(dis.findlinestarts(co))
-    code = co.co_code
-    found_start = False
-    for offset, start_line in list(linestarts.items()):
-        if start_line == lineno:
-            found_start = True
-            break
-        pass
-    if not found_start:
+    info = code_info(co)
+    offsets = info.line2offsets.get(lineno)
+    if not offsets:
         return False
-    for op, offset in next_opcode(code, offset):
-        if -1000 == offset or linestarts.get(offset): return False
-        opcode = opname[op]
-        # debug: print opcode
-        if query_opcode == opcode:
+    query_op = opmap.get(query_opcode)
+    for offset, op, arg in info.stmt_instructions(offsets[0]):
+        if op == query_op:
             return True
         pass
     return False
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Caches for things the debugger would otherwise work out over and
+over as trace events come in."""
+
+import threading, weakref
+from collections import OrderedDict
+
+
+class CodeCache:
+    """A dictionary keyed by code object whose entries go away when
+    their code object does.
+
+    Unlike weakref.WeakKeyDictionary, entries are found by the
+    identity of the code object rather than by its value. Code objects
+    hash by value, which takes a lot longer than a lookup by id().
+    """
+
+    def __init__(self):
+        self.data = {}
+        return
+
+    def __contains__(self, code):
+        return id(code) in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, code):
+        return self.data[id(code)][1]
+
+    def __setitem__(self, code, value):
+        key  = id(code)
+        data = self.data
+
+        # The callback runs as the code object is freed, and so before
+        # its id() can be given to another object.
+        def forget(ref, key=key, data=data):
+            data.pop(key, None)
+            return
+        data[key] = (weakref.ref(code, forget), value)
+        return
+
+    def clear(self):
+        self.data.clear()
+        return
+
+    def get(self, code, default=None):
+        entry = self.data.get(id(code))
+        if entry is None:
+            return default
+        return entry[1]
+    pass
+
+
+class LRUCache:
+    """A dictionary holding at most `maxsize' entries. When it is
+    full, adding an entry drops the one least recently looked up
+    via get() or added.
+
+    A lookup reorders the entries, so that and other changes are
+    made holding a lock: trace events can come in from several
+    threads at once."""
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.data    = OrderedDict()
+        self.lock    = threading.Lock()
+        return
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.lock.acquire()
+        try:
+            data = self.data
+            if key in data:
+                del data[key]
+            elif len(data) >= self.maxsize:
+                data.popitem(last=False)
+                pass
+            data[key] = value
+        finally:
+            self.lock.release()
+            pass
+        return
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.data.clear()
+        finally:
+            self.lock.release()
+            pass
+        return
+
+    def get(self, key, default=None):
+        self.lock.acquire()
+        try:
+            data = self.data
+            try:
+                value = data.pop(key)
+            except KeyError:
+                return default
+            data[key] = value
+        finally:
+            self.lock.release()
+            pass
+        return value
+
+    def keys(self):
+        self.lock.acquire()
+        try:
+            keys = list(self.data.keys())
+        finally:
+            self.lock.release()
+            pass
+        return keys
+    pass
+
+# Demo it
+if __name__=='__main__':
+    cache = CodeCache()
+    code = compile('1+2', '<demo>', 'eval')
+    cache[code] = '<demo>'
+    print(cache.get(code), len(cache))
+    code = None
+    print(len(cache))
+
+    lru = LRUCache(2)
+    lru['a'] = 1
+    lru['b'] = 2
+    print(lru.get('a'))
+    lru['c'] = 3
+    print(lru.keys())
+    pass
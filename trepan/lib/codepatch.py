@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Breakpoints made by rewriting the bytecode of functions, so that
+they call into the debugger without needing a trace function.
+
+A call to the hook is put in front of the instructions where Python
+would give a 'line' event. Jumps and the line number table are
+adjusted to match, with jumps to such a place landing on the call."""
+
+import gc, types
+from opcode import opmap, hasjabs, hasjrel, HAVE_ARGUMENT, EXTENDED_ARG
+
+from trepan.lib import bytecode as Mbytecode
+
+LOAD_CONST    = opmap['LOAD_CONST']
+CALL_FUNCTION = opmap['CALL_FUNCTION']
+POP_TOP       = opmap['POP_TOP']
+
+# Size of: LOAD_CONST hook; CALL_FUNCTION 0; POP_TOP
+CALL_SIZE = 7
+
+
+def _call(index):
+    return ''.join([chr(LOAD_CONST), chr(index & 0xff), chr(index >> 8),
+                    chr(CALL_FUNCTION), chr(0), chr(0), chr(POP_TOP)])
+
+# Jump over a call which should only be made when we get to it by a
+# jump; see insert_calls().
+JUMP_OVER_CALL = chr(opmap['JUMP_FORWARD']) + chr(CALL_SIZE) + chr(0)
+
+
+def _lnotab_points(co):
+    """Return the (offset, line) points of co.co_lnotab, one for each
+    of its entries."""
+    lnotab = co.co_lnotab
+    offset, line = 0, co.co_firstlineno
+    points = []
+    for i in range(0, len(lnotab), 2):
+        offset += ord(lnotab[i])
+        line   += ord(lnotab[i+1])
+        points.append((offset, line))
+        pass
+    return points
+
+
+def _make_lnotab(points, firstlineno):
+    lnotab = []
+    last_offset, last_line = 0, firstlineno
+    for offset, line in points:
+        d_offset, d_line = offset - last_offset, line - last_line
+        while d_offset > 255:
+            lnotab += [255, 0]
+            d_offset -= 255
+            pass
+        while d_line > 255:
+            lnotab += [d_offset, 255]
+            d_offset = 0
+            d_line  -= 255
+            pass
+        if d_offset or d_line:
+            lnotab += [d_offset, d_line]
+            pass
+        last_offset, last_line = offset, line
+        pass
+    return ''.join([chr(c) for c in lnotab])
+
+
+def insert_calls(co, offsets, hook):
+    """Return a copy of code object `co' which calls `hook' with no
+    arguments before running the instruction at each of `offsets'.
+
+    Where an offset is the start of a line, the call is made however
+    we get there. Elsewhere it is made only when we jump there, as
+    for the 'line' events Python gives on a jump back to the top of a
+    loop.
+
+    ValueError is raised for code we can't rewrite: code with
+    EXTENDED_ARG, or whose constants or jumps would need it."""
+    consts = co.co_consts + (hook,)
+    if len(consts) > 0xffff:
+        raise ValueError('too many constants in %s' % co.co_name)
+    call = _call(len(consts) - 1)
+
+    # offset -> (code to insert there, where in it jumps land)
+    linestarts = Mbytecode.code_info(co).offset2line
+    inserts = {}
+    for offset in offsets:
+        if offset in linestarts:
+            inserts[offset] = (call, 0)
+        else:
+            inserts[offset] = (JUMP_OVER_CALL + call, len(JUMP_OVER_CALL))
+            pass
+        pass
+
+    def moved(offset, jump_target=False):
+        # Where the instruction at `offset' is after the inserts. A jump
+        # to `offset' goes to the code inserted there instead.
+        delta = 0
+        for o in inserts:
+            if o < offset or (o == offset and not jump_target):
+                delta += len(inserts[o][0])
+                pass
+            pass
+        if jump_target and offset in inserts:
+            delta += inserts[offset][1]
+            pass
+        return offset + delta
+
+    code  = co.co_code
+    new   = []
+    start = 0
+    for op, next_offset in Mbytecode.next_opcode(code, 0):
+        if op < 0: break
+        if start in inserts:
+            new.append(inserts[start][0])
+            pass
+        if op == EXTENDED_ARG:
+            raise ValueError('%s uses EXTENDED_ARG' % co.co_name)
+        if op >= HAVE_ARGUMENT:
+            arg = ord(code[start+1]) + ord(code[start+2]) * 256
+            if op in hasjabs:
+                arg = moved(arg, True)
+            elif op in hasjrel:
+                arg = (moved(next_offset + arg, True) -
+                       moved(start) - (next_offset - start))
+                pass
+            if arg > 0xffff:
+                raise ValueError('jump in %s needs EXTENDED_ARG' %
+                                 co.co_name)
+            new.append(chr(op) + chr(arg & 0xff) + chr(arg >> 8))
+        else:
+            new.append(chr(op))
+            pass
+        start = next_offset
+        pass
+
+    # A line now starts with the call inserted there.
+    points = [(moved(offset, True) - inserts.get(offset, ('', 0))[1], line)
+              for offset, line in _lnotab_points(co)]
+    return types.CodeType(co.co_argcount, co.co_nlocals,
+                          co.co_stacksize + 1, co.co_flags, ''.join(new),
+                          consts, co.co_names, co.co_varnames,
+                          co.co_filename, co.co_name, co.co_firstlineno,
+                          _make_lnotab(points, co.co_firstlineno),
+                          co.co_freevars, co.co_cellvars)
+
+
+def functions_in_files(filenames, canonic_code):
+    """Return a dictionary from each of `filenames' to the list of
+    function objects whose code comes from it. `canonic_code' gives
+    the canonic filename of a code object."""
+    result = dict([(filename, []) for filename in filenames])
+    for obj in gc.get_objects():
+        if isinstance(obj, types.FunctionType):
+            funcs = result.get(canonic_code(obj.func_code))
+            if funcs is not None:
+                funcs.append(obj)
+                pass
+            pass
+        pass
+    return result
+
+
+def nested_codes(codes):
+    """Return the set of code objects found in the co_consts of
+    `codes', and in theirs, and so on."""
+    result = set()
+    todo = list(codes)
+    while todo:
+        for const in todo.pop().co_consts:
+            if isinstance(const, types.CodeType) and const not in result:
+                result.add(const)
+                todo.append(const)
+                pass
+            pass
+        pass
+    return result
+
+
+class CodePatcher:
+    """Keeps track of the functions whose code we have rewritten to
+    call `hook' at the start of some of their lines, and puts their
+    original code back when those lines are no longer wanted."""
+
+    def __init__(self, hook):
+        self.hook      = hook
+        self.originals = {}   # function -> its code before rewriting
+        self.lines     = {}   # function -> lines we rewrote it for
+        return
+
+    def original_code(self, func):
+        return self.originals.get(func, func.func_code)
+
+    def set_lines(self, func, lines):
+        """Rewrite `func' so that it calls our hook at each of `lines',
+        or put back its original code if `lines' is empty. Return
+        True if that was done."""
+        lines = frozenset(lines)
+        if lines == self.lines.get(func, frozenset()):
+            return True
+        if not lines:
+            self.restore(func)
+            return True
+        co = self.original_code(func)
+        offsets = []
+        for line in lines:
+            offsets += Mbytecode.offsets_for_line(co, line)
+            pass
+        try:
+            func.func_code = insert_calls(co, offsets, self.hook)
+        except ValueError:
+            self.restore(func)
+            return False
+        self.originals[func] = co
+        self.lines[func] = lines
+        return True
+
+    def restore(self, func):
+        if func in self.originals:
+            func.func_code = self.originals.pop(func)
+            del self.lines[func]
+            pass
+        return
+
+    def restore_all(self):
+        for func in list(self.originals.keys()):
+            self.restore(func)
+            pass
+        return
+    pass
+
+# Demo it
+if __name__=='__main__':
+    import inspect
+
+    def hook():
+        frame = inspect.currentframe().f_back
+        print('hook called at line %d' % frame.f_lineno)
+        return
+
+    def loop(n):
+        t = 0
+        for i in range(n):
+            t += i
+            pass
+        return t
+    patcher = CodePatcher(hook)
+    first = loop.func_code.co_firstlineno
+    print(patcher.set_lines(loop, [first+2, first+3]))
+    print(loop(2))
+    patcher.restore_all()
+    print(loop(2))
+    pass
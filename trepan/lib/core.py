@@ -23,20 +23,43 @@ handling what to do when an event is triggered."""
 
 
 # Common Python packages
-import os, sys, threading
+import inspect, os, sys, threading
 
 # External Egg packages
 import tracer
 
 # Our local modules
 from trepan.lib import breakpoint, default, stack as Mstack
+from trepan.lib import bytecode as Mbytecode, cache as Mcache
+from trepan.lib import codepatch as Mcodepatch, linecov as Mlinecov
+from trepan.lib import lineprof as Mlineprof, tracelog as Mtracelog
+from trepan.lib import eval as Meval, thred as Mthread
 from trepan import misc as Mmisc
 from trepan import clifns as Mclifns
 from trepan.processor import trace as Mtrace, cmdproc as Mcmdproc
 
 
+class ThreadState(threading.local):
+    """The part of the debugger core state that each traced thread
+    keeps for itself, so that threads can filter events without
+    taking the debugger lock."""
+
+    # The frame last seen in this thread and its stack depth. See
+    # DebuggerCore.frame_level().
+    last_frame = None
+    last_level = 10000
+    pass
+
+
 class DebuggerCore:
 
+    # How many frames up we look to find where the frame of an event
+    # and the last one we saw meet. See frame_level().
+    RESYNC_WALK = 30
+
+    # Most filenames we remember canonic() values for.
+    FILENAME_CACHE_SIZE = 1000
+
     DEFAULT_INIT_OPTS = {
         'processor'   : None,
 
@@ -45,6 +68,11 @@ class DebuggerCore:
         # A negative number indicates no eventual stopping.
         'step_ignore' : 0,
         'ignore_filter': None,  # But see debugger.py
+
+        # When we are the only trace hook, install trace_dispatch
+        # with sys.settrace() rather than going through the tracer
+        # module. See start().
+        'direct_trace': True,
         }
 
     def __init__(self, debugger, opts=None):
@@ -62,15 +90,20 @@ class DebuggerCore:
                                                         self.DEFAULT_INIT_OPTS)
 
         self.bpmgr           = breakpoint.BreakpointManager()
+        self.bpmgr.on_change = self.breakpoints_changed
         self.current_bp      = None
         self.debugger        = debugger
 
-        # Threading lock ensures that we don't have other traced threads
-        # running when we enter the debugger. Later we may want to have
-        # a switch to control.
+        # Threading lock ensures that only one traced thread at a time
+        # decides to stop and runs the event processor. Events that
+        # can't stop us are filtered without it; see trace_dispatch().
         self.debugger_lock   = threading.Lock()
+        self.thread_state    = ThreadState()
 
-        self.filename_cache  = {}
+        # canonic() values by filename and by code object. See
+        # clear_filename_caches() for when these get emptied.
+        self.filename_cache  = Mcache.LRUCache(self.FILENAME_CACHE_SIZE)
+        self.code_filename_cache = Mcache.CodeCache()
 
         # Initially the event parameter of the event hook.
         # We can however modify it, such as for breakpoints
@@ -100,14 +133,17 @@ class DebuggerCore:
 
         # If stop_level is not None, then we are next'ing or
         # finish'ing and will ignore frames greater than stop_level.
-        # We also will cache the last frame and thread number encountered
-        # so we don't have to compute the current level all the time.
-        self.last_frame      = None
-        self.last_level      = 10000
+        # The last frame and its level encountered are cached per
+        # thread in thread_state so we don't have to compute the
+        # current level all the time.
         self.last_thread     = None
         self.stop_level      = None
         self.stop_on_finish  = False
 
+        # If not None, the code object or function name that "step
+        # into" is to stop at the call of. See set_step_into().
+        self.step_into       = None
+
         self.last_lineno     = None
         self.last_filename   = None
         self.different_line  = None
@@ -118,10 +154,19 @@ class DebuggerCore:
 
         self.trace_processor = Mtrace.PrintProcessor(self)
 
+        # When not None, a TraceLog which "set trace" events go to
+        # rather than trace_processor. See set_trace_log().
+        self.trace_log       = None
+
         # What routines (keyed by f_code) will we not trace into?
         self.ignore_filter = get_option('ignore_filter')
 
+        # Whether a code object is in the ignore filter, by code
+        # object. See is_ignored_code().
+        self.ignored_codes = Mcache.CodeCache()
+
         self.search_path     = sys.path  # Source filename search path
+        self.search_path_key = tuple(self.search_path)
 
         # When trace_hook_suspend is set True, we'll suspend
         # debugging.
@@ -129,6 +174,69 @@ class DebuggerCore:
 
         self.until_condition = get_option('until_condition')
 
+        # Code objects which we've checked for line breakpoints. The
+        # value is the pair (bp lines for the file, has-a-breakpoint).
+        # See code_has_breakpoints().
+        self.code_bp_cache   = Mcache.CodeCache()
+
+        # When we decline to trace a frame on its 'call' event, we
+        # hold on to it until the next one. The tracer module records
+        # the frame to skip by its id(), and keeping the frame alive
+        # keeps that id from being reused by some other frame that
+        # *does* need tracing.
+        self.untraced_frame  = None
+
+        # The frames we declined to trace, by id(), so rearm_frames()
+        # can give those that now need one a local trace function
+        # back. Dead ones are dropped by prune_declined() when there
+        # get to be more than declined_limit of them.
+        self.declined_frames = {}
+        self.declined_limit  = 1000
+
+        # When not None, a TraceScope giving the only code we trace.
+        # See set_trace_scope().
+        self.trace_scope     = None
+
+        # The breakpoint line index and trace scope as of the last
+        # time we re-armed frames. See rearm_frames().
+        self.armed_fileindex = {}
+        self.armed_scope     = None
+
+        # How trace_dispatch() gets events: None when not started,
+        # 'direct' when installed straight into sys.settrace() and
+        # 'tracer' when chained with other hooks via the tracer module.
+        self.direct_trace    = get_option('direct_trace')
+        self.trace_mode      = None
+        self.hook_events     = frozenset()
+        self.include_threads = False
+
+        # What direct_dispatch() runs on each event: trace_dispatch()
+        # or a function made by make_dispatcher() which weeds out
+        # uninteresting events for the current settings first.
+        # dispatch_idle is set when that function can't stop us.
+        self.dispatch        = self.trace_dispatch
+        self.dispatch_idle   = False
+
+        # Functions whose code we've rewritten to call
+        # breakpoint_hook() for line breakpoints, when setting
+        # "patchbreaks" is on. See update_patched_breakpoints().
+        self.code_patcher    = Mcodepatch.CodePatcher(self.breakpoint_hook)
+
+        # (id(frame), line) of a stop on a 'line' event, so that the
+        # breakpoint hook for that line doesn't stop us again.
+        self.line_stop       = None
+
+        # Set when we've turned off trace events because only
+        # rewritten code can stop us. See detach().
+        self.detached        = False
+
+        # Lines run while setting "coverage" is on.
+        self.coverage        = Mlinecov.LineCoverage()
+
+        # Times gathered while profiling is on. See set_profiling().
+        self.profiler        = Mlineprof.TraceProfiler()
+        self.profiling       = False
+
         return
 
     def add_ignore(self, *frames_or_fns):
@@ -137,8 +245,21 @@ class DebuggerCore:
         for frame_or_fn in frames_or_fns:
             rc = self.ignore_filter.add_include(frame_or_fn)
             pass
+        self.ignored_codes.clear()
         return rc
 
+    def is_ignored_code(self, code):
+        """Return True if `code' belongs to a function in the ignore
+        filter, whose events we pass over."""
+        if not self.ignore_filter:
+            return False
+        ignored = self.ignored_codes.get(code)
+        if ignored is None:
+            ignored = code in self.ignore_filter.include_f_codes
+            self.ignored_codes[code] = ignored
+            pass
+        return ignored
+
     def canonic(self, filename):
         """ Turns `filename' into its canonic representation and returns this
         string. This allows a user to refer to a given file in one of several
@@ -177,10 +298,53 @@ class DebuggerCore:
             self.filename_cache[filename] = canonic
         return canonic
 
+    def canonic_code(self, code):
+        """Return the canonic() value of the filename of code object
+        `code'. Because this is cached by code object, we don't
+        need to look at the filename string at all the next time."""
+        filename = self.code_filename_cache.get(code)
+        if filename is None:
+            filename = self.canonic(code.co_filename)
+            self.code_filename_cache[code] = filename
+            pass
+        return filename
+
+    def clear_filename_caches(self):
+        """Forget the canonic() values we've worked out. These depend
+        on the current directory and on search_path, so call this
+        when either changes."""
+        self.filename_cache.clear()
+        self.code_filename_cache.clear()
+        self.search_path_key = tuple(self.search_path)
+        return
+
+    def check_search_path(self):
+        """Clear the filename caches if search_path has changed since
+        we last looked."""
+        if tuple(self.search_path) != self.search_path_key:
+            self.clear_filename_caches()
+            pass
+        return
+
+    def code_has_breakpoints(self, code):
+        """Return True if some enabled line breakpoint falls inside
+        code object `code'."""
+        lines = self.bpmgr.fileindex.get(self.canonic_code(code))
+        if not lines:
+            return False
+        cached = self.code_bp_cache.get(code)
+        if cached and cached[0] is lines:
+            return cached[1]
+        code_lines = Mbytecode.code_info(code).line2offsets
+        result = (code.co_firstlineno in lines or
+                  not lines.isdisjoint(code_lines))
+        self.code_bp_cache[code] = (lines, result)
+        return result
+
     def canonic_filename(self, frame):
         """Picks out the file name from `frame' and returns its
          canonic() value, a string."""
-        return self.canonic(frame.f_code.co_filename)
+        return self.canonic_code(frame.f_code)
 
     def filename(self, filename=None):
         """Return filename or the basename of that depending on the
@@ -194,11 +358,491 @@ class DebuggerCore:
             return(os.path.basename(filename))
         return filename
 
+    def is_stepping(self):
+        """Return True if we have a step, next or finish in progress
+        and therefore may stop in any frame."""
+        return self.step_ignore >= 0 or self.stop_level is not None
+
+    def is_tracing_all(self):
+        """Return True if events in any frame might stop us or print
+        something, whatever its code."""
+        settings = self.debugger.settings
+        return bool(self.until_condition or settings['trace'] or
+                    settings['coverage'] or self.profiling)
+
+    def is_tracing_needed(self, frame, event):
+        """Return True if later events in `frame' might stop us or
+        print something. If not, there is no point in getting line,
+        return or exception events for it at all.
+
+        When we are next'ing or finish'ing, frames deeper than
+        stop_level can't stop us by stepping, so just breakpoints
+        matter there."""
+        if self.is_tracing_all():
+            return True
+        if self.stop_level is not None:
+            if self.frame_level(frame, event) <= self.stop_level:
+                return True
+        elif self.step_ignore >= 0:
+            return True
+        return self.code_has_breakpoints(frame.f_code)
+
+    def decline_frame(self, frame):
+        """Note that we are not tracing `frame' and return None, the
+        trace function's return value that turns tracing off in it."""
+        declined = self.declined_frames
+        declined[id(frame)] = frame
+        self.untraced_frame = frame
+        if len(declined) > self.declined_limit:
+            self.prune_declined()
+            pass
+        return None
+
+    def prune_declined(self):
+        """Drop the frames in declined_frames that have finished
+        running. Such a frame is referenced only by that dictionary
+        and by the f_back of others in it, the frames it called,
+        which have finished too. A running frame is also referenced by
+        its caller, or its generator."""
+        declined = self.declined_frames
+        callees = {}
+        for frame in declined.itervalues():
+            caller = frame.f_back
+            if caller is not None:
+                callees[id(caller)] = callees.get(id(caller), 0) + 1
+                pass
+            pass
+        frame = caller = None
+        # Two references: the dictionary's and getrefcount()'s.
+        dead = [key for key in declined
+                if sys.getrefcount(declined[key]) - callees.get(key, 0) <= 2]
+        for key in dead:
+            del declined[key]
+            pass
+        self.declined_limit = max(1000, 2 * len(declined))
+        return
+
+    def rearm_frames(self):
+        """Called when we are about to resume execution. Frames we
+        declined to trace on their 'call' event get a local trace
+        function back if they may now need one: all of them when
+        is_tracing_all() or we are stepping, otherwise those whose code
+        has gained a breakpoint."""
+        everywhere = self.is_tracing_all() or self.is_stepping()
+        fileindex = self.bpmgr.fileindex
+        scope = self.trace_scope
+        if (not everywhere and fileindex == self.armed_fileindex and
+            scope is self.armed_scope):
+            return
+        self.armed_fileindex = dict(fileindex)
+        self.armed_scope = scope
+        local_trace = sys.gettrace()
+        if local_trace is None:
+            return
+        self.prune_declined()
+        declined = self.declined_frames
+        for key, frame in declined.items():
+            if frame.f_trace is not None:
+                del declined[key]
+            elif (scope is None or scope.contains(frame)) and \
+                    (everywhere or self.code_has_breakpoints(frame.f_code)):
+                frame.f_trace = local_trace
+                del declined[key]
+                pass
+            pass
+        # Have the tracer module stop skipping the frame we last
+        # declined, in case it is one of those above.
+        self.set_hook_entry(ignore_frameid=None)
+        self.untraced_frame = None
+        return
+
+    def set_hook_entry(self, **changes):
+        """Change fields `event_set' or `ignore_frameid' of the
+        tracer module's entry for trace_dispatch(), if it has one.
+
+        The tracer module has no call for this, so we replace the
+        Trace_entry tuple in its HOOKS list; keep that poking at its
+        internals here. Note that when the tracer module runs our
+        hook, returning None doesn't stop tracing of the frame: the
+        module just skips our hook for that one frame id, which it
+        keeps in `ignore_frameid', and still traces every other
+        frame. So declining frames saves much more when we are the
+        trace function ourselves; see start()."""
+        i = tracer.find_hook(self.trace_dispatch)
+        if i is None:
+            return
+        entry = tracer.HOOKS[i]
+        fields = {'event_set': entry.event_set,
+                  'ignore_frameid': entry.ignore_frameid}
+        fields.update(changes)
+        if (fields['event_set'] != entry.event_set or
+            fields['ignore_frameid'] != entry.ignore_frameid):
+            tracer.HOOKS[i] = tracer.Trace_entry(entry.trace_fn,
+                                                 fields['event_set'],
+                                                 fields['ignore_frameid'])
+            pass
+        return
+
+    def hook_event_set(self):
+        """Return the set of events trace_dispatch() needs to see
+        given the current settings and stepping state. We register
+        our hook with the tracer module using this set, so other
+        events never get to us."""
+        settings = self.debugger.settings
+        events = settings['events']
+        if events is None:
+            events = frozenset()
+        if (self.step_events and self.step_ignore >= 0 and
+            self.stop_level is None and not self.until_condition):
+            # Stepping can stop only on the step events. Beyond
+            # that we need what it takes to see breakpoints.
+            wanted = set(self.step_events)
+            if self.bpmgr.fileindex: wanted.add('line')
+            if self.bpmgr.fnlist: wanted.add('call')
+            events = events.intersection(wanted)
+            pass
+        if settings['trace']:
+            events = events.union(settings['printset'])
+            pass
+        if settings['coverage']:
+            events = events.union(['line'])
+            pass
+        if self.profiling:
+            events = events.union(['call', 'line', 'return'])
+            pass
+        return frozenset(events)
+
+    def update_hook_event_set(self):
+        """Change the event set that our hook is registered with, if
+        it has changed since the last time."""
+        event_set = self.hook_event_set()
+        self.hook_events = event_set
+        self.set_hook_entry(event_set=event_set)
+        return
+
+    def make_dispatcher(self):
+        """Return a function that handles trace events the way
+        trace_dispatch() does, specialized for the current settings,
+        stepping state and breakpoints. Events which can't stop us are
+        dealt with using only a few checks of values it has at hand;
+        the others are passed on to stop_dispatch().
+
+        The result is only good until one of those things changes;
+        see update_dispatch()."""
+        settings = self.debugger.settings
+        self.dispatch_idle = False
+        if ((settings['trace'] and self.trace_log is None) or
+            self.until_condition or self.is_stepping()):
+            return self.trace_dispatch
+
+        core           = self
+        bpmgr          = self.bpmgr
+        scope          = self.trace_scope
+        is_ignored     = self.is_ignored_code
+        canonic_code   = self.canonic_code
+        local_trace    = self.local_trace
+        stop_dispatch  = self.stop_dispatch
+        decline_frame  = self.decline_frame
+        events         = settings['events'] or frozenset()
+        fileindex      = bpmgr.fileindex
+        fncodes        = bpmgr.fncodes
+        fnnames        = bpmgr.fnnames
+        check_calls    = 'call' in events and bool(bpmgr.fnlist)
+        check_lines    = bool(fileindex)
+        record_line    = None
+        if settings['coverage']:
+            record_line = self.coverage.record
+            pass
+        profile_event  = None
+        if self.profiling:
+            profile_event = self.profiler.event
+            pass
+        log_event      = None
+        printset       = settings['printset']
+        if settings['trace']:
+            log_event = self.trace_log.record
+            pass
+
+        if not (check_calls or check_lines or record_line or profile_event
+                or log_event):
+            # Nothing can stop us. Don't trace into new frames.
+            self.dispatch_idle = True
+
+            def dispatch(frame, event, arg):
+                if 'call' == event:
+                    return decline_frame(frame)
+                return True
+            return dispatch
+
+        def dispatch(frame, event, arg):
+            # As in trace_dispatch(): nothing while the debugger is
+            # busy or for the code it leaves alone.
+            if core.trace_hook_suspend:
+                return None
+            if 'call' == event and scope is not None and \
+                    not scope.contains(frame):
+                return decline_frame(frame)
+            if is_ignored(frame.f_code):
+                return True
+            if record_line and 'line' == event:
+                record_line(frame)
+                pass
+            if profile_event:
+                profile_event(frame, event, arg)
+                pass
+            if log_event and event in printset:
+                log_event(frame, event)
+                pass
+            if event in events:
+                code = frame.f_code
+                if check_calls and 'call' == event and \
+                        (code in fncodes or code.co_name in fnnames):
+                    return stop_dispatch(frame, event, arg)
+                if check_lines:
+                    lines = fileindex.get(canonic_code(code))
+                    if lines and frame.f_lineno in lines:
+                        return stop_dispatch(frame, event, arg)
+                    pass
+                pass
+            return local_trace(frame, event)
+        return dispatch
+
+    def set_profiling(self, on):
+        """Start or stop giving trace events to our TraceProfiler.
+        Its data is kept either way."""
+        if not on:
+            self.profiler.forget_stacks()
+            pass
+        self.profiling = on
+        self.update_dispatch()
+        return
+
+    def set_trace_log(self, path):
+        """Have "set trace" events logged in binary to the file at
+        `path' rather than printed, or printed again if `path' is
+        None."""
+        if self.trace_log is not None:
+            self.trace_log.close()
+            pass
+        if path is None:
+            self.trace_log = None
+        else:
+            self.trace_log = Mtracelog.TraceLog(path, self.canonic_code)
+            pass
+        self.update_dispatch()
+        return
+
+    def set_trace_scope(self, scope):
+        """Trace only the code in TraceScope `scope' from now on, or
+        all code if `scope' is None. Frames running other code get no
+        local trace function, so stepping and breakpoints don't see
+        them."""
+        self.trace_scope = scope
+        self.update_dispatch()
+        return
+
+    def update_dispatch(self, frame=None):
+        """Bring event handling up to date after a change in settings,
+        stepping state or breakpoints: the events our hook is
+        registered for and the dispatch function direct_dispatch()
+        uses. Until we are started there is nothing to do.
+
+        If we had detached and now need trace events, `frame' and its
+        callers get traced again. It defaults to the first frame up
+        the stack not running code of this module."""
+        if self.trace_mode is None:
+            return
+        self.dispatch = self.make_dispatcher()
+        self.update_hook_event_set()
+        if self.detached and not self.dispatch_idle:
+            if frame is None:
+                here  = sys._getframe(0).f_code.co_filename
+                frame = sys._getframe(1)
+                while frame is not None and frame.f_code.co_filename == here:
+                    frame = frame.f_back
+                    pass
+                pass
+            self.attach(frame)
+            pass
+        return
+
+    def resume(self, frame):
+        """Get ready to run again after the event processor is done
+        with a stop at `frame'."""
+        self.check_search_path()
+        self.update_dispatch(frame)
+        self.rearm_frames()
+        if (self.dispatch_idle and 'direct' == self.trace_mode and
+            not self.detached and self.debugger.settings['patchbreaks']):
+            self.detach()
+            pass
+        return
+
+    def detach(self):
+        """Have Python stop giving us trace events, since nothing but
+        breakpoints patched into code can stop us. The program then
+        runs at full speed. See attach()."""
+        sys.settrace(None)
+        if self.include_threads:
+            threading.settrace(None)
+            pass
+        self.detached = True
+        return
+
+    def attach(self, frame):
+        """Undo detach(): trace `frame', its callers and the frames
+        they create from now on."""
+        self.detached = False
+        self.set_frames_trace(frame, 0)
+        if self.include_threads:
+            threading.settrace(self.direct_dispatch)
+            pass
+        sys.settrace(self.direct_dispatch)
+        return
+
+    def breakpoints_changed(self):
+        """Called when breakpoints are added, deleted, enabled or
+        disabled, or setting "patchbreaks" changes."""
+        self.update_patched_breakpoints()
+        self.update_dispatch()
+        return
+
+    def running_codes(self):
+        """Return the set of code objects being run in some frame."""
+        codes = set()
+        for frame in sys._current_frames().values():
+            while frame is not None:
+                codes.add(frame.f_code)
+                frame = frame.f_back
+                pass
+            pass
+        return codes
+
+    def update_patched_breakpoints(self):
+        """When setting "patchbreaks" is on and we are started, rewrite
+        the functions with enabled line breakpoints to call
+        breakpoint_hook() at those lines, and put back the original
+        code of the others.
+
+        A breakpoint which is patched in needs no trace events. It
+        still gets them unless all the code that can run its line has
+        been rewritten. So it does if no function can be rewritten for
+        it, if the function has a function breakpoint too, or if a
+        frame may be running the function's old code: a frame we see
+        on some thread's stack, or that of a suspended generator. It
+        does too if the line is in code nested in a function, as
+        that function can make new functions from the original code
+        at any time."""
+        bpmgr   = self.bpmgr
+        patcher = self.code_patcher
+        wanted  = {}     # function -> lines to rewrite it for
+        patched = set()  # (filename, line) of breakpoints patched in
+        if self.trace_mode is not None and \
+                self.debugger.settings.get('patchbreaks'):
+            locations = [location for location, bps in bpmgr.bplist.items()
+                         if [bp for bp in bps
+                             if bp.enabled and not bp.funcname]]
+            funcs_by_file = Mcodepatch.functions_in_files(
+                set([filename for filename, line in locations]),
+                self.canonic_code)
+            running = self.running_codes()
+
+            # Code new functions can be made from: that nested in
+            # functions and in running code other than a module's.
+            parents = [patcher.original_code(func)
+                       for funcs in funcs_by_file.values() for func in funcs]
+            parents += [code for code in running
+                        if code.co_flags & inspect.CO_NEWLOCALS]
+            nested = {}  # filename -> nested code objects in it
+            for code in Mcodepatch.nested_codes(parents):
+                nested.setdefault(self.canonic_code(code), []).append(code)
+                pass
+
+            for filename, line in locations:
+                funcs = [func for func in funcs_by_file[filename]
+                         if Mbytecode.offsets_for_line(
+                             patcher.original_code(func), line)]
+                for func in funcs:
+                    wanted.setdefault(func, set()).add(line)
+                    pass
+                codes = set([patcher.original_code(func) for func in funcs])
+                if codes and codes.isdisjoint(running) and \
+                        codes.isdisjoint(bpmgr.fncodes) and \
+                        not [code for code in codes
+                             if code.co_flags & inspect.CO_GENERATOR] and \
+                        not [code for code in nested.get(filename, [])
+                             if Mbytecode.offsets_for_line(code, line)]:
+                    patched.add((filename, line))
+                    pass
+                pass
+            pass
+        for func in set(patcher.lines.keys()) | set(wanted.keys()):
+            lines = wanted.get(func, ())
+            if not patcher.set_lines(func, lines):
+                # Those lines have to make do with trace events.
+                filename = self.canonic_code(func.func_code)
+                for line in lines:
+                    patched.discard((filename, line))
+                    pass
+                pass
+            pass
+        bpmgr.set_patched(patched)
+        return
+
+    def breakpoint_hook(self):
+        """Called from the code of functions rewritten for line
+        breakpoints, at the start of those lines."""
+        if self.trace_hook_suspend or self.trace_mode is None:
+            return
+        frame = sys._getframe(1)
+        if (id(frame), frame.f_lineno) == self.line_stop:
+            # We stopped for this line on its 'line' event already.
+            self.line_stop = None
+            return
+        filename = self.canonic_code(frame.f_code)
+        if (filename, frame.f_lineno) not in self.bpmgr.bplist:
+            return
+        try:
+            self.debugger_lock.acquire()
+            if self.trace_hook_suspend:
+                return
+            self.trace_hook_suspend = True
+            (bp, clear_bp) = self.bpmgr.find_bp(filename, frame.f_lineno,
+                                                frame)
+            if not bp:
+                return
+            self.current_bp = bp
+            if clear_bp and bp.temporary:
+                msg = 'temporary '
+                self.bpmgr.delete_breakpoint(bp)
+            else:
+                msg = ''
+                pass
+            self.stop_reason = ("at %sline breakpoint %d" %
+                                (msg, bp.number))
+            self.event       = 'brkpt'
+            self.step_into   = None
+            self.line_stop   = None
+            self.profiler.pause()
+            self.processor.event_processor(frame, self.event, None)
+            self.profiler.resume()
+            self.resume(frame)
+        finally:
+            self.trace_hook_suspend = False
+            try:
+                self.debugger_lock.release()
+            except:
+                pass
+            pass
+        return
+
     def is_running(self):
         return 'Running' == self.execution_status
 
     def is_started(self):
         '''Return True if debugging is in progress.'''
+        if 'direct' == self.trace_mode:
+            return not self.trace_hook_suspend
         return (tracer.is_started() and
                 not self.trace_hook_suspend
                 and tracer.find_hook(self.trace_dispatch))
@@ -206,6 +850,7 @@ class DebuggerCore:
     def remove_ignore(self, frame_or_fn):
         """Remove `frame_or_fn' to the list of functions that are not to
         be debugged"""
+        self.ignored_codes.clear()
         return self.ignore_filter.remove_include(frame_or_fn)
 
     def start(self, opts=None):
@@ -224,20 +869,51 @@ class DebuggerCore:
             get_option = lambda key: Mmisc.option_set(opts, key,
                                                       default.START_OPTS)
 
-            add_hook_opts = get_option('add_hook_opts')
+            self.dispatch    = self.make_dispatcher()
+            self.hook_events = self.hook_event_set()
+            add_hook_opts = dict(get_option('add_hook_opts'))
+            add_hook_opts['event_set'] = self.hook_events
+            self.include_threads = get_option('include_threads')
+
+            # Another debugger tracing directly has to make room for us.
+            other = getattr(sys.gettrace(), 'im_self', None)
+            if (isinstance(other, DebuggerCore) and other is not self and
+                'direct' == other.trace_mode):
+                other.chain_to_tracer()
+                pass
 
+            if 'direct' == self.trace_mode:
+                pass
+            elif (self.direct_trace and not tracer.HOOKS and
+                  not tracer.is_started() and sys.gettrace() is None):
+                # We are the only hook, so skip the tracer module's
+                # multiplexing and have Python call us directly.
+                self.trace_mode = 'direct'
+                self.set_frames_trace(sys._getframe(1),
+                                      get_option('backlevel'))
+                if self.include_threads:
+                    threading.settrace(self.direct_dispatch)
+                    pass
+                sys.settrace(self.direct_dispatch)
             # Has tracer been started?
-            if not tracer.is_started():
+            elif not tracer.is_started():
                 # FIXME: should filter out opts not for tracer
                 # Also, if we ouse opts.copy we need to check for 'None'.
                 tracer_start_opts = default.START_OPTS.copy()
                 tracer_start_opts['trace_fn'] = self.trace_dispatch
                 tracer_start_opts['add_hook_opts'] = add_hook_opts
+                tracer_start_opts['include_threads'] = self.include_threads
                 tracer.start(tracer_start_opts)
             elif get_option('force') \
                     and not tracer.find_hook(self.trace_dispatch):
                 tracer.add_hook(self.trace_dispatch, add_hook_opts)
                 pass
+            if (self.trace_mode is None and
+                tracer.find_hook(self.trace_dispatch) is not None):
+                self.trace_mode = 'tracer'
+                pass
+            self.update_patched_breakpoints()
+            self.update_dispatch()
             self.execution_status = 'Running'
         finally:
             self.trace_hook_suspend = False
@@ -255,41 +931,110 @@ class DebuggerCore:
             if remove:
                 args.append(remove)
                 pass
-            if tracer.is_started():
+            if 'direct' == self.trace_mode:
+                sys.settrace(None)
+                if self.include_threads:
+                    threading.settrace(None)
+                    pass
+                self.trace_mode = None
+                self.detached   = False
+            elif tracer.is_started():
                 try:
                     tracer.remove_hook(*args)
                 except LookupError:
                     pass
+                self.trace_mode = None
                 pass
+            self.update_patched_breakpoints()
         finally:
             self.trace_hook_suspend = False
         return
 
-    def is_break_here(self, frame, arg):
-        filename = self.canonic(frame.f_code.co_filename)
-        if 'call' == self.event:
-            find_name  = frame.f_code.co_name
-            # Could check code object or decide not to
-            # The below could be done as a list comprehension, but
-            # I'm feeling in Fortran mood right now.
-            for fn in self.bpmgr.fnlist:
-                if fn.func_name == find_name:
-                    self.current_bp = bp = self.bpmgr.fnlist[fn][0]
-                    if bp.temporary:
-                        msg = 'temporary '
-                        self.bpmgr.delete_breakpoint(bp)
-                    else:
-                        msg = ''
-                        pass
-                    self.stop_reason = ("at %scall breakpoint %d" %
-                                        (msg, bp.number))
-                    self.event = 'brkpt'
-                    return True
+    def set_frames_trace(self, frame, backlevel):
+        """Like the tracer module's add_hook(): have `frame' and the
+        frames that called it trace with direct_dispatch() after
+        skipping `backlevel' of them. None for `backlevel' means
+        trace none of them."""
+        if backlevel is None:
+            return
+        while frame is not None and backlevel > 0:
+            backlevel -= 1
+            frame = frame.f_back
+            pass
+        while frame is not None:
+            frame.f_trace = self.direct_dispatch
+            frame = frame.f_back
+            pass
+        return
+
+    def chain_to_tracer(self):
+        """Switch from calling trace_dispatch() directly out of
+        sys.settrace() to going through the tracer module, because
+        another trace hook has shown up. Frames that were
+        tracing with direct_dispatch() get tracer's function instead."""
+        self.trace_mode = 'tracer'
+        add_hook_opts = {'position': 0, 'backlevel': None,
+                         'event_set': self.hook_events}
+        if tracer.find_hook(self.trace_dispatch) is None:
+            tracer.add_hook(self.trace_dispatch, add_hook_opts)
+            pass
+        for frame in sys._current_frames().values():
+            while frame is not None:
+                if frame.f_trace == self.direct_dispatch:
+                    frame.f_trace = tracer._tracer_func
+                    pass
+                frame = frame.f_back
+                pass
+            pass
+        if not tracer.is_started():
+            tracer.start({'include_threads': self.include_threads})
+        elif self.include_threads:
+            threading.settrace(tracer._tracer_func)
+            pass
+        return
+
+    def direct_dispatch(self, frame, event, arg):
+        """The trace function given to sys.settrace() when we are the
+        only hook: it filters events the way the tracer module would
+        and calls trace_dispatch(). When a hook is added to the tracer
+        module, we hand over to it."""
+        if tracer.HOOKS or 'direct' != self.trace_mode:
+            if 'direct' == self.trace_mode:
+                self.chain_to_tracer()
                 pass
+            if 'tracer' == self.trace_mode:
+                return tracer._tracer_func(frame, event, arg)
+            return None
+        if event in self.hook_events:
+            if not self.dispatch(frame, event, arg):
+                return None
             pass
-        if (filename, frame.f_lineno) in list(self.bpmgr.bplist.keys()):
+        return self.direct_dispatch
+
+    def is_break_here(self, frame, arg):
+        if 'call' == self.event and self.bpmgr.fnlist:
+            (bp, clear_bp) = self.bpmgr.find_fn_bp(frame)
+            if bp:
+                self.current_bp = bp
+                if clear_bp and bp.temporary:
+                    msg = 'temporary '
+                    self.bpmgr.delete_breakpoint(bp)
+                else:
+                    msg = ''
+                    pass
+                self.stop_reason = ("at %scall breakpoint %d" %
+                                    (msg, bp.number))
+                self.event = 'brkpt'
+                return True
+            pass
+        if not self.bpmgr.fileindex:
+            # No enabled line breakpoints anywhere.
+            return False
+        filename = self.canonic_code(frame.f_code)
+        lines = self.bpmgr.fileindex.get(filename)
+        if lines and frame.f_lineno in lines:
             (bp, clear_bp) = self.bpmgr.find_bp(filename, frame.f_lineno,
-                                                frame)
+                                                frame, 'line' == self.event)
             if bp:
                 self.current_bp = bp
                 if (clear_bp and bp.temporary):
@@ -312,7 +1057,8 @@ class DebuggerCore:
         # Ignore count applies only to those bpt hits where the
         # condition evaluates to true.
         try:
-            val = eval(self.until_condition, frame.f_globals, frame.f_locals)
+            val = eval(Meval.compile_cached(self.until_condition),
+                       frame.f_globals, frame.f_locals)
         except:
             # if eval fails, most conservative thing is to
             # stop on breakpoint regardless of ignore count.
@@ -334,6 +1080,16 @@ class DebuggerCore:
         # FIXME TODO: Check for
         #  - thread switching (under set option)
 
+        # Check for "step into" reaching its function. Calls of other
+        # functions are weeded out by the stop_level check below.
+        if self.step_into is not None and 'call' == event:
+            code = frame.f_code
+            if code is self.step_into or code.co_name == self.step_into:
+                self.stop_level  = None
+                self.stop_reason = 'at call of %s()' % code.co_name
+                return True
+            pass
+
         # Check for "next" and "finish" stopping via stop_level
 
         # Do we want a different line and if so,
@@ -348,14 +1104,10 @@ class DebuggerCore:
         self.last_filename = filename
 
         if self.stop_level is not None:
-            if frame != self.last_frame:
-                # Recompute stack_depth
-                self.last_level = Mstack.count_frames(frame)
-                self.last_frame = frame
-                pass
-            if self.last_level > self.stop_level:
+            level = self.frame_level(frame, event)
+            if level > self.stop_level:
                 return False
-            elif self.last_level == self.stop_level and \
+            elif level == self.stop_level and \
                     self.stop_on_finish and event in ['return', 'c_return']:
                 self.stop_level = None
                 self.stop_reason = "in return for 'finish' command"
@@ -369,6 +1121,61 @@ class DebuggerCore:
 
         return False
 
+    def frame_level(self, frame, event=None):
+        """Return the stack depth of `frame', the same value as
+        stack.count_frames() gives, updating this thread's last_frame
+        and last_level. Rather than walk the whole stack each time, we
+        work it out from the last frame seen: usually `frame' was
+        called from it or we have returned to its caller. Otherwise
+        the two are resynchronized through a frame nearby that they
+        were both called from."""
+        state = self.thread_state
+        last_frame = state.last_frame
+        if frame is last_frame:
+            return state.last_level
+        if last_frame is None:
+            state.last_level = Mstack.count_frames(frame)
+        elif 'call' == event and frame.f_back is last_frame:
+            state.last_level += 1
+        elif frame is last_frame.f_back:
+            state.last_level -= 1
+        else:
+            level = self._resync_level(frame, last_frame, state.last_level)
+            if level is None:
+                level = Mstack.count_frames(frame)
+                pass
+            state.last_level = level
+            pass
+        state.last_frame = frame
+        return state.last_level
+
+    def _resync_level(self, frame, last_frame, last_level):
+        """Return the stack depth of `frame' given that `last_frame' is
+        at depth `last_level', looking for a frame that both were
+        called from no more than RESYNC_WALK frames back. If there is
+        none, return None.
+
+        Frames in the f_back chain of `last_frame' are kept alive by
+        it, so comparing them by id() with the frames above `frame' is
+        safe."""
+        distance = {}
+        f = frame
+        for n in range(self.RESYNC_WALK):
+            if f is None:
+                break
+            distance[id(f)] = n
+            f = f.f_back
+            pass
+        f = last_frame
+        for n in range(self.RESYNC_WALK):
+            if f is None:
+                break
+            if id(f) in distance:
+                return last_level - n + distance[id(f)]
+            f = f.f_back
+            pass
+        return None
+
     def _is_step_next_stop(self, event):
         if self.step_events and event not in self.step_events:
             return False
@@ -382,53 +1189,127 @@ class DebuggerCore:
     def set_next(self, frame, step_ignore=0, step_events=None):
         "Sets to stop on the next event that happens in frame 'frame'."
         self.step_events      = None  # Consider all events
-        self.stop_level       = Mstack.count_frames(frame)
-        self.last_frame       = frame
+        self.stop_level       = self.frame_level(frame)
         self.stop_on_finish   = False
         self.step_ignore      = step_ignore
+        self.step_into        = None
+        self.update_dispatch()
+        return
+
+    def set_step_into(self, frame, target):
+        """Sets to stop on entry to the function given by `target',
+        either a code object or a function name. Until then frames
+        other calls create aren't traced. If the function isn't called
+        we stop as for set_next() on `frame'."""
+        self.set_next(frame)
+        self.step_into = target
         return
 
+    def local_trace(self, frame, event):
+        """Return value for trace_dispatch() when we are not
+        stopping. On a 'call' event for a frame that we have no
+        reason to trace, None turns off tracing in that frame; see
+        rearm_frames() for how it gets turned back on."""
+        if 'call' == event and not self.is_tracing_needed(frame, event):
+            return self.decline_frame(frame)
+        return True
+
+    def may_stop_here(self, frame, event):
+        """A quick check of whether `event' in `frame' might stop us,
+        so that trace_dispatch() has to go on to is_stop_here() and
+        is_break_here(). This changes no state, so it can be run
+        without the debugger lock. It errs only on the side of
+        True."""
+        if self.is_stepping():
+            return True
+        bpmgr = self.bpmgr
+        code = frame.f_code
+        if 'call' == event and bpmgr.fnlist:
+            if code in bpmgr.fncodes or code.co_name in bpmgr.fnnames:
+                return True
+            pass
+        if not bpmgr.fileindex:
+            return False
+        lines = bpmgr.fileindex.get(self.canonic_code(code))
+        return bool(lines) and frame.f_lineno in lines
+
     def trace_dispatch(self, frame, event, arg):
         '''A trace event occurred. Filter or pass the information to a
         specialized event processor. Note that there may be more filtering
         that goes on in the command processor (e.g. to force a
         different line). We could put that here, but since that seems
-        processor-specific I think it best to distribute the checks.'''
+        processor-specific I think it best to distribute the checks.
+
+        Filtering is done without the debugger lock, so traced threads
+        don't contend for it as they run. Only when an event may stop
+        us do we take the lock, and then only one thread at a time
+        decides whether to stop and runs the event processor.'''
+
+        if self.trace_hook_suspend:
+            return None
+
+        if self.trace_scope is not None and \
+                not self.trace_scope.contains(frame):
+            # Not code we are interested in: stop tracing the frame.
+            return self.decline_frame(frame)
+
+        # FIXME: Understand what's going on here better.
+        # When None gets returned, the frame's f_trace seems to get set
+        # to None. Somehow this is changing other frames when get passed
+        # to this routine which also have their f_trace set to None.
+        # This will disallow a command like "jump" from working properly,
+        # which will give a cryptic the message on setting f_lineno:
+        #   f_lineno can only be set by a trace function
+        if self.is_ignored_code(frame.f_code):
+            return True
+
+        if 'line' == event and self.debugger.settings['coverage']:
+            self.coverage.record(frame)
+            pass
+        if self.profiling:
+            self.profiler.event(frame, event, arg)
+            pass
+
+        if self.debugger.settings['trace']:
+            print_event_set = self.debugger.settings['printset']
+            if event not in print_event_set:
+                pass
+            elif self.trace_log is not None:
+                self.trace_log.record(frame, event)
+            else:
+                self.trace_processor.event_processor(frame, event, arg)
+                pass
+            pass
+        return self.stop_dispatch(frame, event, arg)
+
+    def stop_dispatch(self, frame, event, arg):
+        """The rest of trace_dispatch(), once `event' has been
+        recorded for coverage, the profiler and the trace log: see
+        whether we stop, and if so run the event processor. The
+        dispatcher from make_dispatcher() records the events it passes
+        on itself, so it calls this rather than trace_dispatch()."""
+        if self.until_condition:
+            if not self.matches_condition(frame): return True
+            pass
+
+        trace_event_set = self.debugger.settings['events']
+        if trace_event_set is None or event not in trace_event_set:
+            return self.local_trace(frame, event)
+
+        if not self.may_stop_here(frame, event):
+            return self.local_trace(frame, event)
 
         # For now we only allow one instance in a process
         # In Python 2.6 and beyond one can use "with threading.Lock():"
         try:
             self.debugger_lock.acquire()
 
+            # We may have waited on another thread stopped in the
+            # debugger, which could have turned us off.
             if self.trace_hook_suspend:
                 return None
 
             self.event = event
-            # FIXME: Understand what's going on here better.
-            # When None gets returned, the frame's f_trace seems to get set
-            # to None. Somehow this is changing other frames when get passed
-            # to this routine which also have their f_trace set to None.
-            # This will disallow a command like "jump" from working properly,
-            # which will give a cryptic the message on setting f_lineno:
-            #   f_lineno can only be set by a trace function
-            if self.ignore_filter and self.ignore_filter.is_included(frame):
-                return True
-
-            if self.debugger.settings['trace']:
-                print_event_set = self.debugger.settings['printset']
-                if self.event in print_event_set:
-                    self.trace_processor.event_processor(frame,
-                                                         self.event, arg)
-                    pass
-                pass
-
-            if self.until_condition:
-                if not self.matches_condition(frame): return True
-                pass
-
-            trace_event_set = self.debugger.settings['events']
-            if trace_event_set is None or self.event not in trace_event_set:
-                return True
 
             # I think we *have* to run is_stop_here() before
             # is_break_here() because is_stop_here() sets various
@@ -439,8 +1320,18 @@ class DebuggerCore:
             if ( self.is_stop_here(frame, event, arg) or
                  self.is_break_here(frame, arg) ):
                 # Run the event processor
-                return self.processor.event_processor(frame, self.event, arg)
-            return True
+                self.step_into = None
+                if 'line' == event:
+                    self.line_stop = (id(frame), frame.f_lineno)
+                else:
+                    self.line_stop = None
+                    pass
+                self.profiler.pause()
+                rc = self.processor.event_processor(frame, self.event, arg)
+                self.profiler.resume()
+                self.resume(frame)
+                return rc
+            return self.local_trace(frame, event)
         finally:
             try:
                 self.debugger_lock.release()
@@ -450,6 +1341,9 @@ class DebuggerCore:
         pass
     pass
 
+Mthread.hook_codes.add(DebuggerCore.direct_dispatch.im_func.func_code)
+Mthread.hook_codes.add(DebuggerCore.breakpoint_hook.im_func.func_code)
+
 # Demo it
 if __name__=='__main__':
     class MockProcessor:
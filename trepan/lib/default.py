@@ -66,6 +66,10 @@ DEBUGGER_SETTINGS = {
     # confirm potentially dangerous operations?
     'confirm'       : True,
 
+    # Record the lines run, for "info coverage"? See module
+    # trepan.lib.linecov.
+    'coverage'      : False,
+
     # Debug macros?
     'debugmacro'    : False,
 
@@ -94,6 +98,9 @@ DEBUGGER_SETTINGS = {
     # Show function calls/returns?
     'fntrace'       : False,
 
+    # Show the hits and times of "profile trace" in 'list' output?
+    'listprofile'   : False,
+
     # Number of lines to show by default in a 'list' command.
     'listsize'      : 10,
 
@@ -103,6 +110,11 @@ DEBUGGER_SETTINGS = {
     # max length to in other strings
     'maxstring'     : 150,
 
+    # Handle line breakpoints in functions by rewriting the
+    # function's code to call the debugger rather than by trace
+    # events? See module trepan.lib.codepatch.
+    'patchbreaks'   : False,
+
     # printset is a set of events to print line-, call-, or return-like
     # tracing. See tracer.ALL_EVENT_NAMES and ALL_EVENTS. This only
     # has an effect if trace is set True.
@@ -118,6 +130,10 @@ DEBUGGER_SETTINGS = {
     # Stop at 'def' and 'class' statements?
     'skip'          : True,
 
+    # Number of entries a 'backtrace' command shows at a time; 0 for
+    # all of them.
+    'stacksize'     : 0,
+
     # print trace output?
     'trace'         : False,
 
@@ -143,6 +159,7 @@ START_OPTS = {
     'backlevel'     : 0,      # trace caller and frames created from that
     'event_set'     : tracer.ALL_EVENTS,
     'force'         : False,  # Force a new event handler?
+    'include_threads': False, # Trace threads started from now on?
     'start'         : False,
     }
 
@@ -3,11 +3,11 @@
 '''Disassembly Routines'''
 
 import inspect, sys, struct, time, types, marshal
-from dis import distb, findlabels, findlinestarts
+from dis import distb, findlabels
 from opcode import cmp_op, hasconst, hascompare, hasfree, hasname, hasjrel, \
     haslocal, opname, EXTENDED_ARG, HAVE_ARGUMENT
 
-from trepan.lib import format as Mformat
+from trepan.lib import bytecode as Mbytecode, format as Mformat
 format_token = Mformat.format_token
 
 _have_code = (types.MethodType, types.FunctionType, types.CodeType, type)
@@ -91,11 +91,12 @@ def dis(msg, msg_nocr, section, errmsg, x=None, start_line=-1, end_line=None,
 def disassemble(msg, msg_nocr, section, co, lasti=-1, start_line=-1,
                 end_line=None, relative_pos=False, color='light'):
     """Disassemble a code object."""
+    info = Mbytecode.code_info(co)
     disassemble_bytes(msg, msg_nocr, co.co_code, lasti, co.co_firstlineno,
                       start_line, end_line, relative_pos,
                       co.co_varnames, co.co_names, co.co_consts,
                       co.co_cellvars, co.co_freevars,
-                      dict(findlinestarts(co)), color)
+                      info.offset2line, color, info.labels())
     return
 
 
@@ -108,16 +109,20 @@ def disassemble_string(source):
 def disassemble_bytes(orig_msg, orig_msg_nocr, code, lasti=-1, cur_line=0,
                       start_line=-1, end_line=None, relative_pos=False,
                       varnames=(), names=(), consts=(), cellvars=(),
-                      freevars=(), linestarts={}, color='light'):
+                      freevars=(), linestarts={}, color='light',
+                      labels=None):
     """Disassemble byte string of code. If end_line is negative
-    it counts the number of statement linestarts to use."""
+    it counts the number of statement linestarts to use. `labels'
+    are the jump targets in `code', found if not given."""
     statement_count = 10000
     if end_line is None:
         end_line = 10000
     elif relative_pos:
         end_line += start_line -1
         pass
-    labels = findlabels(code)
+    if labels is None:
+        labels = findlabels(code)
+        pass
     n = len(code)
     i = 0
     extended_arg = 0
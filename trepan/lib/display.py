@@ -19,7 +19,7 @@
 """Classes to support gdb-like display/undisplay."""
 
 # Our local modules
-from trepan.lib import stack as Mstack
+from trepan.lib import eval as Meval, stack as Mstack
 
 
 def signature(frame):
@@ -40,7 +40,7 @@ class DisplayMgr:
         if not frame:
             return None
         try:
-            eval(arg, frame.f_globals, frame.f_locals)
+            eval(Meval.compile_cached(arg), frame.f_globals, frame.f_locals)
         except:
             return None
         self.next += 1
@@ -109,7 +109,8 @@ class Display:
         if not frame:
             return 'No symbol "' + self.arg + '" in current context.'
         try:
-            val = eval(self.arg, frame.f_globals, frame.f_locals)
+            val = eval(Meval.compile_cached(self.arg),
+                       frame.f_globals, frame.f_locals)
         except:
             return 'No symbol "' + self.arg + '" in current context.'
         s = "%3d: %s" % (self.number,
@@ -17,7 +17,9 @@
 
 # extract the "expression" part of a line of source code.
 #
-import re
+import re, sys
+
+from trepan.lib import cache as Mcache
 
 
 def extract_expression(text):
@@ -37,6 +39,41 @@ def extract_expression(text):
     return text
 
 
+# Compiled code objects for expressions we evaluate over and over:
+# breakpoint and until conditions and display expressions. The key is
+# the triple (source, mode, filename).
+compiled_cache = Mcache.LRUCache(500)
+
+
+def compile_cached(source, mode='eval', filename='<string>'):
+    """Return the code object for `source' compiled in `mode',
+    compiling it only the first time we see it. Like the built-in
+    eval(), leading blanks are ignored for an 'eval' expression.
+    SyntaxError is raised if `source' doesn't compile."""
+    key = (source, mode, filename)
+    code = compiled_cache.get(key)
+    if code is None:
+        if 'eval' == mode:
+            code = compile(source.lstrip(' \t'), filename, mode)
+        else:
+            code = compile(source, filename, mode)
+            pass
+        compiled_cache[key] = code
+        pass
+    return code
+
+
+def syntax_error_msg(source, mode='eval'):
+    """Return None if `source' compiles. Otherwise return a message
+    describing the syntax error."""
+    try:
+        compile_cached(source, mode)
+    except SyntaxError:
+        e = sys.exc_info()[1]
+        return 'Syntax error in "%s": %s' % (source, e.msg)
+    return None
+
+
 # Demo it
 if __name__=='__main__':
     for stmt in (
@@ -47,4 +84,6 @@ if __name__=='__main__':
         'nothing_to_be.done'):
         print(extract_expression(stmt))
         pass
+    print(eval(compile_cached('1+2')))
+    print(syntax_error_msg('1+'))
     pass
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Line coverage gathered from the 'line' events the debugger sees
+anyway, so that a debugging run can say which lines it ran without a
+second tracing pass.
+
+For each code object there is a bytearray with an element per line
+from co_firstlineno on, set to 1 once that line has been run.
+Recording a line allocates nothing beyond the first time its code
+is seen."""
+
+import json, pyficache
+
+from trepan.lib import bytecode as Mbytecode
+
+
+def line_span(code):
+    """Return the number of source lines `code' covers, from
+    co_firstlineno to its last line start."""
+    last = code.co_firstlineno
+    for offset, line in Mbytecode.code_info(code).linestarts:
+        if line > last: last = line
+        pass
+    return last - code.co_firstlineno + 1
+
+
+class LineCoverage:
+    """The lines run in each code object we've been told about by
+    record()."""
+
+    def __init__(self):
+        self.clear()
+        return
+
+    def clear(self):
+        self.bitmaps = {}   # code object -> bytearray of lines run
+        return
+
+    def record(self, frame):
+        """Note that the line `frame' is at has been run."""
+        code = frame.f_code
+        bits = self.bitmaps.get(code)
+        if bits is None:
+            # Another thread may be adding the same code object; only
+            # one of the bytearrays is kept, and we use that one.
+            bits = self.bitmaps.setdefault(code, bytearray(line_span(code)))
+            pass
+        bits[frame.f_lineno - code.co_firstlineno] = 1
+        return
+
+    def lines_by_file(self, canonic_code):
+        """Return a dictionary from filename to the set of lines run
+        in it. `canonic_code' gives the filename of a code object."""
+        result = {}
+        for code, bits in self.bitmaps.items():
+            lines = result.setdefault(canonic_code(code), set())
+            first = code.co_firstlineno
+            for i in range(len(bits)):
+                if bits[i]: lines.add(first + i)
+                pass
+            pass
+        return result
+
+    def save(self, path, canonic_code):
+        """Write the lines run in each file to `path' as a JSON
+        object mapping filenames to sorted lists of line numbers."""
+        data = dict([(filename, sorted(lines)) for filename, lines in
+                     self.lines_by_file(canonic_code).items()])
+        f = open(path, 'w')
+        try:
+            json.dump(data, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+            pass
+        return
+    pass
+
+
+def missed_lines(filename, lines_run):
+    """Return the sorted list of lines of `filename' where a 'line'
+    event can happen but which aren't in `lines_run', or None if we
+    can't tell which lines those are."""
+    possible = pyficache.trace_line_numbers(filename)
+    if not possible:
+        return None
+    return sorted(set(possible) - set(lines_run))
+
+# Demo it
+if __name__=='__main__':
+    import os, sys
+
+    def fn(x):
+        if x:
+            return 1
+        return 2
+    cov = LineCoverage()
+
+    def tracer(frame, event, arg):
+        if 'line' == event: cov.record(frame)
+        return tracer
+    sys.settrace(tracer)
+    fn(True)
+    sys.settrace(None)
+    canonic = lambda code: os.path.realpath(code.co_filename)
+    for filename, lines in cov.lines_by_file(canonic).items():
+        print(filename, sorted(lines))
+        print('missed: %s' % missed_lines(filename, lines))
+        pass
+    pass
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""A deterministic profiler, timing functions and lines from the
+trace events the debugger gets. See also the "profile trace"
+command.
+
+For each code object there are arrays of hit counts and times with
+an element per line from co_firstlineno on, and counts and times
+for the function as a whole. Handling an event then updates array
+elements and a few attributes rather than building tuples or dict
+entries. The time of a line runs from its 'line' event to the next
+event in its frame, so it includes the time of any calls it makes.
+
+Trace events come in without the debugger lock, so each thread has
+its own stack and CodeTimes, and handling an event takes no lock.
+The threads' CodeTimes are added up when they are read.
+
+The data can be saved in the format the pstats module reads."""
+
+import marshal, thread, timeit
+from array import array
+
+from trepan.lib import linecov as Mlinecov
+
+
+class CodeTimes:
+    """Counts and times for a code object."""
+
+    def __init__(self, code):
+        span = Mlinecov.line_span(code)
+        self.code       = code
+        self.first      = code.co_firstlineno
+        self.hits       = array('l', [0]) * span
+        self.times      = array('d', [0.0]) * span
+        self.calls      = 0    # all calls
+        self.primitive  = 0    # calls not made from within itself
+        self.own        = 0.0  # time not spent in functions it calls
+        self.cumulative = 0.0  # time in primitive calls, all told
+        self.active     = 0    # frames of it on the stacks
+        self.callers    = {}   # caller code object -> calls
+        return
+
+    def add(self, other):
+        """Add in the counts and times of `other', the CodeTimes of
+        the same code object in another thread."""
+        for i in range(len(self.hits)):
+            self.hits[i]  += other.hits[i]
+            self.times[i] += other.times[i]
+            pass
+        self.calls      += other.calls
+        self.primitive  += other.primitive
+        self.own        += other.own
+        self.cumulative += other.cumulative
+        self.active     += other.active
+        for caller, calls in other.callers.items():
+            self.callers[caller] = self.callers.get(caller, 0) + calls
+            pass
+        return
+
+    def lines(self):
+        """Return a list of (line, hits, time) for the lines run."""
+        return [(self.first + i, self.hits[i], self.times[i])
+                for i in range(len(self.hits)) if self.hits[i]]
+    pass
+
+# Indices of the lists we keep for each frame on a thread's stack.
+FRAME, TIMES, START, CHILD, LINE, LINE_START = range(6)
+
+
+class TraceProfiler:
+    """Gathers times from the trace events passed to event()."""
+
+    def __init__(self, timer=timeit.default_timer):
+        self.timer = timer
+        self.clear()
+        return
+
+    def clear(self):
+        self.tables = {}   # thread id -> {code object -> CodeTimes}
+        self.stacks = {}   # thread id -> list of frame entries
+        # Time each thread spent stopped in the debugger, left out
+        # of its times. Other threads may run on meanwhile.
+        self.paused      = {}   # thread id -> total time stopped
+        self.pause_start = {}   # thread id -> when it stopped
+        return
+
+    def code_times(self, table, code):
+        times = table.get(code)
+        if times is None:
+            times = table[code] = CodeTimes(code)
+            pass
+        return times
+
+    def times_by_code(self):
+        """Return a dictionary from code object to CodeTimes, adding
+        up those of all threads."""
+        result = {}
+        for table in self.tables.values():
+            for code, times in table.items():
+                total = result.get(code)
+                if total is None:
+                    total = result[code] = CodeTimes(code)
+                    pass
+                total.add(times)
+                pass
+            pass
+        return result
+
+    def pause(self):
+        """Stop the clock of this thread, while the debugger is
+        stopped in it."""
+        self.pause_start[thread.get_ident()] = self.timer()
+        return
+
+    def resume(self):
+        ident = thread.get_ident()
+        start = self.pause_start.pop(ident, None)
+        if start is not None:
+            self.paused[ident] = (self.paused.get(ident, 0.0) +
+                                  self.timer() - start)
+            pass
+        return
+
+    def forget_stacks(self):
+        """Forget the frames we know to be running, as when events
+        stop coming for a while."""
+        for table in self.tables.values():
+            for times in table.values():
+                times.active = 0
+                pass
+            pass
+        self.stacks = {}
+        return
+
+    def entry_for(self, stack, table, frame, now):
+        """Return the entry of `stack' for `frame', dropping those of
+        frames which must have gone without our seeing their 'return'.
+        A frame we didn't see called gets an entry now."""
+        while stack:
+            if stack[-1][FRAME] is frame:
+                return stack[-1]
+            f = frame.f_back
+            while f is not None and f is not stack[-1][FRAME]:
+                f = f.f_back
+                pass
+            if f is not None:
+                # frame was called from the top of the stack.
+                break
+            stack.pop()[TIMES].active -= 1
+            pass
+        times = self.code_times(table, frame.f_code)
+        times.active += 1
+        entry = [frame, times, now, 0.0, None, now]
+        stack.append(entry)
+        return entry
+
+    def event(self, frame, event, arg):
+        """Account for trace event `event' in `frame'."""
+        ident = thread.get_ident()
+        now = self.timer() - self.paused.get(ident, 0.0)
+        stack = self.stacks.get(ident)
+        if stack is None:
+            stack = self.stacks[ident] = []
+            pass
+        table = self.tables.get(ident)
+        if table is None:
+            table = self.tables[ident] = {}
+            pass
+        if 'line' == event:
+            entry = self.entry_for(stack, table, frame, now)
+            times = entry[TIMES]
+            if entry[LINE] is not None:
+                times.times[entry[LINE]] += now - entry[LINE_START]
+                pass
+            i = frame.f_lineno - times.first
+            times.hits[i] += 1
+            entry[LINE] = i
+            entry[LINE_START] = now
+        elif 'call' == event:
+            times = self.code_times(table, frame.f_code)
+            times.calls += 1
+            if not times.active:
+                times.primitive += 1
+                pass
+            if frame.f_back is not None:
+                caller = frame.f_back.f_code
+                times.callers[caller] = times.callers.get(caller, 0) + 1
+                pass
+            self.entry_for(stack, table, frame, now)
+        elif 'return' == event:
+            if not stack or stack[-1][FRAME] is not frame:
+                return
+            entry = stack.pop()
+            times = entry[TIMES]
+            if entry[LINE] is not None:
+                times.times[entry[LINE]] += now - entry[LINE_START]
+                pass
+            total = now - entry[START]
+            times.own += total - entry[CHILD]
+            times.active -= 1
+            if not times.active:
+                times.cumulative += total
+                pass
+            if stack:
+                stack[-1][CHILD] += total
+                pass
+            pass
+        return
+
+    def functions(self):
+        """Return the CodeTimes of the functions which were called."""
+        return [times for times in self.times_by_code().values()
+                if times.calls]
+
+    def lines_by_file(self, canonic_code):
+        """Return a dictionary from filename to a dictionary from line
+        number to (hits, time). `canonic_code' gives the filename of a
+        code object."""
+        result = {}
+        for code, times in self.times_by_code().items():
+            lines = result.setdefault(canonic_code(code), {})
+            for line, hits, time in times.lines():
+                lines[line] = (hits, time)
+                pass
+            pass
+        return result
+
+    def stats(self, canonic_code):
+        """Return the function data in the form of the `stats'
+        attribute of a pstats.Stats object."""
+        def key(code):
+            return (canonic_code(code), code.co_firstlineno, code.co_name)
+        stats = {}
+        for times in self.functions():
+            callers = dict([(key(code), calls) for code, calls in
+                            times.callers.items()])
+            stats[key(times.code)] = (times.primitive, times.calls,
+                                      times.own, times.cumulative, callers)
+            pass
+        return stats
+
+    def save(self, path, canonic_code):
+        """Write the function data to `path' so that pstats.Stats(path)
+        can read it."""
+        f = open(path, 'wb')
+        try:
+            marshal.dump(self.stats(canonic_code), f)
+        finally:
+            f.close()
+            pass
+        return
+    pass
+
+# Demo it
+if __name__=='__main__':
+    import os, pstats, sys, tempfile
+
+    def fib(n):
+        if n < 2:
+            return n
+        return fib(n-1) + fib(n-2)
+    profiler = TraceProfiler()
+
+    def trace(frame, event, arg):
+        profiler.event(frame, event, arg)
+        return trace
+    sys.settrace(trace)
+    fib(15)
+    sys.settrace(None)
+    times = profiler.times_by_code()[fib.func_code]
+    print('fib: %d calls, %d primitive, %.4fs' %
+          (times.calls, times.primitive, times.cumulative))
+    for line, hits, time in times.lines():
+        print('%4d %6d %.4f' % (line, hits, time))
+        pass
+    path = tempfile.mktemp()
+    profiler.save(path, lambda code: code.co_filename)
+    pstats.Stats(path).sort_stats('cumulative').print_stats(3)
+    os.unlink(path)
+    pass
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""A statistical profiler: at a regular interval of CPU time, note
+where each thread is. See also the "profile sample" command.
+
+The interval is kept by ITIMER_PROF, which sends SIGPROF. When the
+debugger's SignalManager has taken over signal handling, our handler
+is chained behind its handler for SIGPROF, which by default passes
+the signal on without a word."""
+
+import os, signal, sys, thread, weakref
+
+import tracer
+import trepan
+from trepan.lib import sighandler as Msig
+
+# Directories of code which isn't the program's own; see
+# is_debugger_code().
+DEBUGGER_DIRS = (os.path.dirname(os.path.realpath(trepan.__file__)) + os.sep,
+                 os.path.realpath(os.path.splitext(tracer.__file__)[0]))
+
+
+_debugger_code = weakref.WeakKeyDictionary()
+
+
+def is_debugger_code(code):
+    """Return True if `code' is part of the debugger or of the tracer
+    module rather than of the program being debugged."""
+    result = _debugger_code.get(code)
+    if result is None:
+        filename = os.path.realpath(code.co_filename)
+        result = filename.startswith(DEBUGGER_DIRS)
+        _debugger_code[code] = result
+        pass
+    return result
+
+
+def signal_manager():
+    """Return the SignalManager which has put its replacement in for
+    signal.signal(), if there is one."""
+    manager = getattr(signal.signal, 'im_self', None)
+    if isinstance(manager, Msig.SignalManager):
+        return manager
+    return None
+
+
+def code_label(code):
+    """The name we give a function in folded stacks."""
+    return '%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename),
+                           code.co_firstlineno)
+
+
+class CallNode:
+    """A function in the call tree made from the samples: how many
+    samples were taken in it or in what it calls, how many in the
+    function itself, and the nodes for what it called."""
+
+    def __init__(self, code):
+        self.code     = code
+        self.samples  = 0
+        self.own      = 0
+        self.children = {}  # code object -> CallNode
+        return
+
+    def add(self, stack, count):
+        """Add `count' samples of stack `stack', a tuple of code
+        objects from the outermost call in."""
+        node = self
+        node.samples += count
+        for code in stack:
+            child = node.children.get(code)
+            if child is None:
+                child = node.children[code] = CallNode(code)
+                pass
+            node = child
+            node.samples += count
+            pass
+        node.own += count
+        return
+
+    def sorted_children(self):
+        return sorted(self.children.values(), key=lambda node: -node.samples)
+    pass
+
+
+class Sampler:
+    """Takes a sample every `interval' seconds of CPU time, between
+    start() and stop(). A sample is the stack of each thread minus
+    any debugger frames on top of it.
+
+    SIGPROF goes through SignalManager `sigmgr', or the one in
+    charge of signal.signal() if it isn't given. With no
+    SignalManager, our handler is installed with signal.signal().
+    Otherwise, while we run, that SignalManager's debugger ignores
+    the functions which run on a SIGPROF; see handler_functions()."""
+
+    def __init__(self, interval=0.01, sigmgr=None,
+                 is_ignored=is_debugger_code):
+        self.interval      = interval
+        self.sigmgr        = sigmgr
+        self.is_ignored    = is_ignored
+        self.running       = False
+        # The SignalManager SIGPROF went through, if any, and the
+        # handling of SIGPROF we replaced.
+        self.active_sigmgr = None
+        self.saved         = None
+        self.clear()
+        return
+
+    def clear(self):
+        self.samples = 0
+        self.stacks  = {}   # tuple of code objects -> samples
+        self.lines   = {}   # (code, line) innermost -> samples
+        return
+
+    def start(self):
+        if self.running: return
+        sigmgr = self.sigmgr or signal_manager()
+        if sigmgr is None:
+            self.saved = signal.signal(signal.SIGPROF, self.handle)
+        else:
+            handler = sigmgr.sigs['SIGPROF']
+            self.saved = (handler.old_handler, handler.pass_along)
+            handler.old_handler = self.handle
+            handler.pass_along  = True
+            sigmgr.check_and_adjust_sighandler('SIGPROF', sigmgr.sigs)
+            pass
+        if sigmgr is not None:
+            sigmgr.dbgr.core.add_ignore(*self.handler_functions())
+            pass
+        self.active_sigmgr = sigmgr
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+        return
+
+    def stop(self):
+        if not self.running: return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        if self.active_sigmgr is None:
+            # A SIGPROF still on its way would kill the program if
+            # we put back the default action.
+            if self.saved in (None, signal.SIG_DFL):
+                self.saved = signal.SIG_IGN
+                pass
+            signal.signal(signal.SIGPROF, self.saved)
+        else:
+            handler = self.active_sigmgr.sigs['SIGPROF']
+            handler.old_handler, handler.pass_along = self.saved
+            core = self.active_sigmgr.dbgr.core
+            for fn in self.handler_functions():
+                core.remove_ignore(fn)
+                pass
+            pass
+        self.saved   = None
+        self.running = False
+        return
+
+    def handler_functions(self):
+        """The functions of ours which run on a SIGPROF. A debugger
+        stepping through the program is not to stop in them. The
+        SignalManager's SigHandler.handle(), which calls handle(), is
+        always ignored."""
+        return (self.handle, self.add_sample, self.is_ignored)
+
+    def handle(self, signum, frame):
+        """The SIGPROF handler. `frame' is where the main thread was
+        interrupted; other threads are found by sys._current_frames()."""
+        me = thread.get_ident()
+        for thread_id, f in sys._current_frames().items():
+            if thread_id == me:
+                f = frame
+                pass
+            self.add_sample(f)
+            pass
+        return
+
+    def add_sample(self, frame):
+        while frame is not None and self.is_ignored(frame.f_code):
+            frame = frame.f_back
+            pass
+        if frame is None:
+            return
+        self.samples += 1
+        key = (frame.f_code, frame.f_lineno)
+        self.lines[key] = self.lines.get(key, 0) + 1
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+            pass
+        stack.reverse()
+        stack = tuple(stack)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        return
+
+    def call_tree(self):
+        """Return the root CallNode of the samples taken."""
+        root = CallNode(None)
+        for stack, count in self.stacks.items():
+            root.add(stack, count)
+            pass
+        return root
+
+    def top_functions(self, n=None):
+        """Return a list of (code, own samples, samples) for the `n'
+        functions with the most samples taken in them, most first. The
+        second count includes samples in the functions they call."""
+        own, total = {}, {}
+        for stack, count in self.stacks.items():
+            leaf = stack[-1]
+            own[leaf] = own.get(leaf, 0) + count
+            for code in set(stack):
+                total[code] = total.get(code, 0) + count
+                pass
+            pass
+        result = sorted([(code, own.get(code, 0), total[code])
+                         for code in total],
+                        key=lambda entry: (-entry[1], -entry[2]))
+        return result[:n]
+
+    def top_lines(self, n=None):
+        """Return a list of ((code, line), samples) for the `n' lines
+        with the most samples, most first."""
+        return sorted(self.lines.items(),
+                      key=lambda entry: -entry[1])[:n]
+
+    def folded(self, label=code_label):
+        """Return the samples as lines of folded stacks, the input
+        format of flame graph tools: function names from the outermost
+        call in separated by semicolons, then a space and a count."""
+        return sorted(['%s %d' % (';'.join([label(code) for code in stack]),
+                                  count)
+                       for stack, count in self.stacks.items()])
+    pass
+
+# Demo it
+if __name__=='__main__':
+    def spin(n):
+        t = 0
+        for i in range(n):
+            t += i
+            pass
+        return t
+
+    def work():
+        for i in range(30):
+            spin(100000)
+            pass
+        return
+    sampler = Sampler(0.005, is_ignored=lambda code: False)
+    sampler.start()
+    work()
+    sampler.stop()
+    print('%d samples' % sampler.samples)
+    for code, own, total in sampler.top_functions(3):
+        print('%5d %5d %s' % (own, total, code_label(code)))
+        pass
+    for line in sampler.folded():
+        print(line)
+        pass
+    pass
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Limiting tracing to the parts of a program given by module name
+patterns. See also the "set trace-scope" command."""
+
+import fnmatch, os, site, sys
+from distutils import sysconfig
+
+from trepan.lib import cache as Mcache
+
+
+def _site_dirs():
+    dirs = [sysconfig.get_python_lib()]
+    if hasattr(site, 'getsitepackages'):
+        dirs += site.getsitepackages()
+        pass
+    if hasattr(site, 'getusersitepackages'):
+        dirs.append(site.getusersitepackages())
+        pass
+    return [os.path.realpath(d) + os.sep for d in dirs]
+
+STDLIB_DIR = os.path.realpath(sysconfig.get_python_lib(standard_lib=True))
+STDLIB_DIR += os.sep
+SITE_DIRS  = _site_dirs()
+
+
+def is_site_file(filename):
+    """Return True if `filename' is in a site-packages (or
+    dist-packages) directory."""
+    for d in SITE_DIRS:
+        if filename.startswith(d):
+            return True
+        pass
+    parts = filename.split(os.sep)
+    return 'site-packages' in parts or 'dist-packages' in parts
+
+
+def is_stdlib_file(filename):
+    """Return True if `filename' is part of the Python standard
+    library."""
+    return filename.startswith(STDLIB_DIR) and not is_site_file(filename)
+
+# Names which stand for a group of modules where a pattern is
+# expected, and how to tell if a file belongs to the group.
+GROUPS = {
+    'site-packages': is_site_file,
+    'stdlib'       : is_stdlib_file,
+    }
+
+
+def matches(pattern, modname, filename):
+    """Return True if the module named `modname' from file `filename'
+    matches `pattern'. This is a glob pattern on the module name or
+    one of the names in GROUPS. A pattern like 'foo.*' also matches
+    package foo itself."""
+    if pattern in GROUPS:
+        return GROUPS[pattern](filename)
+    if fnmatch.fnmatchcase(modname, pattern):
+        return True
+    return pattern.endswith('.*') and modname == pattern[:-2]
+
+
+class TraceScope:
+    """The part of a program we trace, given by lists of `include' and
+    `exclude' patterns; see matches(). If there are include patterns,
+    a module must match one of them to be in scope; a module which
+    matches an exclude pattern is never in scope.
+
+    Whether code is in scope is worked out once for each code object.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.cache   = Mcache.CodeCache()
+        return
+
+    def __str__(self):
+        s = []
+        if self.include:
+            s.append('include ' + ' '.join(self.include))
+            pass
+        if self.exclude:
+            s.append('exclude ' + ' '.join(self.exclude))
+            pass
+        return ' '.join(s) or 'all'
+
+    def classify(self, modname, filename):
+        """Return True if the module named `modname' which comes from
+        `filename' is in scope."""
+        filename = os.path.realpath(filename)
+        if self.include:
+            for pattern in self.include:
+                if matches(pattern, modname, filename): break
+                pass
+            else:
+                return False
+            pass
+        for pattern in self.exclude:
+            if matches(pattern, modname, filename):
+                return False
+            pass
+        return True
+
+    def contains(self, frame):
+        """Return True if the code running in `frame' is in scope."""
+        code = frame.f_code
+        result = self.cache.get(code)
+        if result is None:
+            result = self.classify(frame.f_globals.get('__name__', ''),
+                                   code.co_filename)
+            self.cache[code] = result
+            pass
+        return result
+    pass
+
+# Demo it
+if __name__=='__main__':
+    import inspect
+    scope = TraceScope(['trepan.*', '__main__'], ['stdlib'])
+    print(scope)
+    print(scope.contains(inspect.currentframe()))
+    print(scope.classify('os', os.__file__))
+    print(scope.classify('trepan.lib', __file__))
+    print(TraceScope())
+    pass
@@ -149,7 +149,7 @@ class SignalManager:
     """
     def __init__(self, dbgr, ignore_list=None, default_print=True):
         self.dbgr    = dbgr
-        # dbgr.core.add_ignore(SigHandler.handle)
+        dbgr.core.add_ignore(SigHandler.handle)
         self.sigs    = {}
 
         # List of signals. Dunno why signal doesn't provide.
@@ -159,7 +159,7 @@ class SignalManager:
         if ignore_list is None:
             ignore_list = ['SIGALRM',    'SIGCHLD',  'SIGURG',
                            'SIGIO',      'SIGCLD',
-                           'SIGVTALRM'   'SIGPROF',  'SIGWINCH',  'SIGPOLL',
+                           'SIGVTALRM',  'SIGPROF',  'SIGWINCH',  'SIGPOLL',
                            'SIGWAITING', 'SIGLWP',   'SIGCANCEL', 'SIGTRAP',
                            'SIGTERM',    'SIGQUIT',  'SIGILL']
         self.ignore_list = ignore_list
@@ -474,7 +474,10 @@ class SigHandler:
             core.trace_hook_suspend = True
             core.stop_reason = ('intercepting signal %s (%d)' %
                                 (self.signame, signum))
+            core.profiler.pause()
             core.processor.event_processor(frame, 'signal', signum)
+            core.profiler.resume()
+            core.resume(frame)
             core.trace_hook_suspend = old_trace_hook_suspend
             pass
         if self.pass_along:
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-#   Copyright (C) 2008-2010, 2013 Rocky Bernstein <rocky@gnu.org>
+#   Copyright (C) 2008-2010, 2013, 2015 Rocky Bernstein <rocky@gnu.org>
 #
 #   This program is free software: you can redistribute it and/or modify
 #   it under the terms of the GNU General Public License as published by
@@ -35,6 +35,114 @@ import inspect
 _re_pseudo_file = re.compile(r'^<.+>')
 
 
+class StackSnapshot:
+    """The frames get_stack() found the last time it was called for
+    a processor, oldest first and without traceback entries, kept so
+    that the next call can reuse the ones which are still there."""
+
+    def __init__(self):
+        self.key   = None
+        self.stack = []  # (frame, lineno) pairs
+        self.index = {}  # frame -> its position in stack
+        return
+
+    def clear(self, key=None):
+        self.key   = key
+        self.stack = []
+        self.index = {}
+        return
+    pass
+
+
+def exclude_key(proc_obj):
+    """What decides which frames get_stack() leaves out for
+    `proc_obj'. A snapshot made under a different key can't be used."""
+    settings = proc_obj.debugger.settings
+    if settings['dbg_trepan']:
+        return (True,)
+    ignore_filter = proc_obj.core.ignore_filter
+    return (False, ignore_filter,
+            set(getattr(ignore_filter, 'include_f_codes', ())))
+
+
+def get_stack(f, t, botframe, proc_obj=None):
+    """Return a stack of frames which the debugger will use for in
+    showing backtraces and in frame switching. As such various frame
+    that are really around may be excluded unless we are debugging the
+    sebugger. Also we will add traceback frame on top if that
+    exists.
+
+    If `proc_obj' has a stack_snapshot, frames from the last call are
+    reused: the walk down from `f' stops at the first frame found
+    there, since the frames below one which has been running all along
+    can't have changed. A generator's frame doesn't count, as each
+    resumption can give it a different caller."""
+    exclude_frame = lambda f: False
+    snapshot = None
+    if proc_obj:
+        settings = proc_obj.debugger.settings
+        if not settings['dbg_trepan']:
+            exclude_frame = lambda f: \
+                proc_obj.core.ignore_filter.is_included(f)
+            pass
+        snapshot = getattr(proc_obj, 'stack_snapshot', None)
+        pass
+    if t and t.tb_frame is f:
+        t = t.tb_next
+    if snapshot is None:
+        stack = []
+        while f is not None:
+            if exclude_frame(f): break  # See commented alternative below
+            stack.append((f, f.f_lineno))
+            # bdb has:
+            # if f is botframe: break
+            f = f.f_back
+            pass
+        stack.reverse()
+    else:
+        key = exclude_key(proc_obj)
+        if key != snapshot.key:
+            snapshot.clear(key)
+            pass
+        index = snapshot.index
+        new   = []
+        pos   = None
+        while f is not None:
+            if exclude_frame(f): break
+            pos = index.get(f)
+            if pos is not None and \
+                    not (f.f_code.co_flags & inspect.CO_GENERATOR):
+                break
+            pos = None
+            new.append(f)
+            f = f.f_back
+            pass
+        old = snapshot.stack
+        if pos is None:
+            snapshot.clear(key)
+            old = snapshot.stack
+        else:
+            for frame, lineno in old[pos+1:]:
+                del index[frame]
+                pass
+            del old[pos+1:]
+            old[pos] = (f, f.f_lineno)
+            pass
+        new.reverse()
+        for frame in new:
+            snapshot.index[frame] = len(old)
+            old.append((frame, frame.f_lineno))
+            pass
+        stack = list(old)
+        pass
+    i = max(0, len(stack) - 1)
+    while t is not None:
+        stack.append((t.tb_frame, t.tb_lineno))
+        t = t.tb_next
+        pass
+    return stack, i
+
+
 def format_stack_entry(dbg_obj, frame_lineno, lprefix=': ',
                        include_location=True, color='plain'):
     """Format and return a stack entry gdb-style.
@@ -121,13 +229,23 @@ def frame2file(core_obj, frame):
     return core_obj.filename(core_obj.canonic_filename(frame))
 
 
+def format_code_location(core_obj, code, lineno=None, color='plain'):
+    """Format and return the function name and location of code
+    object `code', for reports on code rather than on frames. `lineno'
+    defaults to the line of its def."""
+    if lineno is None: lineno = code.co_firstlineno
+    filename = core_obj.filename(core_obj.canonic_code(code))
+    return '%s at %s:%s' % (
+        format_token(Mformat.Function, code.co_name, highlight=color),
+        format_token(Mformat.Filename, filename, highlight=color),
+        format_token(Mformat.LineNumber, str(lineno), highlight=color))
+
+
 def is_exec_stmt(frame):
     """Return True if we are looking at an exec statement"""
     return hasattr(frame, 'f_back') and frame.f_back is not None and \
         Mbytecode.op_at_frame(frame.f_back)=='EXEC_STMT'
 
-import dis
-
 
 def get_call_function_name(frame, color='plain'):
     """If f_back is looking at a call function, return
@@ -136,49 +254,187 @@ def get_call_function_name(frame, color='plain'):
     if not f_back: return None
     if 'CALL_FUNCTION' != Mbytecode.op_at_frame(f_back): return None
 
-    co         = f_back.f_code
-    code       = co.co_code
-    # labels     = dis.findlabels(code)
-    linestarts = dict(dis.findlinestarts(co))
-    inst       = f_back.f_lasti
-    while inst >= 0:
-        # c = code[inst]
-        # op = ord(c)
-        if inst in linestarts:
-            inst += 1
-            oparg = ord(code[inst]) + (ord(code[inst+1]) << 8)
-            return format_token(Mformat.Function, co.co_names[oparg],
-                                highlight=color)
-        inst -= 1
-        pass
-    return None
+    co    = f_back.f_code
+    code  = co.co_code
+    start = Mbytecode.code_info(co).line_start(f_back.f_lasti)
+    if start is None: return None
+    oparg = ord(code[start+1]) + (ord(code[start+2]) << 8)
+    return format_token(Mformat.Function, co.co_names[oparg],
+                        highlight=color)
 
 
-def print_stack_entry(proc_obj, i_stack, color='plain'):
+def stack_entry(proc_obj, i_stack, color='plain'):
+    """Return format_stack_entry() of entry `i_stack' of the stack,
+    counting from the most recent frame. Entries are remembered in
+    proc_obj.stack_entry_cache, which the processor empties at each
+    stop, so asking again for a frame which hasn't moved is cheap."""
     frame_lineno = proc_obj.stack[len(proc_obj.stack)-i_stack-1]
     frame, lineno = frame_lineno
+    cache = getattr(proc_obj, 'stack_entry_cache', None)
+    if cache is None:
+        return format_stack_entry(proc_obj.debugger, frame_lineno,
+                                  color=color)
+    settings = proc_obj.debugger.settings
+    key = (frame, frame.f_lasti, lineno, color, settings['maxargstrsize'],
+           settings['basename'])
+    s = cache.get(key)
+    if s is None:
+        s = cache[key] = format_stack_entry(proc_obj.debugger, frame_lineno,
+                                            color=color)
+        pass
+    return s
+
+
+def stack_entries(proc_obj, start=0, stop=None, color='plain'):
+    """Yield (i_stack, frame, entry) for the stack entries from
+    `start' up to but not including `stop', most recent first. Each
+    entry is formatted only when it is reached."""
+    n = len(proc_obj.stack)
+    if stop is None or stop > n: stop = n
+    for i in range(start, stop):
+        frame = proc_obj.stack[n-i-1][0]
+        yield i, frame, stack_entry(proc_obj, i, color)
+        pass
+    return
+
+
+# The longest cycle of calls stack_groups() looks for, and how many
+# times a cycle has to come up in a row to be made a group.
+MAX_CYCLE  = 4
+MIN_REPEAT = 3
+
+
+def stack_groups(proc_obj, start=0, stop=None, max_cycle=MAX_CYCLE,
+                 min_repeat=MIN_REPEAT):
+    """Yield (first, last, cycle) for the stack entries from `start'
+    up to `stop', most recent first. Where the same `cycle' frames,
+    compared by code object and line, come up `min_repeat' times or
+    more in a row, entries `first' through `last' are those frames;
+    otherwise `first' and `last' are the same entry and `cycle' is 0.
+    The current frame always gets an entry of its own.
+
+    This is a single pass over the stack, looking back at most
+    `max_cycle' entries."""
+    stack = proc_obj.stack
+    n = len(stack)
+    if stop is None or stop > n:
+        stop = n
+        pass
+    keys = [None] * stop
+    for i in range(start, stop):
+        frame, lineno = stack[n-i-1]
+        if frame is proc_obj.curframe:
+            keys[i] = object()  # equal to no other key
+        else:
+            keys[i] = (frame.f_code, lineno)
+            pass
+        pass
+    i = start
+    while i < stop:
+        cycle, end = 0, i + 1
+        for k in range(1, max_cycle+1):
+            j = i + k
+            while j < stop and keys[j] == keys[j-k]:
+                j += 1
+                pass
+            repeats = (j - i) // k
+            if repeats >= min_repeat and i + repeats * k > end:
+                cycle, end = k, i + repeats * k
+                pass
+            pass
+        yield i, end - 1, cycle
+        i = end
+        pass
+    return
+
+
+def format_stack_group(proc_obj, first, last, cycle, color='plain'):
+    """Return the line standing for entries `first' through `last' of
+    the stack, which go around a `cycle' of calls."""
+    n = len(proc_obj.stack)
+    names = []
+    for i in range(first, first + cycle):
+        code = proc_obj.stack[n-i-1][0].f_code
+        names.append(format_token(Mformat.Function, code.co_name,
+                                  highlight=color) + '()')
+        pass
+    return '%d-%d %s x%d' % (first, last, ' -> '.join(names),
+                             (last - first + 1) // cycle)
+
+
+def print_stack_entry(proc_obj, i_stack, color='plain'):
+    frame = proc_obj.stack[len(proc_obj.stack)-i_stack-1][0]
+    print_entry(proc_obj, i_stack, frame,
+                stack_entry(proc_obj, i_stack, color), color)
+    return
+
+
+def print_entry(proc_obj, i_stack, frame, entry, color='plain'):
     if frame is proc_obj.curframe:
         proc_obj.intf[-1].msg_nocr(format_token(Mformat.Arrow, '->',
                                                 highlight=color))
     else:
         proc_obj.intf[-1].msg_nocr('##')
-    proc_obj.intf[-1].msg("%d %s" %
-             (i_stack, format_stack_entry(proc_obj.debugger, frame_lineno,
-                                          color=color)))
+    proc_obj.intf[-1].msg("%d %s" % (i_stack, entry))
+    return
+
 
+def print_stack_trace(proc_obj, count=None, color='plain', start=0,
+                      compact=False, max_lines=None):
+    """Print `count' entries of the stack trace, starting with entry
+    `start', in at most `max_lines' lines. Return the number of the
+    entry after the last one printed.
 
-def print_stack_trace(proc_obj, count=None, color='plain'):
-    "Print count entries of the stack trace"
+    If `compact' is set, a run of frames which repeat a cycle of calls
+    is printed as a single line; see stack_groups(). Only runs within
+    the `count' entries are put together."""
+    if compact:
+        return print_stack_groups(proc_obj, count, color, start, max_lines)
+    if max_lines is not None and (count is None or max_lines < count):
+        count = max_lines
+        pass
     if count is None:
-        n=len(proc_obj.stack)
+        stop = None
     else:
-        n=min(len(proc_obj.stack), count)
+        stop = start + count
+        pass
+    i = start
     try:
-        for i in range(n):
-            print_stack_entry(proc_obj, i, color=color)
+        for i, frame, entry in stack_entries(proc_obj, start, stop, color):
+            print_entry(proc_obj, i, frame, entry, color)
+            i += 1
+            pass
     except KeyboardInterrupt:
         pass
-    return
+    return i
+
+
+def print_stack_groups(proc_obj, count=None, color='plain', start=0,
+                       max_lines=None):
+    n = len(proc_obj.stack)
+    if count is None:
+        stop = None
+    else:
+        stop = start + count
+        pass
+    i = start
+    try:
+        for first, last, cycle in stack_groups(proc_obj, start, stop):
+            if max_lines is not None and max_lines <= 0: break
+            if cycle:
+                proc_obj.intf[-1].msg_nocr('##')
+                proc_obj.intf[-1].msg(format_stack_group(proc_obj, first,
+                                                         last, cycle, color))
+            else:
+                print_entry(proc_obj, first, proc_obj.stack[n-first-1][0],
+                            stack_entry(proc_obj, first, color), color)
+                pass
+            i = last + 1
+            if max_lines is not None: max_lines -= 1
+            pass
+    except KeyboardInterrupt:
+        pass
+    return i
 
 
 def print_dict(s, obj, title):
@@ -22,6 +22,11 @@ def current_thread_name():
     return threading.currentThread().getName()
 
 
+# Code objects of trace functions that sit between a debugged frame
+# and the debugger's own frames, besides tracer's.
+hook_codes = set()
+
+
 def find_debugged_frame(frame):
     """Find the first frame that is a debugged frame. We do this
     Generally we want traceback information without polluting it with
@@ -36,7 +41,7 @@ def find_debugged_frame(frame):
         pass
     if f_prev:
         val = f_prev.f_locals.get('tracer_func_frame')
-        if val == f_prev:
+        if val == f_prev or f_prev.f_code in hook_codes:
             if f_prev.f_back:
                 f_prev = f_prev.f_back
                 pass
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""A binary log of trace events, for tracing programs too big for
+"set trace" to print every event.
+
+Filenames and functions are written once, when a code object first
+shows up; after that an event is a fixed-size record. Records go
+into a preallocated buffer, and a background thread writes full
+buffers to the file. read_records() decodes a log, as the
+trepan2-tracedump program does.
+
+A log starts with MAGIC. Every record after it starts with a kind
+byte. Kinds below DEFINE_CODE are events, indexing EVENT_NAMES, laid
+out as EVENT. The others name a code object or thread by its index,
+laid out as DEFINE followed by that many bytes of UTF-8 text.
+"""
+
+import atexit, struct, thread, threading, time
+import Queue
+
+MAGIC = 'TREPAN-TRACE-1\n'
+
+EVENT_NAMES = ('c_call', 'c_exception', 'c_return', 'call', 'exception',
+               'line', 'return')
+EVENT_KIND  = dict([(name, i) for i, name in enumerate(EVENT_NAMES)])
+
+# kind, thread index, code index, line, time
+EVENT  = struct.Struct('<BxHIId')
+# kind, text length, index
+DEFINE = struct.Struct('<BxHI')
+
+DEFINE_CODE   = 0x80   # text: filename NUL function name NUL first line
+DEFINE_THREAD = 0x81   # text: thread name
+
+
+class TraceLog:
+    """Writes trace events to the file at `path'. `canonic_code' gives
+    the filename to record for a code object. Records are gathered
+    in buffers of `buffer_size' bytes, written out when full or when
+    `flush_interval' seconds have passed."""
+
+    def __init__(self, path, canonic_code=None, buffer_size=1 << 20,
+                 flush_interval=1.0, buffers=4):
+        self.path          = path
+        self.canonic_code  = canonic_code or (lambda code: code.co_filename)
+        self.buffer_size   = buffer_size
+        self.flush_interval = flush_interval
+        self.codes         = {}  # code object -> index
+        self.threads       = {}  # thread id -> index
+        self.lock          = threading.Lock()
+        self.full          = Queue.Queue()  # (buffer, length) to write
+        self.free          = Queue.Queue()  # buffers to fill
+        for i in range(buffers - 1):
+            self.free.put(bytearray(buffer_size))
+            pass
+        self.buffer        = bytearray(buffer_size)
+        self.pos           = 0
+        self.records       = 0
+        self.closed        = False
+
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.writer = threading.Thread(target=self.write_buffers,
+                                       name='trepan-tracelog')
+        self.writer.setDaemon(True)
+        self.writer.start()
+        atexit.register(self.close)
+        return
+
+    def record(self, frame, event):
+        """Log trace event `event' in `frame'."""
+        now = time.time()
+        code = frame.f_code
+        self.lock.acquire()
+        try:
+            if self.closed: return
+            index = self.codes.get(code)
+            if index is None:
+                index = self.define_code(code)
+                pass
+            thread_index = self.threads.get(thread.get_ident())
+            if thread_index is None:
+                thread_index = self.define_thread()
+                pass
+            if self.pos + EVENT.size > self.buffer_size:
+                self.swap()
+                pass
+            EVENT.pack_into(self.buffer, self.pos, EVENT_KIND[event],
+                            thread_index, index, frame.f_lineno, now)
+            self.pos += EVENT.size
+            self.records += 1
+        finally:
+            self.lock.release()
+            pass
+        return
+
+    def define(self, kind, index, text):
+        text = text.encode('utf-8')
+        size = DEFINE.size + len(text)
+        if self.pos + size > self.buffer_size:
+            self.swap()
+            pass
+        DEFINE.pack_into(self.buffer, self.pos, kind, len(text), index)
+        self.buffer[self.pos+DEFINE.size:self.pos+size] = text
+        self.pos += size
+        return
+
+    def define_code(self, code):
+        index = self.codes[code] = len(self.codes)
+        filename = self.canonic_code(code)
+        if isinstance(filename, str):
+            filename = filename.decode('utf-8', 'replace')
+            pass
+        self.define(DEFINE_CODE, index, u'%s\0%s\0%d' %
+                    (filename, code.co_name.decode('utf-8', 'replace'),
+                     code.co_firstlineno))
+        return index
+
+    def define_thread(self):
+        index = self.threads[thread.get_ident()] = len(self.threads)
+        name = threading.currentThread().getName()
+        if isinstance(name, str):
+            name = name.decode('utf-8', 'replace')
+            pass
+        self.define(DEFINE_THREAD, index, name)
+        return index
+
+    def swap(self):
+        """Hand the current buffer to the writer thread and go on with
+        a free one. Called with the lock held."""
+        if self.pos:
+            self.full.put((self.buffer, self.pos))
+            self.buffer = self.free.get()
+            self.pos = 0
+            pass
+        return
+
+    def write_buffers(self):
+        """The writer thread: write out buffers as they are filled,
+        and every so often whatever has been recorded."""
+        while True:
+            try:
+                buf, length = self.full.get(True, self.flush_interval)
+            except Queue.Empty:
+                self.flush()
+                continue
+            if buf is None:
+                break
+            self.file.write(buffer(buf, 0, length))
+            self.free.put(buf)
+            pass
+        return
+
+    def flush(self):
+        """Have what has been recorded so far written out, unless a
+        record is being made. That may be waiting on the writer thread
+        for a free buffer, so the writer can't wait for it."""
+        if not self.lock.acquire(False):
+            return
+        try:
+            if not self.closed:
+                self.swap()
+                pass
+        finally:
+            self.lock.release()
+            pass
+        return
+
+    def close(self):
+        """Write out the rest of the records and close the file."""
+        self.lock.acquire()
+        try:
+            if self.closed: return
+            self.swap()
+            self.closed = True
+        finally:
+            self.lock.release()
+            pass
+        self.full.put((None, 0))
+        self.writer.join()
+        self.file.close()
+        return
+    pass
+
+
+def read_records(f, chunk_size=1 << 20):
+    """Decode the trace log open as file `f'. Yield a tuple (time,
+    thread name, event, filename, function name, line) for each
+    event. The file is read `chunk_size' bytes at a time, so that a
+    log needn't fit in memory."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('not a trepan trace log')
+    codes, threads = {}, {}
+    data, pos, offset = '', 0, len(MAGIC)  # offset: file offset of data
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            # A record cut short, as by a crash, is dropped.
+            break
+        # Go on from the record which didn't fit in the last chunk.
+        offset += pos
+        data = data[pos:] + chunk
+        pos, end = 0, len(data)
+        while pos < end:
+            kind = ord(data[pos])
+            if kind < DEFINE_CODE:
+                if pos + EVENT.size > end: break
+                kind, thread_index, index, line, when = \
+                      EVENT.unpack_from(data, pos)
+                pos += EVENT.size
+                filename, name = codes.get(index, ('?', '?'))
+                yield (when, threads.get(thread_index, '?'),
+                       EVENT_NAMES[kind], filename, name, line)
+            else:
+                if pos + DEFINE.size > end: break
+                kind, length, index = DEFINE.unpack_from(data, pos)
+                if pos + DEFINE.size + length > end: break
+                if DEFINE_CODE == kind:
+                    text = data[pos+DEFINE.size:pos+DEFINE.size+length]
+                    filename, name, firstlineno = \
+                              text.decode('utf-8').split(u'\0')
+                    codes[index] = (filename, name)
+                elif DEFINE_THREAD == kind:
+                    text = data[pos+DEFINE.size:pos+DEFINE.size+length]
+                    threads[index] = text.decode('utf-8')
+                else:
+                    raise ValueError('unknown record kind %d at offset %d' %
+                                     (kind, offset + pos))
+                pos += DEFINE.size + length
+                pass
+            pass
+        pass
+    return
+
+# Demo it
+if __name__=='__main__':
+    import os, sys, tempfile
+
+    def fn(x):
+        return x + 1
+    path = tempfile.mktemp()
+    log = TraceLog(path, buffer_size=64)
+
+    def trace(frame, event, arg):
+        log.record(frame, event)
+        return trace
+    sys.settrace(trace)
+    fn(fn(1))
+    sys.settrace(None)
+    log.close()
+    for entry in read_records(open(path, 'rb')):
+        print('%.6f %s %-6s %s:%d %s' % (entry[0], entry[1], entry[2],
+                                         entry[3], entry[5], entry[4]))
+        pass
+    os.unlink(path)
+    pass
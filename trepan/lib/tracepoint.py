@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tracepoints: breakpoints which, rather than stopping, record the
+values of some expressions in a ring buffer."""
+
+import sys, threading, time
+
+from trepan.lib import eval as Meval
+
+
+def compile_exprs(sources):
+    """Return the list of (source, code object) pairs for the
+    expressions in `sources'. SyntaxError is raised if one doesn't
+    compile."""
+    return [(source, Meval.compile_cached(source)) for source in sources]
+
+
+class TraceBuffer:
+    """A fixed-size ring buffer of tracepoint hits. Each entry is the
+    tuple (time, thread name, breakpoint number, values) where values
+    are the reprs of the tracepoint's expressions. Once the buffer is
+    full, a new entry replaces the oldest one."""
+
+    def __init__(self, size=1000):
+        self.resize(size)
+        return
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def __iter__(self):
+        """Iterate over the entries, oldest first."""
+        if self.count > self.size:
+            start = self.next
+        else:
+            start = 0
+            pass
+        for i in range(len(self)):
+            yield self.entries[(start + i) % self.size]
+            pass
+        return
+
+    def append(self, entry):
+        self.entries[self.next] = entry
+        self.next  = (self.next + 1) % self.size
+        self.count += 1
+        return
+
+    def clear(self):
+        self.resize(self.size)
+        return
+
+    def dropped(self):
+        """Return how many entries have been pushed out."""
+        return max(0, self.count - self.size)
+
+    def record(self, bp, frame):
+        """Add an entry for a hit of tracepoint `bp' in `frame'."""
+        values = []
+        for source, code in bp.trace_exprs:
+            try:
+                values.append(repr(eval(code, frame.f_globals,
+                                        frame.f_locals)))
+            except Exception:
+                values.append('<%s>' % sys.exc_info()[0].__name__)
+                pass
+            pass
+        self.append((time.time(), threading.currentThread().getName(),
+                     bp.number, tuple(values)))
+        return
+
+    def resize(self, size):
+        """Make the buffer hold `size' entries, emptying it."""
+        self.size    = size
+        self.entries = [None] * size
+        self.next    = 0
+        self.count   = 0
+        return
+    pass
+
+
+def format_entry(entry, exprs=None):
+    """Return a line of text for TraceBuffer entry `entry'. `exprs' are
+    the tracepoint's expression sources, if we still have them."""
+    when, thread, number, values = entry
+    stamp = time.strftime('%H:%M:%S', time.localtime(when))
+    stamp += ('%.6f' % (when % 1))[1:]
+    if exprs and len(exprs) == len(values):
+        values = ['%s=%s' % pair for pair in zip(exprs, values)]
+        pass
+    return '%s %s #%d %s' % (stamp, thread, number, ' '.join(values))
+
+# Demo it
+if __name__=='__main__':
+    class Tracepoint:
+        number = 1
+        trace_exprs = compile_exprs(['i', 'i * 2', 'undefined'])
+        pass
+    buf = TraceBuffer(3)
+    for i in range(5):
+        buf.record(Tracepoint, sys._getframe())
+        pass
+    print('%d entries, %d dropped' % (len(buf), buf.dropped()))
+    for entry in buf:
+        print(format_entry(entry, ['i', 'i * 2', 'undefined']))
+        pass
+    pass
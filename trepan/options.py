@@ -47,6 +47,11 @@ def process_options(debugger_name, pkg_version, sys_argv, option_list=None):
                          action="store_true", default=False,
                          help="Show functions before executing them. " +
                          "This option also sets --batch")
+    optparser.add_option("--trace-log", dest="trace_log",
+                         action="store", type='string', metavar='FILE',
+                         help="Log the events traced with -X or -F, or " +
+                         "else all events, to FILE in binary. Decode " +
+                         "it with trepan2-tracedump.")
     optparser.add_option("--basename", dest="basename",
                          action="store_true", default=False,
                          help="Filenames strip off basename, " +
@@ -216,6 +221,10 @@ def _postprocess_options(dbg, opts):
     if len(print_events):
         dbg.settings['printset'] = frozenset(print_events)
         pass
+    if getattr(opts, 'trace_log', None):
+        dbg.core.set_trace_log(opts.trace_log)
+        dbg.settings['trace'] = True
+        pass
 
     for setting in ('annotate', 'basename', 'different',):
         dbg.settings[setting] = getattr(opts, setting)
@@ -17,9 +17,11 @@
 import inspect, os, pyficache
 
 from trepan import misc as Mmisc
+from trepan.lib import eval as Meval
 
 
-def set_break(cmd_obj, func, filename, lineno, condition, temporary, args):
+def set_break(cmd_obj, func, filename, lineno, condition, temporary, args,
+              trace_exprs=None):
     if lineno is None:
         part1 = ("I don't understand '%s' as a line number, function name,"
                  % ' '.join(args[1:]))
@@ -27,6 +29,12 @@ def set_break(cmd_obj, func, filename, lineno, condition, temporary, args):
                                   cmd_obj.settings['width'])
         cmd_obj.errmsg(msg)
         return False
+    if condition:
+        msg = Meval.syntax_error_msg(condition)
+        if msg:
+            cmd_obj.errmsg(msg)
+            return False
+        pass
     if filename is None:
         filename = cmd_obj.proc.curframe.f_code.co_filename
         filename = cmd_obj.core.canonic(filename)
@@ -41,17 +49,28 @@ def set_break(cmd_obj, func, filename, lineno, condition, temporary, args):
             cmd_obj.errmsg(msg)
             return False
         pass
-    bp =  cmd_obj.core.bpmgr.add_breakpoint(filename, lineno, temporary,
-                                         condition, func)
+    bpmgr = cmd_obj.core.bpmgr
+    if func:
+        others = list(bpmgr.fncodes.get(func.func_code, []))
+    bp = bpmgr.add_breakpoint(filename, lineno, temporary, condition, func,
+                              trace_exprs)
+    kind = bp.kind().capitalize()
     if func:
-        cmd_obj.msg('Breakpoint %d set on calling function %s()'
-                 % (bp.number, func.func_name))
+        if others:
+            if len(others) > 1: ss = 's'
+            else: ss = ''
+            cmd_obj.msg('Note: breakpoint%s %s also set on function %s()'
+                        % (ss, ', '.join([str(o.number) for o in others]),
+                           bp.funcname))
+            pass
+        cmd_obj.msg('%s %d set on calling function %s()'
+                 % (kind, bp.number, bp.funcname))
         part1 = 'Currently this is line %d of file'  % lineno
         msg = Mmisc.wrapped_lines(part1, cmd_obj.core.filename(filename),
                                   cmd_obj.settings['width'])
     else:
-        part1 = ( 'Breakpoint %d set at line %d of file'
-                  % (bp.number, lineno))
+        part1 = ( '%s %d set at line %d of file'
+                  % (kind, bp.number, lineno))
         msg = Mmisc.wrapped_lines(part1, cmd_obj.core.filename(filename),
                                   cmd_obj.settings['width'])
         pass
@@ -59,6 +78,28 @@ def set_break(cmd_obj, func, filename, lineno, condition, temporary, args):
     return True
 
 
+def parse_location(cmd_obj, args):
+    """Parse the location at the start of `args', given as in
+    "break": a line number, function, file and line, or module and
+    line. Return (func, filename, lineno, count) where `count' is the
+    number of args the location takes up."""
+    (modfunc, filename, lineno) = cmd_obj.proc.parse_position(args[0])
+    count = 1
+    if inspect.ismodule(modfunc) and lineno is None and len(args) > 1:
+        val = cmd_obj.proc.get_an_int(args[1],
+                                   'Line number expected, got %s.' %
+                                   args[1])
+        if val is None: return (None, None, None, 2)
+        lineno = val
+        count = 2
+        pass
+    if inspect.isfunction(modfunc):
+        func = modfunc
+    else:
+        func = None
+    return (func, filename, lineno, count)
+
+
 def parse_break_cmd(cmd_obj, args):
     curframe = cmd_obj.proc.curframe
     if 0 == len(args) or args[0] == 'if':
@@ -66,27 +107,15 @@ def parse_break_cmd(cmd_obj, args):
         lineno   = curframe.f_lineno
         if 0 == len(args):
             return (None, filename, lineno, None)
-        modfunc = None
+        func = None
         condition_pos = 0
     else:
-        (modfunc, filename, lineno) = cmd_obj.proc.parse_position(args[0])
-        condition_pos = 1
-        pass
-    if inspect.ismodule(modfunc) and lineno is None and len(args) > 1:
-        val = cmd_obj.proc.get_an_int(args[1],
-                                   'Line number expected, got %s.' %
-                                   args[1])
-        if val is None: return (None, None, None, None)
-        lineno = val
-        condition_pos = 2
+        (func, filename, lineno, condition_pos) = parse_location(cmd_obj,
+                                                                 args)
         pass
     if len(args) > condition_pos and 'if' == args[condition_pos]:
         condition = ' '.join(args[condition_pos+1:])
     else:
         condition = None
         pass
-    if inspect.isfunction(modfunc):
-        func = modfunc
-    else:
-        func = None
     return (func, filename, lineno, condition)
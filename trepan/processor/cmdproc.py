@@ -55,37 +55,9 @@ def arg_split(s, posix=False):
         pass
     return args_list
 
-def get_stack(f, t, botframe, proc_obj=None):
-    """Return a stack of frames which the debugger will use for in
-    showing backtraces and in frame switching. As such various frame
-    that are really around may be excluded unless we are debugging the
-    sebugger. Also we will add traceback frame on top if that
-    exists."""
-    exclude_frame = lambda f: False
-    if proc_obj:
-        settings = proc_obj.debugger.settings
-        if not settings['dbg_trepan']:
-            exclude_frame = lambda f: \
-                proc_obj.core.ignore_filter.is_included(f)
-            pass
-        pass
-    stack = []
-    if t and t.tb_frame is f:
-        t = t.tb_next
-    while f is not None:
-        if exclude_frame(f): break  # See commented alternative below
-        stack.append((f, f.f_lineno))
-        # bdb has:
-        # if f is botframe: break
-        f = f.f_back
-        pass
-    stack.reverse()
-    i = max(0, len(stack) - 1)
-    while t is not None:
-        stack.append((t.tb_frame, t.tb_lineno))
-        t = t.tb_next
-        pass
-    return stack, i
+# Shared with the bullwinkle processor; see Mstack.get_stack().
+get_stack = Mstack.get_stack
+
 
 def run_hooks(obj, hooks, *args):
     """Run each function in `hooks' with args"""
@@ -291,6 +263,9 @@ class CommandProcessor(Mprocessor.Processor):
         self.stack             = []
         self.thread_name       = None
         self.frame_thread_name = None
+        self.stack_entry_cache = {}
+        self.backtrace_next    = None
+        self.stack_snapshot    = Mstack.StackSnapshot()
         initfile_list          = get_option('initfile_list')
         for init_cmdfile in initfile_list:
             self.queue_startfile(init_cmdfile)
@@ -355,6 +330,8 @@ class CommandProcessor(Mprocessor.Processor):
         self.curframe    = None
         self.thread_name = None
         self.frame_thread_name = None
+        self.stack_entry_cache = {}   # see Mstack.stack_entry()
+        self.backtrace_next    = None  # where "backtrace +" goes on from
         return
 
     def eval(self, arg):
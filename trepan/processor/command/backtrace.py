@@ -22,11 +22,29 @@ from trepan.processor import frame as Mframe
 
 
 class BacktraceCommand(Mbase_cmd.DebuggerCommand):
-    """**backtrace** [*count*]
+    """**backtrace** [*count* | *from*..*to* | +]
 
 Print a stack trace, with the most recent frame at the top.  With a
-positive number, print at most many entries.  With a negative number
-print the top entries minus that number.
+positive number, print at most that many frames.  With a negative
+number print the top frames minus that number. With *from*..*to*,
+print frames *from* through *to*; either can be left off.
+
+Where the same calls repeat, as in a deep recursion, the run of
+frames is shown as one line giving the frame numbers, the function or
+cycle of functions, and how many times it repeats:
+
+   ##2-981 fib() x980
+
+The frames are still numbered one by one for `frame`, and a
+*from*..*to* window shows each of them. With a *count*, only runs
+within that many frames are put together.
+
+If `set stacksize` is not 0, at most that many lines are printed
+at a time, and `backtrace +` prints the next page of them.
+
+Entries are formatted as they are printed, and remembered until the
+program is continued, so a long backtrace can be interrupted, and
+printing it again after *up* or *down* is quick.
 
 An arrow indicates the 'current frame'. The current frame determines
 the context used for many debugger commands such as expression
@@ -36,8 +54,15 @@ Examples:
 ---------
 
    backtrace    # Print a full stack trace
-   backtrace 2  # Print only the top two entries
+   backtrace 2  # Print only the top two frames
    backtrace -1 # Print a stack trace except the initial (least recent) call.
+   backtrace 10..19 # Print frames 10 through 19
+   backtrace +  # Print the next page after "set stacksize 20"
+
+See also:
+---------
+
+`set stacksize`, `frame`, `up`, `down`
 """
 
     aliases       = ('bt', 'where')
@@ -53,20 +78,37 @@ Examples:
         return Mframe.frame_complete(proc_obj, prefix, None)
 
     def run(self, args):
+        start   = 0
+        paged   = True
+        compact = True
         if len(args) > 1:
             at_most = len(self.proc.stack)
             if at_most == 0:
                 self.errmsg("Stack is empty.")
                 return False
-            min_value = - (at_most + 1)
-            count = self.proc.get_int(args[1], min_value = min_value,
-                                      cmdname = 'backtrace',
-                                      default=0, at_most = at_most)
-            if count is None: return False
-            if count < 0:
-                count =  at_most - count
+            if '+' == args[1]:
+                start = self.proc.backtrace_next
+                if start is None:
+                    self.errmsg("No more stack frames.")
+                    return False
+                count = None
+            elif '..' in args[1]:
+                window = self.get_window(args[1], at_most)
+                if window is None: return False
+                start, count = window
+                paged = compact = False
+            else:
+                min_value = - (at_most + 1)
+                count = self.proc.get_int(args[1], min_value = min_value,
+                                          cmdname = 'backtrace',
+                                          default=0, at_most = at_most)
+                if count is None: return False
+                if count < 0:
+                    count =  at_most - count
+                    pass
+                elif 0 == count: count = None
+                paged = count is None
                 pass
-            elif 0 == count: count = None
         else:
             count = None
             pass
@@ -74,10 +116,44 @@ Examples:
         if not self.proc.curframe:
             self.errmsg("No stack.")
             return False
-        Mstack.print_stack_trace(self.proc, count,
-                                 color=self.settings['highlight'])
+        stacksize = self.settings['stacksize']
+        if paged and stacksize > 0:
+            max_lines = stacksize
+        else:
+            max_lines = None
+            pass
+        stop = Mstack.print_stack_trace(self.proc, count, start=start,
+                                        color=self.settings['highlight'],
+                                        compact=compact, max_lines=max_lines)
+        if paged and stop < len(self.proc.stack):
+            self.msg("(More stack frames follow; type 'backtrace +' "
+                     "for more.)")
+            self.proc.backtrace_next = stop
+        else:
+            self.proc.backtrace_next = None
+            pass
         return False
 
+    def get_window(self, arg, at_most):
+        """Return (start, count) for the window `arg', of the form
+        FROM..TO, or None after reporting an error."""
+        first, last = arg.split('..', 1)
+        if first:
+            first = self.proc.get_int(first, min_value=0, cmdname='backtrace',
+                                      at_most=at_most-1)
+            if first is None: return None
+        else:
+            first = 0
+            pass
+        if last:
+            last = self.proc.get_int(last, min_value=first,
+                                     cmdname='backtrace', at_most=at_most-1)
+            if last is None: return None
+        else:
+            last = at_most - 1
+            pass
+        return first, last - first + 1
+
     pass
 
 if __name__ == '__main__':
@@ -36,6 +36,7 @@ being debugged. """
     def run(self, args):
         try:
             os.chdir(args[1])
+            self.core.clear_filename_caches()
             self.msg('Working directory %s.' % os.getcwd())
         except OSError:
             self.errmsg('cd: %s.' % sys.exc_info()[1])
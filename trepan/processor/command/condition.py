@@ -17,6 +17,7 @@
 import os
 
 from trepan.processor.command import base_cmd as Mbase_cmd
+from trepan.lib import eval as Meval
 
 
 class ConditionCommand(Mbase_cmd.DebuggerCommand):
@@ -48,6 +49,10 @@ made unconditional.
             return
         if len(args) > 2:
             condition = ' '.join(args[2:])
+            msg = Meval.syntax_error_msg(condition)
+            if msg:
+                self.errmsg(msg)
+                return
         else:
             condition = None
             self.msg('Breakpoint %d is now unconditional.' % bp.number)
@@ -56,8 +56,10 @@ position before continuing.
             if not Mcmdbreak.set_break(self, func, filename, lineno, condition,
                                        True, args):
                 return False
-        self.core.step_events = None  # All events
-        self.core.step_ignore = -1
+        self.core.step_events    = None  # All events
+        self.core.step_ignore    = -1
+        self.core.stop_level     = None  # Drop any pending next/finish
+        self.core.stop_on_finish = False
         self.proc.continue_running = True  # Break out of command read loop
         return True
     pass
@@ -60,6 +60,7 @@ environment."""
         self.section("ENTERING NESTED DEBUGGER")
 
         self.core.step_ignore = 2  # call_tracing will stop in itself.
+        self.core.update_dispatch()
         try:
             ret = sys.call_tracing(eval, (arg, global_vars, local_vars))
             self.msg("R=> %s" % self.proc._saferepr(ret))
@@ -18,6 +18,7 @@ import os
 
 # Our local modules
 from trepan.processor.command import base_cmd as Mbase_cmd
+from trepan.lib import eval as Meval
 
 
 class DisplayCommand(Mbase_cmd.DebuggerCommand):
@@ -64,6 +65,10 @@ requests previously made."""
                 format = None
                 expr = ' '.join(args[1:])
                 pass
+            msg = Meval.syntax_error_msg(expr)
+            if msg:
+                self.errmsg(msg)
+                return
             dp = self.proc.display_mgr.add(self.proc.curframe, expr, format)
             if dp is None:
                 self.errmsg('Error evaluating "%s" in the current frame'
@@ -17,7 +17,6 @@ import os, sys
 
 # Our local modules
 from trepan.processor.command import base_cmd as Mbase_cmd
-from trepan.lib import stack as Mstack
 
 
 class FinishCommand(Mbase_cmd.DebuggerCommand):
@@ -58,8 +57,7 @@ program."""
         self.core.step_events      = ['return']
         self.core.stop_on_finish   = True
         self.core.stop_level       = \
-          Mstack.count_frames(self.proc.frame)-levels
-        self.core.last_frame       = self.proc.frame
+            self.core.frame_level(self.proc.frame) - levels
         self.proc.continue_running = True   # Break out of command read loop
         return True
     pass
@@ -38,19 +38,24 @@ class InfoBreak(Mbase_subcmd.DebuggerSubcommand):
         else:
             disp = disp + 'n  '
             pass
-        self.msg('%-4dbreakpoint    %s at %s:%d' %
-                 (bp.number, disp, self.core.filename(bp.filename), bp.line))
+        self.msg('%-4d%s    %s at %s:%d' %
+                 (bp.number, bp.kind(), disp,
+                  self.core.filename(bp.filename), bp.line))
         if bp.condition:
             self.msg('\tstop only if %s' % (bp.condition))
             pass
         if bp.ignore:
             self.msg('\tignore next %d hits' % (bp.ignore))
             pass
+        if bp.trace_exprs is not None:
+            self.msg('\trecord %s' % ' '.join(
+                [source for source, code in bp.trace_exprs]))
+            pass
         if (bp.hits):
             if (bp.hits > 1): ss = 's'
             else: ss = ''
-            self.msg('\tbreakpoint already hit %d time%s' %
-                     (bp.hits, ss))
+            self.msg('\t%s already hit %d time%s' %
+                     (bp.kind(), bp.hits, ss))
             pass
         return
 
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import columnize, os, sys
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.lib import linecov as Mlinecov
+
+
+class InfoCoverage(Mbase_subcmd.DebuggerSubcommand):
+    """**info coverage** [*filename*]
+
+**info coverage save** *path*
+
+Show the lines recorded as run while `set coverage` is on. Without
+a file name, give the number of lines run in each file out of those
+which could be. With one, list the lines of that file not run.
+
+`info coverage save` writes the lines run in each file to *path* as
+a JSON object from file names to lists of line numbers.
+
+See also:
+---------
+
+`set coverage`
+"""
+
+    min_abbrev = 2  # Min is info co
+    need_stack = False
+    short_help = "Show the lines run or not run"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        self.name = 'coverage'
+        return
+
+    def find_file(self, name, lines_by_file):
+        canonic = self.core.canonic(name)
+        if canonic in lines_by_file:
+            return canonic
+        matches = [filename for filename in lines_by_file
+                   if filename.endswith(os.sep + name)]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            self.errmsg("More than one file ends in %s." % name)
+        else:
+            self.errmsg("No coverage recorded for %s." % name)
+            pass
+        return None
+
+    def run(self, args):
+        coverage = self.core.coverage
+        if len(args) > 0 and 'save' == args[0]:
+            if len(args) != 2:
+                self.errmsg("Expecting a file name to save to.")
+                return
+            path = os.path.expanduser(args[1])
+            try:
+                coverage.save(path, self.core.canonic_code)
+            except IOError:
+                self.errmsg('Error writing %s: %s' %
+                            (path, sys.exc_info()[1]))
+                return
+            self.msg('Coverage saved to %s.' % path)
+            return
+
+        lines_by_file = coverage.lines_by_file(self.core.canonic_code)
+        if not lines_by_file:
+            if self.settings['coverage']:
+                self.msg("No lines recorded yet.")
+            else:
+                self.msg('No lines recorded. Use "set coverage on" to '
+                         'record them.')
+                pass
+            return
+
+        if len(args) == 0:
+            for filename in sorted(lines_by_file):
+                lines = lines_by_file[filename]
+                missed = Mlinecov.missed_lines(filename, lines)
+                if missed is None:
+                    self.msg('%s: %d lines run' %
+                             (self.core.filename(filename), len(lines)))
+                    continue
+                total = len(lines) + len(missed)
+                self.msg('%s: %d of %d lines run (%d%%)' %
+                         (self.core.filename(filename), len(lines), total,
+                          100 * len(lines) / total))
+                pass
+            return
+
+        filename = self.find_file(args[0], lines_by_file)
+        if filename is None:
+            return
+        missed = Mlinecov.missed_lines(filename, lines_by_file[filename])
+        if missed is None:
+            self.errmsg("Can't tell which lines of %s could be run." %
+                        self.core.filename(filename))
+        elif not missed:
+            self.msg("All lines of %s were run." %
+                     self.core.filename(filename))
+        else:
+            self.section("Lines of %s not run:" %
+                         self.core.filename(filename))
+            self.msg(columnize.columnize(missed, ljust=False,
+                                         arrange_vertical=False,
+                                         lineprefix='  ',
+                                         displaywidth=self.settings['width']))
+            pass
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan import debugger as Mdebugger
+    from trepan.processor.command import info as Minfo
+    d = Mdebugger.Debugger()
+    i = Minfo.InfoCommand(d.core.processor)
+    sub = InfoCoverage(i)
+    sub.run([])
+
+    def fn(x):
+        if x:
+            return 1
+        return 2
+    d.settings['coverage'] = True
+    d.core.coverage.record(sys._getframe())
+    sub.run([])
+    sub.run([__file__])
+    pass
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os, sys
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.lib import stack as Mstack
+
+
+class InfoProfile(Mbase_subcmd.DebuggerSubcommand):
+    """**info profile** [**functions**|**lines**] [*count*]
+
+**info profile save** *path*
+
+Show the times gathered by `profile trace`: the *count* functions
+which took the most time of their own, and the *count* lines which
+took the most time, 10 of each by default. The time of a line
+includes that of the calls made from it.
+
+`info profile save` writes the function data to *path* in the form
+the `pstats` module reads:
+
+    python -c "import pstats; pstats.Stats('path').print_stats()"
+
+See also:
+---------
+
+`profile trace`
+"""
+
+    min_abbrev = 4  # Min is info prof
+    need_stack = False
+    short_help = "Show profile times"
+
+    def location(self, code, lineno=None):
+        return Mstack.format_code_location(self.core, code, lineno,
+                                           color=self.settings['highlight'])
+
+    def run(self, args):
+        profiler = self.core.profiler
+        if len(args) > 0 and 'save' == args[0]:
+            if len(args) != 2:
+                self.errmsg("Expecting a file name to save to.")
+                return
+            path = os.path.expanduser(args[1])
+            try:
+                profiler.save(path, self.core.canonic_code)
+            except IOError:
+                self.errmsg('Error writing %s: %s' %
+                            (path, sys.exc_info()[1]))
+                return
+            self.msg('Profile saved to %s.' % path)
+            return
+
+        what = ['functions', 'lines']
+        if args and args[0] in what:
+            what = [args[0]]
+            args = args[1:]
+            pass
+        count = 10
+        if args:
+            count = self.proc.get_int(args[0], min_value=1,
+                                      cmdname='info profile')
+            if count is None: return
+            pass
+
+        functions = profiler.functions()
+        if not functions:
+            if self.core.profiling:
+                self.msg("No calls timed yet.")
+            else:
+                self.msg('No calls timed. Use "profile trace on" to '
+                         'time them.')
+                pass
+            return
+        if 'functions' in what:
+            self.section('   Calls      Own  Cumulative  Function')
+            functions.sort(key=lambda times: -times.own)
+            for times in functions[:count]:
+                calls = str(times.calls)
+                if times.primitive != times.calls:
+                    calls += '/%d' % times.primitive
+                    pass
+                self.msg('%8s %8.4f  %10.4f  %s' %
+                         (calls, times.own, times.cumulative,
+                          self.location(times.code)))
+                pass
+            pass
+        if 'lines' in what:
+            lines = []
+            for times in profiler.times_by_code().values():
+                for line, hits, time in times.lines():
+                    lines.append((time, hits, times.code, line))
+                    pass
+                pass
+            lines.sort(key=lambda entry: -entry[0])
+            self.section('    Hits     Time  Line')
+            for time, hits, code, line in lines[:count]:
+                self.msg('%8d %8.4f  %s' % (hits, time,
+                                            self.location(code, line)))
+                pass
+            pass
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan import debugger as Mdebugger
+    from trepan.processor.command import info as Minfo
+    d = Mdebugger.Debugger()
+    i = Minfo.InfoCommand(d.core.processor)
+    sub = InfoProfile(i)
+    sub.run([])
+
+    def fib(n):
+        if n < 2:
+            return n
+        return fib(n-1) + fib(n-2)
+    profiler = d.core.profiler
+
+    def trace(frame, event, arg):
+        profiler.event(frame, event, arg)
+        return trace
+    sys.settrace(trace)
+    fib(10)
+    sys.settrace(None)
+    sub.run(['3'])
+    sub.run(['lines', '2'])
+    pass
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class InfoTracepoints(Mbase_subcmd.DebuggerSubcommand):
+    """**info tracepoints**
+
+Show the tracepoints with what they record, and how full the
+buffer of recorded values is.
+
+See also:
+---------
+
+`tracepoint`, `tdump`
+"""
+
+    min_abbrev = 2  # Min is info tr
+    need_stack = False
+    short_help = "Status of tracepoints and their buffer"
+
+    def run(self, args):
+        bpmgr = self.core.bpmgr
+        tps = [bp for bp in bpmgr.bpbynumber
+               if bp and bp.trace_exprs is not None]
+        if not tps:
+            self.msg("No tracepoints.")
+        else:
+            self.section("Num Enb Where")
+            for bp in tps:
+                if bp.enabled: enabled = 'y'
+                else: enabled = 'n'
+                self.msg('%-4d%-4s%s:%d' %
+                         (bp.number, enabled,
+                          self.core.filename(bp.filename), bp.line))
+                self.msg('\trecord %s' % ' '.join(
+                    [source for source, code in bp.trace_exprs]))
+                if bp.hits:
+                    if (bp.hits > 1): ss = 's'
+                    else: ss = ''
+                    self.msg('\ttracepoint already hit %d time%s' %
+                             (bp.hits, ss))
+                    pass
+                pass
+            pass
+        buf = bpmgr.tracebuf
+        self.msg('%d of %d buffer entries used, %d dropped.' %
+                 (len(buf), buf.size, buf.dropped()))
+        return
+    pass
+
+if __name__ == '__main__':
+    import sys
+    from trepan import debugger as Mdebugger
+    from trepan.lib import tracepoint as Mtracepoint
+    from trepan.processor.command import info as Minfo
+    d = Mdebugger.Debugger()
+    i = Minfo.InfoCommand(d.core.processor)
+    sub = InfoTracepoints(i)
+    sub.run([])
+    bp = d.core.bpmgr.add_breakpoint(__file__, 10, trace_exprs=
+                                     Mtracepoint.compile_exprs(['sys']))
+    d.core.bpmgr.tracebuf.record(bp, sys._getframe())
+    sub.run([])
+    pass
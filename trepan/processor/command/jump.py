@@ -18,6 +18,7 @@ import inspect, os, sys
 # Our local modules
 from trepan.processor.command import base_cmd as Mbase_cmd
 from trepan.processor import cmdproc as Mcmdproc
+from trepan.lib import bytecode as Mbytecode
 
 
 class JumpCommand(Mbase_cmd.DebuggerCommand):
@@ -50,10 +51,14 @@ stopped or bottom-most execution frame frame."""
                                       ("jump: a line number is required, " +
                                        "got %s.") % args[1])
         if lineno is None: return False
+        co = self.proc.curframe.f_code
+        if lineno not in Mbytecode.code_info(co).line2offsets:
+            self.errmsg("jump: line %d doesn't start a statement in %s()" %
+                        (lineno, co.co_name))
+            return False
         try:
             # Set to change position, update our copy of the stack,
             # and display the new position
-            print(self.proc.curframe.f_trace)
             self.proc.curframe.f_lineno = lineno
             self.proc.stack[self.proc.curindex] = \
                 self.proc.stack[self.proc.curindex][0], lineno
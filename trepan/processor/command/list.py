@@ -60,6 +60,9 @@ number of lines to list instead.
 Wherever a number is expected, it does not need to be a constant --
 just something that evaluates to a positive integer.
 
+When `set listprofile` is on, each line is preceded by the number of
+times it was run and the time it took, as gathered by `profile trace`.
+
 Examples:
 --------
 
@@ -192,6 +195,11 @@ See also:
             last = max_line
 
         bplist = self.core.bpmgr.bplist
+        line_times = None
+        if self.settings['listprofile']:
+            line_times = self.core.profiler.lines_by_file(
+                self.core.canonic_code).get(canonic_filename, {})
+            pass
         opts = {
             'reload_on_change' : self.settings['reload'],
             'output'           : self.settings['highlight'],
@@ -212,7 +220,7 @@ See also:
                     line = line.rstrip('\n')
                     s = self.proc._saferepr(lineno).rjust(3)
                     if len(s) < 5: s += ' '
-                    if (canonic_filename, lineno,) in list(bplist.keys()):
+                    if (canonic_filename, lineno,) in bplist:
                         bp    = bplist[(canonic_filename, lineno,)][0]
                         a_pad = '%02d' % bp.number
                         s    += bp.icon_char()
@@ -228,6 +236,13 @@ See also:
                     else:
                         s += a_pad
                         pass
+                    if line_times is not None:
+                        if lineno in line_times:
+                            s = '%7d %8.4f ' % line_times[lineno] + s
+                        else:
+                            s = ' ' * 17 + s
+                            pass
+                        pass
                     self.msg(s + '\t' + line)
                     self.proc.list_lineno = lineno
                     pass
@@ -98,11 +98,26 @@ class MockDebuggerCore:
         self.last_lineno    = None
         self.last_filename  = None
         self.different_line = None
+        self.trace_scope    = None
+        self.trace_log      = None
         return
 
     def set_next(self, frame, step_events=None):
         pass
 
+    def set_trace_scope(self, scope):
+        self.trace_scope = scope
+        return
+
+    def update_dispatch(self):
+        pass
+
+    def breakpoints_changed(self):
+        pass
+
+    def frame_level(self, frame, event=None):
+        return 0
+
     def stop(self): pass
 
     def canonic(self, filename):
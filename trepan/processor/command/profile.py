@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+
+from trepan.processor.command import base_submgr as Mbase_submgr
+
+
+class ProfileCommand(Mbase_submgr.SubcommandMgr):
+    """Generic command for profiling the program being debugged.
+
+Type `profile` for a list of *profile* subcommands and what they do.
+Type `help profile *` for just a list of *profile* subcommands.
+"""
+
+    category      = 'support'
+    min_args      = 0
+    max_args      = None
+    name          = os.path.basename(__file__).split('.')[0]
+    need_stack    = False
+    short_help    = 'Find where the program spends its time'
+
+if __name__ == '__main__':
+    from trepan.processor.command import mock
+    d, cp = mock.dbg_setup()
+    command = ProfileCommand(cp, 'profile')
+    command.run(['profile'])
+    pass
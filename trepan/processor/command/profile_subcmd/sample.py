@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os, sys
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.lib import sampler as Msampler, stack as Mstack
+
+
+class ProfileSample(Mbase_subcmd.DebuggerSubcommand):
+    """**profile sample start** [*rate*]
+
+**profile sample stop**
+
+**profile sample report** [*count*]
+
+**profile sample tree**
+
+**profile sample folded** [*file*]
+
+**profile sample clear**
+
+A statistical profiler. While started, it notes where each thread
+is, *rate* times a second of CPU time (100 by default). Since there
+is no tracing, the program runs at close to full speed; debugger
+settings and breakpoints work as usual.
+
+`report` shows the *count* functions and lines with the most samples,
+10 by default. For a function, the first percentage counts samples in
+the function itself, the second those in the functions it calls too.
+
+`tree` shows the samples as a call tree, leaving out calls with less
+than 1% of them.
+
+`folded` gives the samples as folded stacks, the input of flame graph
+tools such as `flamegraph.pl`, writing them to *file* if given.
+
+`clear` throws away the samples taken so far.
+
+Examples:
+---------
+
+    profile sample start 200
+    continue
+    profile sample stop
+    profile sample report 20
+    profile sample folded /tmp/prog.folded
+
+See also:
+---------
+
+`profile trace`
+"""
+
+    min_abbrev = 1  # Min is profile s
+    need_stack = False
+    short_help = "Sample where the program runs"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        # Made on first use, once the debugger has a SignalManager.
+        self.sampler = None
+        return
+
+    def location(self, code, lineno=None):
+        return Mstack.format_code_location(self.core, code, lineno,
+                                           color=self.settings['highlight'])
+
+    def percent(self, count):
+        return 100.0 * count / self.sampler.samples
+
+    def run(self, args):
+        if not args:
+            args = ['report']
+            pass
+        action = args[0]
+        if self.sampler is None:
+            self.sampler = Msampler.Sampler(sigmgr=self.debugger.sigmgr)
+            pass
+        sampler = self.sampler
+        if 'start' == action:
+            if len(args) > 1:
+                rate = self.proc.get_int(args[1], min_value=1,
+                                         cmdname='profile sample start')
+                if rate is None: return
+                sampler.interval = 1.0 / rate
+                pass
+            sampler.start()
+            self.msg('Sampling %d times a second.' %
+                     round(1 / sampler.interval))
+        elif 'stop' == action:
+            sampler.stop()
+            self.msg('Sampling stopped; %d samples taken.' % sampler.samples)
+        elif 'clear' == action:
+            sampler.clear()
+            self.msg('Samples cleared.')
+        elif 'report' == action:
+            count = 10
+            if len(args) > 1:
+                count = self.proc.get_int(args[1], min_value=1,
+                                          cmdname='profile sample report')
+                if count is None: return
+                pass
+            self.report(count)
+        elif 'tree' == action:
+            self.tree()
+        elif 'folded' == action:
+            self.folded(args[1:])
+        else:
+            self.errmsg("Expecting start, stop, report, tree, folded or "
+                        "clear; got %s." % action)
+            pass
+        return
+
+    def report(self, count):
+        sampler = self.sampler
+        if not sampler.samples:
+            self.msg('No samples.')
+            return
+        self.msg('%d samples.' % sampler.samples)
+        self.section('  Own   All  Function')
+        for code, own, total in sampler.top_functions(count):
+            self.msg('%5.1f%% %5.1f%%  %s' %
+                     (self.percent(own), self.percent(total),
+                      self.location(code)))
+            pass
+        self.section('  Own  Line')
+        for (code, lineno), own in sampler.top_lines(count):
+            self.msg('%5.1f%%  %s' % (self.percent(own),
+                                      self.location(code, lineno)))
+            pass
+        return
+
+    def tree(self):
+        sampler = self.sampler
+        if not sampler.samples:
+            self.msg('No samples.')
+            return
+        least = sampler.samples / 100.0
+        todo = [(node, 0) for node in
+                reversed(sampler.call_tree().sorted_children())]
+        while todo:
+            node, depth = todo.pop()
+            if node.samples < least: continue
+            self.msg('%s%5.1f%% %s' % ('  ' * depth,
+                                       self.percent(node.samples),
+                                       self.location(node.code)))
+            todo += [(child, depth + 1) for child in
+                     reversed(node.sorted_children())]
+            pass
+        return
+
+    def folded(self, args):
+        lines = self.sampler.folded()
+        if not args:
+            for line in lines:
+                self.msg(line)
+                pass
+            return
+        filename = os.path.expanduser(args[0])
+        try:
+            f = open(filename, 'w')
+            for line in lines:
+                f.write(line + '\n')
+                pass
+            f.close()
+        except IOError:
+            self.errmsg('Error writing %s: %s' %
+                        (filename, sys.exc_info()[1]))
+            return
+        self.msg('%d stacks written to %s.' % (len(lines), filename))
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan import debugger as Mdebugger
+    from trepan.processor.command import profile as Mprofile
+    d = Mdebugger.Debugger()
+    p = Mprofile.ProfileCommand(d.core.processor)
+    sub = ProfileSample(p)
+    # This file is part of the debugger; count its frames anyway.
+    sub.sampler = Msampler.Sampler(sigmgr=d.sigmgr,
+                                   is_ignored=lambda code: False)
+
+    def spin(n):
+        t = 0
+        for i in range(n):
+            t += i
+            pass
+        return t
+    sub.run(['start', '500'])
+    for i in range(30):
+        spin(100000)
+        pass
+    sub.run(['stop'])
+    sub.run(['report', '3'])
+    sub.run(['tree'])
+    sub.run(['folded'])
+    pass
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.processor import cmdfns as Mcmdfns
+
+
+class ProfileTrace(Mbase_subcmd.DebuggerSubcommand):
+    """**profile trace** [**on**|**off**|**clear**]
+
+A deterministic profiler. While on, each call, line and return of the
+program is timed from its trace events. Times don't include those
+spent stopped in the debugger. Since every event has to be traced,
+the program runs much slower than it would; the times are best
+compared with each other.
+
+`clear` throws away what has been gathered so far. Without an
+argument, say whether the profiler is on.
+
+Use `info profile` to see the results, or `set listprofile` to have
+`list` show them beside the source.
+
+See also:
+---------
+
+`profile sample`, `info profile`
+"""
+
+    min_abbrev = 1  # Min is profile t
+    need_stack = False
+    short_help = "Time the program's functions and lines"
+
+    def run(self, args):
+        core = self.core
+        if not args:
+            self.msg('Trace profiling is %s.' %
+                     Mcmdfns.show_onoff(core.profiling))
+            return
+        if 'clear' == args[0]:
+            core.profiler.clear()
+            self.msg('Profile data cleared.')
+            return
+        try:
+            on = Mcmdfns.get_onoff(self.errmsg, args[0])
+        except ValueError:
+            return
+        core.set_profiling(on)
+        self.msg('Trace profiling is %s.' % Mcmdfns.show_onoff(on))
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan import debugger as Mdebugger
+    from trepan.processor.command import profile as Mprofile
+    d = Mdebugger.Debugger()
+    p = Mprofile.ProfileCommand(d.core.processor)
+    sub = ProfileTrace(p)
+    for args in ([], ['on'], ['off'], ['clear'], ['foo']):
+        sub.run(args)
+        pass
+    pass
@@ -28,7 +28,9 @@ Sets the events that the debugger will stop on. `all` can be used as
 an abbreviation for listing all event names.
 
 Changing trace event filters works independently of turning on or off
-tracing-event printing.
+tracing-event printing. Events not in the set are filtered out before
+they reach the debugger, so excluding events you don't care about also
+makes the debugged program run faster.
 
 Examples:
 ---------
@@ -60,7 +62,9 @@ See also:
                 eventset += tracer.ALL_EVENTS
             pass
         if [] != eventset:
+            self.debugger.settings['events']   = frozenset(eventset)
             self.debugger.settings['printset'] = frozenset(eventset)
+            self.core.update_dispatch()
             pass
         return
 
@@ -75,6 +79,6 @@ if __name__ == '__main__':
     for args in (['line'], ['bogus'],
                 ['call', 'return']):
         sub.run(args)
-        print(d.settings['printset'])
+        print(d.settings['events'])
         pass
     pass
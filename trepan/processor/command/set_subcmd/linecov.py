@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class SetCoverage(Mbase_subcmd.DebuggerSetBoolSubcommand):
+    """Set line coverage recording.
+
+With this on, every line the program runs is noted so that `info
+coverage` can show the lines that haven't been. Since this needs a
+'line' event everywhere, the program runs fully traced, as with
+stepping.
+
+Setting this off stops recording but keeps what has been recorded.
+
+See also:
+---------
+
+`show coverage`, `info coverage`
+"""
+
+    in_list    = True
+    min_abbrev = len('cov')    # Min 'set cov'
+    short_help = "Set recording the lines run"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSetBoolSubcommand.__init__(self, cmd)
+        # The module isn't named coverage, as that would hide the
+        # coverage package from pyficache when run as a demo.
+        self.name = 'coverage'
+        return
+
+    def run(self, args):
+        Mbase_subcmd.DebuggerSetBoolSubcommand.run(self, args)
+        self.core.update_dispatch()
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command.set_subcmd import __demo_helper__ as Mhelper
+    sub = Mhelper.demo_run(SetCoverage)
+    d = sub.proc.debugger
+    for args in (['on'], ['off']):
+        sub.run(args)
+        print(d.settings[sub.name])
+        pass
+    pass
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class SetListProfile(Mbase_subcmd.DebuggerSetBoolSubcommand):
+    """Set showing profile data in listings.
+
+With this on, `list` shows beside each line the number of times it
+was run and the time it took, as gathered by `profile trace`.
+
+See also:
+---------
+
+`show listprofile`, `profile trace`, `list`
+"""
+
+    in_list    = True
+    min_abbrev = len('listp')    # Min 'set listp'
+    short_help = "Set showing profile data in listings"
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command.set_subcmd import __demo_helper__ as Mhelper
+    sub = Mhelper.demo_run(SetListProfile)
+    d = sub.proc.debugger
+    for args in (['on'], ['off']):
+        sub.run(args)
+        print(d.settings['listprofile'])
+        pass
+    pass
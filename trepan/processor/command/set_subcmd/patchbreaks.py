@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class SetPatchbreaks(Mbase_subcmd.DebuggerSetBoolSubcommand):
+    """Set patching breakpoints into code.
+
+With this on, line breakpoints inside functions are made by rewriting
+the function's code to call the debugger.
+
+Normally a breakpoint is found by looking at trace events, so
+the whole program runs traced while there are any. With this on,
+the code of the functions holding line breakpoints gets a call to
+the debugger at those lines instead. When nothing else needs
+tracing, such as stepping or a breakpoint the code of which can't be
+rewritten, the rest of the program runs at full speed.
+
+Frames already running a function when its code is rewritten don't
+see the change; breakpoints in it are then also looked for with trace
+events. The original code is put back when the breakpoints go away or
+this is set off.
+
+See also:
+---------
+
+`show patchbreaks`, `break`
+"""
+
+    in_list    = True
+    min_abbrev = len('pa')    # Min 'set pa'
+    short_help = "Set patching breakpoints into code"
+
+    def run(self, args):
+        Mbase_subcmd.DebuggerSetBoolSubcommand.run(self, args)
+        self.core.breakpoints_changed()
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command.set_subcmd import __demo_helper__ as Mhelper
+    sub = Mhelper.demo_run(SetPatchbreaks)
+    d = sub.proc.debugger
+    for args in (['on'], ['off']):
+        sub.run(args)
+        print(d.settings['patchbreaks'])
+        pass
+    pass
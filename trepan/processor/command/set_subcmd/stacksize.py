@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.processor import cmdfns as Mcmdfns
+
+
+class SetStackSize(Mbase_subcmd.DebuggerSubcommand):
+    """**set stacksize** *count*
+
+Set the number of entries a *backtrace* command shows at a time. When
+there are more, `backtrace +` shows the next page. 0 means show them
+all.
+
+See also:
+---------
+
+`show stacksize`, `backtrace`"""
+
+    in_list    = True
+    min_abbrev = len('sta')  # Need at least "set sta"
+    short_help = 'Set the number of entries shown by backtrace'
+
+    def run(self, args):
+        Mcmdfns.run_set_int(self, ' '.join(args),
+                            "The 'stacksize' command requires an entry count.",
+                            0, None)
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command.set_subcmd import __demo_helper__ as Mhelper
+    Mhelper.demo_run(SetStackSize)
+    pass
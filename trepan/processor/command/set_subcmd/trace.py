@@ -28,6 +28,11 @@ See also "set events","set trace", and "show trace".
     in_list    = True
     min_abbrev = len('trace')  # Must use at least "set trace"
     short_help = "Set execution tracing"
+
+    def run(self, args):
+        Mbase_subcmd.DebuggerSetBoolSubcommand.run(self, args)
+        self.core.update_dispatch()
+        return
     pass
 
 if __name__ == '__main__':
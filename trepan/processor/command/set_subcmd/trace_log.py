@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os, sys
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class SetTraceLog(Mbase_subcmd.DebuggerSubcommand):
+
+    """**set trace-log** *file*
+
+**set trace-log** **off**
+
+Have the events traced by `set trace` written to *file* in a compact
+binary form, rather than printed. This is much faster than printing
+them, so large programs can be traced. Decode the log with the
+`trepan2-tracedump` program, which can also pick out events by file,
+function, thread and time.
+
+With `off`, the log is closed and events are printed again.
+
+Examples:
+---------
+
+  set trace-log /tmp/prog.trace
+  set trace on
+  continue
+  ...
+  $ trepan2-tracedump --function=main /tmp/prog.trace
+
+See also:
+---------
+
+`show trace-log`, `set trace`, `set events`
+    """
+
+    in_list    = True
+    min_abbrev = len('trace-l')
+    short_help = "Set a file to log traced events to"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        self.name = 'trace-log'
+        return
+
+    def run(self, args):
+        if len(args) != 1:
+            self.errmsg("set trace-log: expecting a file name or 'off'.")
+            return
+        if 'off' == args[0]:
+            self.core.set_trace_log(None)
+            self.msg('Traced events are printed.')
+            return
+        path = os.path.expanduser(args[0])
+        try:
+            self.core.set_trace_log(path)
+        except IOError:
+            self.errmsg('Error opening %s: %s' % (path, sys.exc_info()[1]))
+            return
+        self.msg('Traced events are logged to %s.' % path)
+        return
+    pass
+
+if __name__ == '__main__':
+    import tempfile
+    from trepan import debugger as Mdebugger
+    from trepan.processor.command import set as Mset
+    d = Mdebugger.Debugger()
+    s = Mset.SetCommand(d.core.processor)
+    sub = SetTraceLog(s)
+    path = tempfile.mktemp()
+    sub.run([path])
+    sub.run(['off'])
+    sub.run([])
+    os.unlink(path)
+    pass
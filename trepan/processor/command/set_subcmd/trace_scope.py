@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+from trepan.lib import scope as Mscope
+
+
+class SetTraceScope(Mbase_subcmd.DebuggerSubcommand):
+
+    """**set trace-scope** [**include** *pattern* ...] [**exclude** *pattern* ...]
+
+**set trace-scope** **all**
+
+Limit debugging to the modules given by *pattern*s. A pattern is a
+glob on the module name, like `myapp.*`, which also matches package
+`myapp` itself. `stdlib` stands for the Python standard library and
+`site-packages` for installed packages.
+
+If there are `include` patterns, only modules matching one of them
+are debugged. Modules matching an `exclude` pattern are never
+debugged. With `all` or no patterns, everything is debugged again.
+
+Code outside of the scope is not traced at all: stepping doesn't stop
+in it and breakpoints there are not hit. So the program runs there at
+nearly full speed.
+
+Examples:
+---------
+
+  set trace-scope include myapp.*      # Only look at our code
+  set trace-scope exclude stdlib site-packages
+  set trace-scope all                  # Back to tracing everything
+
+See also:
+---------
+
+`show trace-scope`, `set events`
+    """
+
+    in_list    = True
+    min_abbrev = len('trace-')
+    short_help = "Set the modules which get debugged"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        self.name = 'trace-scope'
+        return
+
+    def run(self, args):
+        if not args or ['all'] == args:
+            self.core.set_trace_scope(None)
+            self.msg('Tracing all modules.')
+            return
+        patterns = {'include': [], 'exclude': []}
+        which = None
+        for arg in args:
+            if arg in patterns:
+                which = arg
+            elif which is None:
+                self.errmsg("set trace-scope: expecting 'include' or "
+                            "'exclude' before %s." % arg)
+                return
+            else:
+                patterns[which].append(arg)
+                pass
+            pass
+        scope = Mscope.TraceScope(patterns['include'], patterns['exclude'])
+        self.core.set_trace_scope(scope)
+        self.msg('Trace scope: %s.' % scope)
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command import mock, set as Mset
+    d, cp = mock.dbg_setup()
+    s = Mset.SetCommand(cp)
+    sub = SetTraceScope(s)
+    for args in (['include', 'myapp.*', 'exclude', 'stdlib'],
+                 ['myapp.*'], ['all']):
+        sub.run(args)
+        print(d.core.trace_scope)
+        pass
+    pass
@@ -35,7 +35,7 @@ See also:
     min_abbrev = 2
 
     def run(self, args):
-        events = list(self.debugger.settings['printset'])
+        events = list(self.debugger.settings['events'])
         if events != []:
             events.sort()
             self.section('Trace events we may stop on:')
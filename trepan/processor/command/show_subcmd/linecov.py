@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class ShowCoverage(Mbase_subcmd.DebuggerShowBoolSubcommand):
+    """Show whether the lines run are being recorded
+
+See also `set coverage` and `info coverage`."""
+    min_abbrev = len('cov')
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerShowBoolSubcommand.__init__(self, cmd)
+        self.name = 'coverage'
+        return
+    pass
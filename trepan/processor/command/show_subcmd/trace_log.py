@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class ShowTraceLog(Mbase_subcmd.DebuggerSubcommand):
+    """**show trace-log**
+
+Show where the events traced by `set trace` go.
+
+See also:
+---------
+
+`set trace-log`
+"""
+    min_abbrev = len('trace-l')
+    short_help = "Show where traced events go"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        self.name = 'trace-log'
+        return
+
+    def run(self, args):
+        log = self.core.trace_log
+        if log is None:
+            self.msg('Traced events are printed.')
+        else:
+            self.msg('Traced events are logged to %s; %d so far.' %
+                     (log.path, log.records))
+            pass
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command import mock, show as Mshow
+    d, cp = mock.dbg_setup()
+    i = Mshow.ShowCommand(cp)
+    sub = ShowTraceLog(i)
+    sub.run([])
+    pass
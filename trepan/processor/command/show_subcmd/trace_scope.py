@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Our local modules
+from trepan.processor.command import base_subcmd as Mbase_subcmd
+
+
+class ShowTraceScope(Mbase_subcmd.DebuggerSubcommand):
+    """**show trace-scope**
+
+Show the modules which get debugged.
+
+See also:
+---------
+
+`set trace-scope`
+"""
+    min_abbrev = len('trace-')
+    short_help = "Show the modules which get debugged"
+
+    def __init__(self, cmd):
+        Mbase_subcmd.DebuggerSubcommand.__init__(self, cmd)
+        self.name = 'trace-scope'
+        return
+
+    def run(self, args):
+        scope = self.core.trace_scope
+        if scope is None:
+            self.msg('Tracing all modules.')
+        else:
+            self.msg('Trace scope: %s.' % scope)
+            pass
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command import mock, show as Mshow
+    from trepan.lib import scope as Mscope
+    d, cp = mock.dbg_setup()
+    i = Mshow.ShowCommand(cp)
+    sub = ShowTraceScope(i)
+    sub.run([])
+    d.core.trace_scope = Mscope.TraceScope(['myapp.*'])
+    sub.run([])
+    pass
@@ -13,7 +13,7 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
-import os
+import inspect, os
 import tracer
 
 # Our local modules
@@ -24,6 +24,8 @@ from trepan.processor import cmdfns as Mcmdfns
 class StepCommand(Mbase_cmd.DebuggerCommand):
     """**step**[**+**|**-**|**<**|**>**|**!**] [*event*...] [*count*]
 
+**step into** *function*
+
 Execute the current line, stopping at the next event.
 
 With an integer argument, step that many times.
@@ -44,6 +46,12 @@ run until the return for that call.)
 If no suffix is given, the debugger setting `different-line`
 determines this behavior.
 
+With `into`, stop only when *function* is called, skipping over any
+other calls made on the way. Those are run without tracing. If
+*function* isn't called, stop as `next` would. *function* is
+evaluated in the current frame; if it isn't a function there, it is
+matched by name.
+
 Examples:
 ---------
 
@@ -54,6 +62,7 @@ Examples:
   step call   # step only call events
   step>       # same as above
   step call line # Step line *and* call events
+  step into foo  # Step into foo() in say handle(foo(x))
 
 Related and similar is the `next` command.
 
@@ -74,7 +83,35 @@ See also:
     need_stack    = True
     short_help    = 'Step program (possibly entering called functions)'
 
+    def step_into_target(self, name):
+        """Return the code object of the function `name' gives in the
+        current frame. If it doesn't give one, return the name
+        for matching against code names."""
+        frame = self.proc.curframe
+        try:
+            func = eval(name, frame.f_globals, frame.f_locals)
+        except Exception:
+            return name.split('.')[-1]
+        if hasattr(func, 'im_func'):
+            func = func.im_func
+            pass
+        if inspect.isfunction(func):
+            return func.func_code
+        return name.split('.')[-1]
+
     def run(self, args):
+        if len(args) > 1 and 'into' == args[1]:
+            if len(args) != 3:
+                self.errmsg("Expecting a single function name after 'into'")
+                return False
+            target = self.step_into_target(args[2])
+            self.core.set_step_into(self.proc.frame, target)
+            self.core.different_line   = \
+                Mcmdfns.want_different_line(args[0],
+                                            self.settings['different'])
+            self.proc.continue_running = True  # Break out of command loop
+            return True
+
         step_events  = []
         if args[0][-1] == '>':
             step_events  = ['call']
@@ -117,7 +154,6 @@ See also:
         self.core.different_line   = \
             Mcmdfns.want_different_line(args[0], self.settings['different'])
         self.core.stop_level       = None
-        self.core.last_frame       = None
         self.core.stop_on_finish   = False
         self.proc.continue_running = True  # Break out of command read loop
         return True
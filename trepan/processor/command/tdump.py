@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os, sys
+
+# Our local modules
+from trepan.processor.command import base_cmd as Mbase_cmd
+from trepan.lib import tracepoint as Mtracepoint
+
+
+class TdumpCommand(Mbase_cmd.DebuggerCommand):
+    """**tdump** [*file*]
+
+Show the values tracepoints have recorded, oldest first. Each line
+gives the time, the thread, the tracepoint number and the values of
+its expressions.
+
+With *file*, write the lines to that file instead.
+
+See also:
+---------
+
+`tracepoint`, `info tracepoints`.
+"""
+
+    category      = 'breakpoints'
+    min_args      = 0
+    max_args      = 1
+    name          = os.path.basename(__file__).split('.')[0]
+    need_stack    = False
+    short_help    = 'Show or save the values recorded by tracepoints'
+
+    def run(self, args):
+        bpmgr = self.core.bpmgr
+        lines = []
+        for entry in bpmgr.tracebuf:
+            number = entry[2]
+            bp = None
+            if number < len(bpmgr.bpbynumber):
+                bp = bpmgr.bpbynumber[number]
+                pass
+            if bp and bp.trace_exprs is not None:
+                exprs = [source for source, code in bp.trace_exprs]
+            else:
+                exprs = None
+                pass
+            lines.append(Mtracepoint.format_entry(entry, exprs))
+            pass
+        if len(args) > 1:
+            filename = os.path.expanduser(args[1])
+            try:
+                f = open(filename, 'w')
+                for line in lines:
+                    f.write(line + '\n')
+                    pass
+                f.close()
+            except IOError:
+                self.errmsg('Error writing %s: %s' %
+                            (filename, sys.exc_info()[1]))
+                return
+            self.msg('%d entries written to %s.' % (len(lines), filename))
+        elif not lines:
+            self.msg('No values recorded.')
+        else:
+            for line in lines:
+                self.msg(line)
+                pass
+            pass
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan.processor.command import mock
+    d, cp = mock.dbg_setup()
+    command = TdumpCommand(cp)
+    command.run(['tdump'])
+    pass
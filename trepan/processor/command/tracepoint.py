@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os, sys
+
+# Our local modules
+from trepan.processor.command import base_cmd as Mbase_cmd
+from trepan.processor import cmdbreak as Mcmdbreak
+from trepan.lib import eval as Meval, tracepoint as Mtracepoint
+
+
+class TracepointCommand(Mbase_cmd.DebuggerCommand):
+    """**tracepoint** *location* *expression*
+
+Set a tracepoint: a breakpoint which doesn't stop the program. Each
+time *location* is reached, the value of *expression* is recorded
+along with the time, thread and tracepoint number in a ring buffer.
+Once the buffer is full, new entries replace the oldest ones.
+
+*location* is given as in `break`. *expression* is the rest of the
+line; to record several values, give a tuple. It is compiled once,
+when the tracepoint is set.
+
+Tracepoints are deleted, enabled and disabled like breakpoints.
+`set patchbreaks` works for them as well.
+
+Examples:
+---------
+
+   tracepoint 240 request.id       # Record request.id at line 240
+   tracepoint myapp.py:45 x, y[0]  # Record x and y[0]
+   tracepoint os.path 120 path     # Line 120 of module os.path
+   tracepoint handle_request len(args)
+
+See also:
+---------
+
+`tdump`, `info tracepoints`, `break`.
+"""
+
+    aliases       = ('tp',)
+    category      = 'breakpoints'
+    min_args      = 2
+    max_args      = None
+    name          = os.path.basename(__file__).split('.')[0]
+    need_stack    = True
+    short_help    = 'Set a tracepoint to record values without stopping'
+
+    def run(self, args):
+        func, filename, lineno, count = Mcmdbreak.parse_location(self,
+                                                                 args[1:])
+        if lineno is None:
+            Mcmdbreak.set_break(self, func, filename, lineno, None, False,
+                                args[:1+count])
+            return
+        source = ' '.join(args[1+count:])
+        if not source:
+            self.errmsg('Expecting an expression to record after the '
+                        'location.')
+            return
+        msg = Meval.syntax_error_msg(source)
+        if msg:
+            self.errmsg(msg)
+            return
+        trace_exprs = Mtracepoint.compile_exprs([source])
+        Mcmdbreak.set_break(self, func, filename, lineno, None, False,
+                            args[:1+count], trace_exprs)
+        return
+    pass
+
+if __name__ == '__main__':
+    from trepan import debugger as Mdebugger
+    d = Mdebugger.Debugger()
+    command = TracepointCommand(d.core.processor)
+    command.proc.frame = sys._getframe()
+    command.proc.setup()
+
+    def foo(x):
+        return 'bar' + x
+    command.run(['tracepoint', 'foo', 'x,', 'len(x)'])
+    command.run(['tracepoint', str(sys._getframe().f_lineno+1), 'foo'])
+    command.run(['tracepoint', '10', 'x+'])
+    pass
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#   Copyright (C) 2015 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Decode a trace log written after "set trace-log", printing the
+events which match the filters given."""
+
+import os, sys
+from fnmatch import fnmatch
+from optparse import OptionParser
+
+from trepan.lib import tracelog as Mtracelog
+
+# VERSION.py sets variable VERSION.
+from trepan.VERSION import VERSION as __version__
+
+
+def process_options(pkg_version, sys_argv, option_list=None):
+    """Handle tracedump options. The options from opt_parser and the
+    remaining arguments are returned."""
+    usage_str="""%prog [options] TRACE-LOG
+
+    Print the events in a trepan trace log. Filters of the same kind
+    are or'd together; filters of different kinds are and'ed."""
+
+    optparser = OptionParser(usage=usage_str, option_list=option_list,
+                             version="%%prog version %s" % pkg_version)
+
+    optparser.add_option("-f", "--file", dest="files", default=[],
+                         action="append", type='string', metavar='PATTERN',
+                         help="Show events in files whose path or "
+                         "basename matches glob PATTERN.")
+    optparser.add_option("-n", "--function", dest="functions", default=[],
+                         action="append", type='string', metavar='PATTERN',
+                         help="Show events in functions whose name "
+                         "matches glob PATTERN.")
+    optparser.add_option("-t", "--thread", dest="threads", default=[],
+                         action="append", type='string', metavar='NAME',
+                         help="Show events in thread NAME.")
+    optparser.add_option("-e", "--event", dest="events", default=[],
+                         action="append", type='choice',
+                         choices=list(Mtracelog.EVENT_NAMES),
+                         metavar='EVENT',
+                         help="Show only EVENT events: one of %s." %
+                         ', '.join(Mtracelog.EVENT_NAMES))
+    optparser.add_option("--start", dest="start", default=None,
+                         action="store", type='float', metavar='SECONDS',
+                         help="Skip events before SECONDS after the "
+                         "first one.")
+    optparser.add_option("--end", dest="end", default=None,
+                         action="store", type='float', metavar='SECONDS',
+                         help="Stop at events after SECONDS after the "
+                         "first one.")
+    optparser.add_option("--absolute", dest="absolute", default=False,
+                         action="store_true",
+                         help="Show times since the epoch rather than "
+                         "since the first event.")
+
+    (opts, args) = optparser.parse_args(sys_argv[1:])
+    if len(args) != 1:
+        optparser.error('expecting the name of one trace log')
+        pass
+    return opts, args
+
+
+def filter_records(records, opts):
+    """Yield the entries of `records' from read_records() which get
+    past the filters in `opts'. A time in each is made relative to
+    the first record unless opts.absolute is set."""
+    first = None
+    for when, thread_name, event, filename, name, line in records:
+        if first is None:
+            first = when
+            pass
+        relative = when - first
+        if opts.start is not None and relative < opts.start:
+            continue
+        if opts.end is not None and relative > opts.end:
+            break
+        if opts.events and event not in opts.events:
+            continue
+        if opts.threads and thread_name not in opts.threads:
+            continue
+        if opts.functions and not [p for p in opts.functions
+                                   if fnmatch(name, p)]:
+            continue
+        if opts.files:
+            basename = os.path.basename(filename)
+            if not [p for p in opts.files
+                    if fnmatch(filename, p) or fnmatch(basename, p)]:
+                continue
+            pass
+        if not opts.absolute:
+            when = relative
+            pass
+        yield (when, thread_name, event, filename, name, line)
+        pass
+    return
+
+
+def format_record(entry):
+    when, thread_name, event, filename, name, line = entry
+    return u'%.6f %s %-11s %s:%d %s' % (when, thread_name, event,
+                                        filename, line, name)
+
+
+def main(sys_argv=list(sys.argv)):
+    opts, args = process_options(__version__, sys_argv)
+    try:
+        f = open(args[0], 'rb')
+    except IOError:
+        sys.stderr.write("%s: can't open %s: %s\n" %
+                         (sys_argv[0], args[0], sys.exc_info()[1]))
+        return 1
+    try:
+        records = Mtracelog.read_records(f)
+        for entry in filter_records(records, opts):
+            print(format_record(entry).encode('utf-8'))
+            pass
+    except ValueError:
+        sys.stderr.write('%s: %s: %s\n' %
+                         (sys_argv[0], args[0], sys.exc_info()[1]))
+        return 1
+    except IOError:
+        # For example, a pipe closed by "| head".
+        pass
+    finally:
+        f.close()
+        pass
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main())
+    pass